@@ -0,0 +1,30 @@
+"""workers.site para filtrar la galería exportada por sitio
+
+Revision ID: 4d8e2a6c1f95
+Revises: 7b2d4e6f8a13
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4d8e2a6c1f95"
+down_revision: Union[str, Sequence[str], None] = "7b2d4e6f8a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("workers", sa.Column("site", sa.String(), nullable=True))
+    op.create_index(op.f("ix_workers_site"), "workers", ["site"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_workers_site"), table_name="workers")
+    op.drop_column("workers", "site")
@@ -0,0 +1,53 @@
+"""workers.updated_at por fila, índice (updated_at, id) y worker_tombstones
+
+Revision ID: 7b2d4e6f8a13
+Revises: 3c1f7a9e2b40
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2d4e6f8a13"
+down_revision: Union[str, Sequence[str], None] = "3c1f7a9e2b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filas viejas sin fecha: el cursor de /workers/changes necesita una.
+    # Hora UTC, como la que escribe la aplicación (no la zona del servidor)
+    op.execute(
+        "UPDATE workers SET updated_at = "
+        "COALESCE(updated_at, created_at, timezone('utc', now())) "
+        "WHERE updated_at IS NULL"
+    )
+    op.create_index(
+        "ix_workers_updated_at_id", "workers", ["updated_at", "id"], unique=False
+    )
+    op.create_table(
+        "worker_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("uuid", sa.String(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_worker_tombstones_deleted_at_id",
+        "worker_tombstones",
+        ["deleted_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_worker_tombstones_deleted_at_id", table_name="worker_tombstones")
+    op.drop_table("worker_tombstones")
+    op.drop_index("ix_workers_updated_at_id", table_name="workers")
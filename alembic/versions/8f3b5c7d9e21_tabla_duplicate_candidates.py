@@ -0,0 +1,52 @@
+"""tabla duplicate_candidates (auditoría de identidades duplicadas)
+
+Revision ID: 8f3b5c7d9e21
+Revises: 4d8e2a6c1f95
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8f3b5c7d9e21"
+down_revision: Union[str, Sequence[str], None] = "4d8e2a6c1f95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "duplicate_candidates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("audit_id", sa.String(), nullable=False),
+        sa.Column("worker_id", sa.Integer(), nullable=False),
+        sa.Column("worker_uuid", sa.String(), nullable=False),
+        sa.Column("duplicate_worker_id", sa.Integer(), nullable=False),
+        sa.Column("duplicate_worker_uuid", sa.String(), nullable=False),
+        sa.Column("similarity", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_duplicate_candidates_id"), "duplicate_candidates", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_duplicate_candidates_audit_id"),
+        "duplicate_candidates",
+        ["audit_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_duplicate_candidates_audit_id"), table_name="duplicate_candidates"
+    )
+    op.drop_index(op.f("ix_duplicate_candidates_id"), table_name="duplicate_candidates")
+    op.drop_table("duplicate_candidates")
@@ -0,0 +1,43 @@
+"""tabla worker_templates (varios embeddings por trabajador)
+
+Revision ID: a2c4e6f8b013
+Revises: 8f3b5c7d9e21
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a2c4e6f8b013"
+down_revision: Union[str, Sequence[str], None] = "8f3b5c7d9e21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "worker_templates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("worker_id", sa.Integer(), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["worker_id"], ["workers.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_worker_templates_worker_id"),
+        "worker_templates",
+        ["worker_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_worker_templates_worker_id"), table_name="worker_templates")
+    op.drop_table("worker_templates")
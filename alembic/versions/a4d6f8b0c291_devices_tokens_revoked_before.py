@@ -0,0 +1,31 @@
+"""devices.tokens_revoked_before (revocación compartida entre procesos)
+
+Revision ID: a4d6f8b0c291
+Revises: f2c4e6a8b179
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d6f8b0c291"
+down_revision: Union[str, Sequence[str], None] = "f2c4e6a8b179"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "devices",
+        sa.Column("tokens_revoked_before", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("devices", "tokens_revoked_before")
@@ -0,0 +1,47 @@
+"""tabla devices (credenciales de los tablets)
+
+Revision ID: c5e7a9b1d024
+Revises: a2c4e6f8b013
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e7a9b1d024"
+down_revision: Union[str, Sequence[str], None] = "a2c4e6f8b013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "devices",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("device_id", sa.String(), nullable=False),
+        sa.Column("secret_hash", sa.String(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("refresh_token_hash", sa.String(length=64), nullable=True),
+        sa.Column("refresh_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_devices_device_id"), "devices", ["device_id"], unique=True)
+    op.create_index(
+        op.f("ix_devices_refresh_token_hash"),
+        "devices",
+        ["refresh_token_hash"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_devices_refresh_token_hash"), table_name="devices")
+    op.drop_index(op.f("ix_devices_device_id"), table_name="devices")
+    op.drop_table("devices")
@@ -0,0 +1,43 @@
+"""devices: marca de agua de sincronización
+
+Revision ID: d7f9b1c3e546
+Revises: c5e7a9b1d024
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d7f9b1c3e546"
+down_revision: Union[str, Sequence[str], None] = "c5e7a9b1d024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "devices",
+        sa.Column("high_water_mark", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "devices",
+        sa.Column(
+            "acknowledged_total", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column(
+        "devices",
+        sa.Column("last_sync_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("devices", "last_sync_at")
+    op.drop_column("devices", "acknowledged_total")
+    op.drop_column("devices", "high_water_mark")
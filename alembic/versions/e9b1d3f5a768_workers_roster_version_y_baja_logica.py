@@ -0,0 +1,66 @@
+"""workers.roster_version como cursor de cambios y baja lógica (deleted_at)
+
+Revision ID: e9b1d3f5a768
+Revises: d7f9b1c3e546
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e9b1d3f5a768"
+down_revision: Union[str, Sequence[str], None] = "d7f9b1c3e546"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las filas existentes quedan en la versión 0: el keyset (roster_version, id)
+    # las ordena por id y todo cambio posterior tiene una versión mayor
+    op.add_column(
+        "workers",
+        sa.Column(
+            "roster_version", sa.BigInteger(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column("workers", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_workers_roster_version_id",
+        "workers",
+        ["roster_version", "id"],
+        unique=False,
+    )
+    op.drop_index("ix_workers_updated_at_id", table_name="workers")
+    # Las bajas ahora son lógicas: los tombstones ya no se usan. Los cursores
+    # viejos (fecha, id) dejan de valer: /workers/changes responde 400 y el
+    # tablet vuelve a sincronizar el padrón completo
+    op.drop_index("ix_worker_tombstones_deleted_at_id", table_name="worker_tombstones")
+    op.drop_table("worker_tombstones")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        "worker_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("uuid", sa.String(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_worker_tombstones_deleted_at_id",
+        "worker_tombstones",
+        ["deleted_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_workers_updated_at_id", "workers", ["updated_at", "id"], unique=False
+    )
+    op.drop_index("ix_workers_roster_version_id", table_name="workers")
+    op.drop_column("workers", "deleted_at")
+    op.drop_column("workers", "roster_version")
@@ -0,0 +1,56 @@
+"""tabla duplicate_audits (estado de cada auditoría de duplicados)
+
+Revision ID: f2c4e6a8b179
+Revises: e9b1d3f5a768
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c4e6a8b179"
+down_revision: Union[str, Sequence[str], None] = "e9b1d3f5a768"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "duplicate_audits",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("threshold", sa.Float(), nullable=False),
+        sa.Column("workers", sa.Integer(), nullable=True),
+        sa.Column("pairs", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_duplicate_audits_started_at"),
+        "duplicate_audits",
+        ["started_at"],
+        unique=False,
+    )
+    # Las auditorías anteriores solo dejaron sus pares: quedan como
+    # terminadas (el umbral no se guardaba, se toma la menor similitud)
+    op.execute("""
+        INSERT INTO duplicate_audits
+            (id, status, threshold, pairs, started_at, finished_at)
+        SELECT audit_id, 'done', min(similarity), count(*),
+               min(created_at), max(created_at)
+        FROM duplicate_candidates
+        GROUP BY audit_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_duplicate_audits_started_at"), table_name="duplicate_audits")
+    op.drop_table("duplicate_audits")
@@ -2,13 +2,22 @@
 Middleware de autenticación para proteger endpoints.
 """
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.auth.jwt_handler import verify_token
+import hmac
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Security, status
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
+from app.auth.token_cache import token_cache
+from app.core.config import get_settings
+
+settings = get_settings()
 
 # Esquema de seguridad (Bearer Token)
 security = HTTPBearer()
 
+# Credencial de administración (header X-Admin-Key)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
 
 async def get_current_device(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -22,16 +31,44 @@ async def get_current_device(
         ):
             print(f"Dispositivo autenticado: {device['device_id']}")
 
-    Si el token es inválido, lanza HTTPException 401 Unauthorized
+    Si el token es inválido, lanza HTTPException 401 Unauthorized.
+    La firma se verifica una vez por token (ver app/auth/token_cache.py).
     """
     token = credentials.credentials
 
     try:
-        payload = verify_token(token)
+        payload = token_cache.verify(token)
         return payload
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def require_admin(
+    admin_key: Optional[str] = Security(admin_key_header),
+) -> None:
+    """
+    Dependencia para endpoints de administración (no para los tablets):
+    exige el header X-Admin-Key igual a ADMIN_API_KEY.
+
+        @router.delete("/{worker_uuid}", dependencies=[Depends(require_admin)])
+
+    Sin ADMIN_API_KEY configurada esos endpoints quedan deshabilitados (403).
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Endpoint de administración deshabilitado (ADMIN_API_KEY)",
+        )
+    if admin_key is None or not hmac.compare_digest(
+        admin_key.encode(), settings.ADMIN_API_KEY.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Credencial de administración inválida",
+        )
@@ -29,10 +29,10 @@ def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     # El token expira en 15 minutos (configurado en .env)
 
-    expire = datetime.now(timezone.utc) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # iat con fracción de segundo: se compara con tokens_revoked_before
+    to_encode.update({"exp": expire, "iat": now.timestamp()})
     # Crear el token
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
@@ -0,0 +1,93 @@
+"""
+Revocación de access tokens compartida entre procesos.
+
+Cerrar sesión (POST /auth/revoke) o bloquear un tablet guarda en
+devices.tokens_revoked_before desde cuándo valen sus tokens: los emitidos
+antes (claim iat) se rechazan. Cada proceso lee esa columna cada
+AUTH_REVOCATION_SYNC_SECONDS en un hilo y la vuelca al caché de tokens,
+así la revocación llega a todos los workers de uvicorn sin una consulta
+por request. En el proceso que revoca vale al instante.
+
+Solo se leen las revocaciones de la vida de un access token
+(ACCESS_TOKEN_EXPIRE_MINUTES): las anteriores ya no afectan a ningún
+token vigente.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.auth.token_cache import VerifiedTokenCache, token_cache
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.device import Device
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def load_revocations(db: Session, cutoff: float) -> Dict[str, float]:
+    """device_id -> tokens_revoked_before (timestamp) posteriores a cutoff"""
+    rows = db.execute(
+        select(Device.device_id, Device.tokens_revoked_before).where(
+            Device.tokens_revoked_before > datetime.fromtimestamp(cutoff, timezone.utc)
+        )
+    ).all()
+    return {device_id: before.timestamp() for device_id, before in rows}
+
+
+class RevocationSync:
+    """Hilo que vuelca las revocaciones de la BD al caché de tokens"""
+
+    def __init__(self, cache: VerifiedTokenCache, interval: float):
+        self.cache = cache
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_sync_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def sync_once(self) -> None:
+        """Una lectura de la BD"""
+        now = time.time()
+        cutoff = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        with SessionLocal() as db:
+            self.cache.load_revocations(load_revocations(db, cutoff), cutoff)
+        self.last_sync_at = now
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+                self.last_error = None
+            except Exception as e:
+                # La BD caída no mata al hilo: se reintenta en el próximo ciclo
+                self.last_error = str(e)
+                logger.exception("Error leyendo las revocaciones de tokens")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Arranca el hilo (no hace nada con interval 0)"""
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="token-revocations", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# Instancia única (la arranca el lifespan de la app)
+revocation_sync = RevocationSync(token_cache, settings.AUTH_REVOCATION_SYNC_SECONDS)
@@ -0,0 +1,178 @@
+"""
+Caché de tokens JWT ya verificados.
+
+Un tablet usa el mismo token durante toda su vida (30 minutos) y cada
+request volvía a decodificarlo y a verificar la firma. Con este caché la
+verificación completa (verify_token) se hace una vez por token; después
+basta con buscar el digest en un diccionario.
+
+- Clave: sha256 del token (no se guarda el token en claro).
+- Cada entrada vence en el `exp` del token.
+- En cada acierto se revisan también, en O(1), la lista de revocación
+  (tokens y dispositivos) y la lista de dispositivos permitidos.
+
+Las revocaciones de este proceso valen al instante. Las de otros
+procesos llegan desde devices.tokens_revoked_before con RevocationSync
+(app/auth/revocation_sync.py), como mucho AUTH_REVOCATION_SYNC_SECONDS
+después.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+
+from app.auth.jwt_handler import verify_token
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def token_digest(token: str) -> bytes:
+    """Clave del caché: sha256 del token"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """Caché LRU de payloads verificados, seguro entre hilos"""
+
+    def __init__(self, max_size: int, allowed_devices: Optional[Iterable[str]] = None):
+        self.max_size = max_size
+        # None = cualquier dispositivo
+        self.allowed_devices: Optional[Set[str]] = (
+            set(allowed_devices) if allowed_devices is not None else None
+        )
+        # digest -> (payload, exp)
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        # digest -> exp (pasado el exp ya no hace falta recordarlo)
+        self._revoked_tokens: Dict[bytes, float] = {}
+        # device_id -> timestamp: se rechazan sus tokens con iat anterior
+        self._revoked_before: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.rejections = 0
+
+    def _reject(self, detail: str) -> HTTPException:
+        self.rejections += 1
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    def _check(self, digest: bytes, payload: dict) -> None:
+        """Revocación y lista de permitidos (en cada request)"""
+        device_id = payload.get("device_id")
+        revoked_before = self._revoked_before.get(device_id)
+        if digest in self._revoked_tokens or (
+            revoked_before is not None and payload.get("iat", 0) < revoked_before
+        ):
+            raise self._reject("Token revocado")
+        if self.allowed_devices is not None and device_id not in self.allowed_devices:
+            raise self._reject("Dispositivo no autorizado")
+
+    def verify(self, token: str) -> dict:
+        """
+        Payload del token: del caché si ya se verificó, si no con
+        verify_token (firma + exp) y se guarda hasta su exp.
+
+        Raises:
+            HTTPException: 401 si el token es inválido, expiró, fue
+                revocado o el dispositivo no está permitido
+        """
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    self._check(digest, entry[0])
+                    return entry[0]
+                del self._entries[digest]
+                self.expirations += 1
+            self.misses += 1
+
+        # Verificación completa fuera del lock
+        payload = verify_token(token)
+        with self._lock:
+            self._check(digest, payload)
+            exp = payload.get("exp")
+            if exp is not None:
+                self._entries[digest] = (payload, float(exp))
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def revoke_token(self, token: str, exp: Optional[float] = None) -> None:
+        """Revoca un token (hasta su exp; sin exp, hasta reiniciar)"""
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if exp is None:
+                exp = entry[1] if entry is not None else float("inf")
+            self._revoked_tokens[digest] = exp
+            # Los tokens revocados que ya vencieron se rechazan solos
+            for revoked, revoked_exp in list(self._revoked_tokens.items()):
+                if revoked_exp <= now:
+                    del self._revoked_tokens[revoked]
+
+    def revoke_device(self, device_id: str, before: float) -> None:
+        """Revoca los tokens del dispositivo emitidos antes de `before`"""
+        with self._lock:
+            current = self._revoked_before.get(device_id, float("-inf"))
+            self._revoked_before[device_id] = max(current, before)
+
+    def load_revocations(self, revoked_before: Dict[str, float], cutoff: float) -> None:
+        """
+        Suma las revocaciones por dispositivo leídas de la BD
+        (RevocationSync) y olvida las anteriores a cutoff: todo token
+        emitido antes ya venció.
+        """
+        with self._lock:
+            merged = {d: t for d, t in self._revoked_before.items() if t > cutoff}
+            for device_id, before in revoked_before.items():
+                merged[device_id] = max(before, merged.get(device_id, before))
+            self._revoked_before = merged
+
+    def clear(self) -> None:
+        """Vacía el caché (no la lista de revocación)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Contadores de hits/misses"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "expirations": self.expirations,
+            "rejections": self.rejections,
+            "revoked_tokens": len(self._revoked_tokens),
+            "revoked_devices": len(self._revoked_before),
+        }
+
+
+def _allowed_devices() -> Optional[Set[str]]:
+    if not settings.AUTH_DEVICE_ALLOWLIST:
+        return None
+    return {d.strip() for d in settings.AUTH_DEVICE_ALLOWLIST.split(",") if d.strip()}
+
+
+# Instancia única usada por get_current_device
+token_cache = VerifiedTokenCache(
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE, allowed_devices=_allowed_devices()
+)
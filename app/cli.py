@@ -0,0 +1,123 @@
+"""
+Tareas de mantenimiento por línea de comandos.
+
+Uso:
+    python -m app.cli snapshot [--path gallery.snap]
+    python -m app.cli audit-duplicates [--threshold 0.85] [--workers 4] [--csv pares.csv]
+    python -m app.cli create-device tablet_001 [--secret ...]
+    python -m app.cli set-device-active tablet_001 --disable
+"""
+
+import argparse
+import logging
+import secrets
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.services.device_service import DeviceService
+from app.services.duplicate_audit_service import DuplicateAuditService
+from app.services.face_service import FaceService
+
+settings = get_settings()
+
+
+def snapshot(args) -> None:
+    """Regenera el snapshot de la galería (incluye el delta pendiente)"""
+    path = args.path or settings.FACE_SNAPSHOT_PATH
+    if not path:
+        raise SystemExit("Falta --path o FACE_SNAPSHOT_PATH")
+    with SessionLocal() as db:
+        written = FaceService.write_snapshot(db, path)
+    print(f"{path}: {len(written)} trabajadores, versión {written.version}")
+
+
+def audit_duplicates(args) -> None:
+    """Busca pares de trabajadores registrados dos veces"""
+    with SessionLocal() as db:
+        summary = DuplicateAuditService.run(
+            db,
+            threshold=args.threshold,
+            workers=args.workers,
+            csv_path=args.csv,
+            save=not args.no_save,
+        )
+    print(
+        f"Auditoría {summary['audit_id']}: {summary['pairs']} pares sobre "
+        f"{summary['threshold']} entre {summary['workers']} trabajadores"
+    )
+
+
+def create_device(args) -> None:
+    """Da de alta un tablet (el secreto se genera si no se indica)"""
+    secret = args.secret or secrets.token_urlsafe(24)
+    with SessionLocal() as db:
+        try:
+            DeviceService.create_device(db, args.device_id, secret)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    print(f"Dispositivo {args.device_id} creado")
+    if not args.secret:
+        print(f"Secreto (se muestra una sola vez): {secret}")
+
+
+def set_device_active(args) -> None:
+    """Habilita o bloquea un tablet"""
+    with SessionLocal() as db:
+        try:
+            DeviceService.set_active(db, args.device_id, not args.disable)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    if not args.disable:
+        print(f"Dispositivo {args.device_id} habilitado")
+        return
+    if settings.AUTH_REVOCATION_SYNC_SECONDS > 0:
+        tokens = (
+            "access tokens revocados (los servidores los rechazan en "
+            f"{settings.AUTH_REVOCATION_SYNC_SECONDS:g} s como mucho)"
+        )
+    else:
+        tokens = (
+            "los access tokens vigentes NO se revocan (AUTH_REVOCATION_SYNC_SECONDS=0)"
+            f": valen hasta vencer, {settings.ACCESS_TOKEN_EXPIRE_MINUTES} min"
+        )
+    print(f"Dispositivo {args.device_id} bloqueado: refresh token invalidado, {tokens}")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Tareas de mantenimiento")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_parser = commands.add_parser("snapshot", help=snapshot.__doc__)
+    snapshot_parser.add_argument("--path", help="Destino (default FACE_SNAPSHOT_PATH)")
+    snapshot_parser.set_defaults(handler=snapshot)
+
+    audit_parser = commands.add_parser(
+        "audit-duplicates", help=audit_duplicates.__doc__
+    )
+    audit_parser.add_argument("--threshold", type=float, help="Similitud mínima")
+    audit_parser.add_argument("--workers", type=int, default=1, help="Procesos")
+    audit_parser.add_argument("--csv", help="Escribir los pares en este CSV")
+    audit_parser.add_argument(
+        "--no-save", action="store_true", help="No guardar en duplicate_candidates"
+    )
+    audit_parser.set_defaults(handler=audit_duplicates)
+
+    device_parser = commands.add_parser("create-device", help=create_device.__doc__)
+    device_parser.add_argument("device_id")
+    device_parser.add_argument("--secret", help="Secreto del tablet (máx. 72 bytes)")
+    device_parser.set_defaults(handler=create_device)
+
+    active_parser = commands.add_parser(
+        "set-device-active", help=set_device_active.__doc__
+    )
+    active_parser.add_argument("device_id")
+    active_parser.add_argument("--disable", action="store_true", help="Bloquear")
+    active_parser.set_defaults(handler=set_device_active)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Lee variables de entorno y las expone de forma segura.
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -15,10 +16,98 @@ class Settings(BaseSettings):
 
     # Base de datos
     DATABASE_URL: str
+    # Base de datos async (asyncpg). Si DB_ASYNC=true las rutas usan AsyncSession
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None  # Por defecto se deriva de DATABASE_URL
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 10
+    # Sincronización en streaming (NDJSON)
+    SYNC_STREAM_CHUNK_SIZE: int = 500  # Registros por INSERT / por acuse
+    SYNC_STREAM_MAX_LINE_BYTES: int = 64 * 1024  # Límite por línea NDJSON
+    # Ingesta write-behind: /checkin responde 202 y un flusher escribe en lote
+    INGEST_WRITE_BEHIND: bool = False
+    INGEST_QUEUE_PATH: str = "ingest_queue.db"  # Log durable local (SQLite WAL)
+    INGEST_FLUSH_INTERVAL_SECONDS: float = 0.5
+    INGEST_FLUSH_BATCH_SIZE: int = 1000
+    # Reintentos de registros con error o trabajador inexistente antes de
+    # pasarlos a dead_letter (espera: base x 2^intento)
+    INGEST_MAX_ATTEMPTS: int = 8
+    INGEST_RETRY_BASE_SECONDS: float = 1.0
+    # Caché en memoria de trabajadores (uuid -> id, nombre)
+    WORKER_CACHE_SIZE: int = 50_000
+    WORKER_CACHE_TTL_SECONDS: float = 300
+    # Cada cuánto se consulta roster_version para detectar cambios de otros procesos
+    WORKER_CACHE_VERSION_CHECK_SECONDS: float = 5
+    # Reconocimiento facial: índice aproximado (IVF) para galerías grandes
+    FACE_ANN_MIN_GALLERY: int = 50_000  # Desde este tamaño se usa el índice
+    FACE_ANN_N_LISTS: Optional[int] = None  # Clusters (por defecto ~sqrt(n))
+    FACE_ANN_NPROBE: int = 16  # Clusters visitados por consulta (recall vs. latencia)
+    FACE_ANN_INDEX_PATH: Optional[str] = None  # .npz para no reentrenar al reiniciar
+    FACE_GALLERY_STORAGE: str = "float32"  # float32 | float16 | int8 (dos etapas)
+    FACE_RESCORE_CANDIDATES: int = 64  # Candidatos re-puntuados en float32 (int8)
+    # Snapshot mapeado (np.memmap) de la galería
+    FACE_SNAPSHOT_PATH: Optional[str] = None
+    FACE_GALLERY_MAX_DELTA: int = 10_000  # Cambios en memoria antes de compactar
+    FACE_GALLERY_COMPACT_INTERVAL_SECONDS: int = 3600  # Compactación periódica
+    GALLERY_EXPORT_CACHE_SIZE: int = 4  # Archivos de galería exportada en memoria
+    FACE_VERIFY_THRESHOLD: float = 0.6  # Similitud coseno mínima en /faces/verify
+    # Rostro ya enrolado al registrar: off | flag | reject
+    FACE_DUPLICATE_POLICY: str = "off"
+    # Similitud desde la que se considera el mismo
+    FACE_DUPLICATE_THRESHOLD: float = 0.85
+    FACE_AUDIT_BLOCK_SIZE: int = 2048  # Filas por bloque en la auditoría de duplicados
+    FACE_TEMPLATE_CANDIDATES: int = 32  # Candidatos re-puntuados con templates (0 = no)
+
+    # Inferencia de embeddings en el servidor (tablets sin el modelo)
+    FACE_INFERENCE_ENABLED: bool = False
+    FACE_MODEL_PATH: str = "mobilefacenet.tflite"
+    # Procesos por worker de uvicorn (por defecto, uno por núcleo, hasta 4)
+    FACE_INFERENCE_WORKERS: Optional[int] = None
+    FACE_INFERENCE_MAX_BATCH: int = 32
+    FACE_INFERENCE_MAX_DELAY_MS: float = 10.0  # Espera máxima para juntar un batch
     # JWT (autenticación)
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000  # Tokens ya verificados en memoria
+    # device_id separados por coma (None = todos)
+    AUTH_DEVICE_ALLOWLIST: Optional[str] = None
+    AUTH_BCRYPT_ROUNDS: int = 12  # Costo de bcrypt para los secretos de los tablets
+    # Hilos para bcrypt (por defecto, mitad de los núcleos)
+    AUTH_HASH_WORKERS: Optional[int] = None
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Cada cuánto cada proceso lee las revocaciones de la BD (0 = nunca)
+    AUTH_REVOCATION_SYNC_SECONDS: float = 5.0
+    # Credencial (header X-Admin-Key) de los endpoints de administración,
+    # p. ej. dar de baja trabajadores. None = deshabilitados
+    ADMIN_API_KEY: Optional[str] = None
+    # Límites de tasa (token buckets) para /api/v1
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_DEVICE_PER_SECOND: float = 2.0  # Requests por segundo por tablet
+    RATE_LIMIT_DEVICE_BURST: int = 20  # Ráfaga permitida por tablet
+    RATE_LIMIT_GLOBAL_PER_SECOND: float = 200.0  # Requests por segundo del proceso
+    RATE_LIMIT_GLOBAL_BURST: int = 400
+    RATE_LIMIT_RETRY_JITTER_SECONDS: float = 2.0  # Jitter agregado a Retry-After
+    # Límites de /auth por IP (pedir tokens no requiere token)
+    RATE_LIMIT_AUTH_ENABLED: bool = True
+    RATE_LIMIT_AUTH_PER_SECOND: float = 1.0  # Requests por segundo por IP
+    # Ráfaga por IP: alcanza para un turno de tablets detrás de un mismo NAT
+    RATE_LIMIT_AUTH_BURST: int = 60
+    RATE_LIMIT_AUTH_GLOBAL_PER_SECOND: float = 50.0  # Requests a /auth del proceso
+    RATE_LIMIT_AUTH_GLOBAL_BURST: int = 200
+    # Descarte de carga: 429 mientras haya sobrecarga (None = sin límite)
+    LOAD_SHED_MAX_IN_FLIGHT: Optional[int] = None
+    LOAD_SHED_MAX_POOL_WAIT_MS: Optional[float] = None
+    LOAD_SHED_RETRY_AFTER_SECONDS: float = 2.0
+    # Plan de sincronización que se sugiere a los tablets según la carga
+    # Intervalo entre sincronizaciones sin carga
+    SYNC_PLAN_INTERVAL_SECONDS: float = 300
+    SYNC_PLAN_MAX_BACKOFF: float = 6.0  # Con carga máxima: intervalo x (1 + esto)
+    SYNC_PLAN_MAX_BATCH: int = 100  # Registros por /sync/batch sin carga
+    SYNC_PLAN_MIN_BATCH: int = 20  # Registros por /sync/batch con carga máxima
+    SYNC_PLAN_MAX_CONCURRENCY: int = 4  # Requests simultáneos por tablet sin carga
+    SYNC_PLAN_MAX_INGEST_LAG_SECONDS: float = 30  # Lag de la cola = carga máxima
+    SYNC_PLAN_REFRESH_SECONDS: float = 1.0  # Cada cuánto se recalcula la carga
     # API
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "SIOMA Attendance API"
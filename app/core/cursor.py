@@ -0,0 +1,64 @@
+"""
+Cursores opacos para paginación y sincronización incremental.
+
+Un cursor es la última clave vista (por ejemplo (updated_at, id)),
+serializada en JSON y codificada en base64 url-safe. Para el cliente
+es un string que solo tiene que devolver tal cual.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica una clave de paginación.
+
+    Ejemplo:
+        encode_cursor(worker.updated_at, worker.id) -> "WyIyMDI1LTEwLTI0VD..."
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    Decodifica un cursor y convierte cada valor al tipo indicado.
+
+    Ejemplo:
+        updated_at, worker_id = decode_cursor(cursor, datetime, int)
+
+    Raises:
+        ValueError: Si el cursor está mal formado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        ]
+    except (ValueError, TypeError):
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+def keyset_page(
+    rows: Sequence[Any], limit: int, key: Callable[[Any], tuple]
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Arma una página a partir de filas leídas con LIMIT limit + 1.
+
+    La fila extra solo indica que hay más; no se devuelve.
+
+    Returns:
+        (items, next_cursor). next_cursor es None en la última página.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    return items, encode_cursor(*key(items[-1]))
@@ -0,0 +1,171 @@
+"""
+Descarte de carga (load shedding).
+
+Cuando vuelve el WiFi en un campo todos los tablets sincronizan a la vez
+y el pool de conexiones se satura: los requests se encolan esperando una
+conexión hasta dar timeout, y los reintentos empeoran todo. En vez de
+eso, LoadSheddingMiddleware responde 429 con Retry-After apenas hay
+señales de sobrecarga:
+
+- requests en curso > LOAD_SHED_MAX_IN_FLIGHT
+- espera promedio por una conexión del pool > LOAD_SHED_MAX_POOL_WAIT_MS
+
+La espera del pool se mide en cada checkout (TimedQueuePool y
+TimedAsyncQueuePool, los pools de los motores sync y async) y se suaviza
+con un promedio móvil que decae con el tiempo: si no hay checkouts nuevos
+la señal se apaga sola y se vuelve a aceptar tráfico.
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Iterable, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+EWMA_ALPHA = 0.2  # Peso de cada checkout nuevo en el promedio
+EWMA_DECAY_SECONDS = 1.0  # Sin checkouts, la espera promedio cae ~63% por segundo
+
+
+def retry_after(wait_seconds: float) -> str:
+    """
+    Valor del header Retry-After: la espera más un jitter al azar, para
+    que los tablets rechazados no vuelvan todos en el mismo segundo.
+    """
+    jitter = random.uniform(0, settings.RATE_LIMIT_RETRY_JITTER_SECONDS)
+    return str(max(1, math.ceil(wait_seconds + jitter)))
+
+
+class LoadMonitor:
+    """Requests en curso y espera del pool de conexiones de este proceso"""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_pool_wait_ms: Optional[float] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.in_flight = 0
+        self._pool_wait_ms = 0.0
+        self._pool_wait_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.requests_total = 0  # Aceptados (la tasa la calcula SyncPlanService)
+        self.shed_total = 0
+        self.checkouts = 0
+
+    def record_pool_wait(self, seconds: float) -> None:
+        """Registra cuánto tardó un checkout del pool (lo llaman los pools)"""
+        with self._lock:
+            now = time.monotonic()
+            sample_ms = seconds * 1000
+            current = self._decayed_wait_ms(now)
+            self._pool_wait_ms = current + EWMA_ALPHA * (sample_ms - current)
+            self._pool_wait_at = now
+            self.checkouts += 1
+
+    def _decayed_wait_ms(self, now: float) -> float:
+        elapsed = now - self._pool_wait_at
+        return self._pool_wait_ms * math.exp(-elapsed / EWMA_DECAY_SECONDS)
+
+    @property
+    def pool_wait_ms(self) -> float:
+        """Espera promedio reciente por una conexión, en milisegundos"""
+        return self._decayed_wait_ms(time.monotonic())
+
+    def overloaded(self) -> Optional[str]:
+        """Motivo de sobrecarga, o None si se puede aceptar el request"""
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return "Demasiados requests en curso"
+        if (
+            self.max_pool_wait_ms is not None
+            and self.pool_wait_ms > self.max_pool_wait_ms
+        ):
+            return "Base de datos saturada"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pool_wait_ms": round(self.pool_wait_ms, 2),
+            "max_pool_wait_ms": self.max_pool_wait_ms,
+            "checkouts": self.checkouts,
+            "requests_total": self.requests_total,
+            "shed_total": self.shed_total,
+        }
+
+
+# Instancia única: la alimentan los pools y la consulta el middleware
+load_monitor = LoadMonitor(
+    max_in_flight=settings.LOAD_SHED_MAX_IN_FLIGHT,
+    max_pool_wait_ms=settings.LOAD_SHED_MAX_POOL_WAIT_MS,
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que informa a load_monitor cuánto espera cada checkout"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            load_monitor.record_pool_wait(time.perf_counter() - start)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Igual que TimedQueuePool, para el motor async (asyncpg)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            load_monitor.record_pool_wait(time.perf_counter() - start)
+
+
+class LoadSheddingMiddleware:
+    """
+    Middleware ASGI: cuenta los requests en curso y rechaza con 429 los
+    nuevos mientras haya sobrecarga. Las rutas exentas (health, docs)
+    siempre pasan.
+    """
+
+    def __init__(self, app, monitor: LoadMonitor, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.monitor = monitor
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.monitor.overloaded()
+        if reason is not None:
+            self.monitor.shed_total += 1
+            response = JSONResponse(
+                {"detail": f"{reason}, reintentar más tarde"},
+                status_code=429,
+                headers={
+                    "Retry-After": retry_after(settings.LOAD_SHED_RETRY_AFTER_SECONDS)
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        self.monitor.requests_total += 1
+        self.monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.in_flight -= 1
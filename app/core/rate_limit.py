@@ -0,0 +1,172 @@
+"""
+Límites de tasa con token buckets.
+
+Cada dispositivo (device_id del JWT) tiene su bucket, y hay uno global
+para todo el proceso. Un bucket se llena a `rate` tokens por segundo
+hasta `burst`; cada request gasta uno. Sin tokens se responde 429 con
+Retry-After (el tiempo hasta el próximo token, más jitter), así la
+sobrecarga se convierte en reintentos ordenados.
+
+Se aplica como dependencia (rate_limit) a los routers de /api/v1. /auth
+tiene su propio limitador por IP (auth_rate_limit): /auth/token y
+/auth/refresh se piden sin token, y son el blanco de quien prueba
+secretos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.auth.auth import get_current_device
+from app.core.config import get_settings
+from app.core.load import retry_after
+
+settings = get_settings()
+
+
+class TokenBucket:
+    """Bucket de `burst` tokens que se recarga a `rate` por segundo"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """
+        Intenta gastar `cost` tokens.
+
+        Returns:
+            0 si alcanzó, si no los segundos hasta que alcance
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def refund(self, cost: float = 1.0) -> None:
+        """Devuelve tokens gastados en un request que se rechazó por otro límite"""
+        self.tokens = min(self.burst, self.tokens + cost)
+
+
+class RateLimiter:
+    """Un bucket por dispositivo más uno global, seguro entre hilos"""
+
+    def __init__(
+        self,
+        device_rate: float,
+        device_burst: float,
+        global_rate: float,
+        global_burst: float,
+        max_devices: int = 10_000,
+    ):
+        self.device_rate = device_rate
+        self.device_burst = device_burst
+        self.max_devices = max_devices
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.allowed = 0
+        self.limited_device = 0
+        self.limited_global = 0
+
+    def check(self, device_id: str) -> float:
+        """
+        Gasta un token del dispositivo y uno global.
+
+        Returns:
+            0 si el request pasa, si no los segundos a esperar
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(device_id)
+            if bucket is None:
+                bucket = TokenBucket(self.device_rate, self.device_burst)
+                self._buckets[device_id] = bucket
+                # Un bucket olvidado está lleno: descartarlo no cambia nada
+                while len(self._buckets) > self.max_devices:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(device_id)
+
+            wait = bucket.take(now)
+            if wait:
+                self.limited_device += 1
+                return wait
+            wait = self.global_bucket.take(now)
+            if wait:
+                bucket.refund()
+                self.limited_global += 1
+                return wait
+            self.allowed += 1
+            return 0.0
+
+    def stats(self) -> dict:
+        return {
+            "devices": len(self._buckets),
+            "allowed": self.allowed,
+            "limited_device": self.limited_device,
+            "limited_global": self.limited_global,
+            "global_tokens": round(self.global_bucket.tokens, 1),
+        }
+
+
+# Instancia única de este proceso
+rate_limiter = RateLimiter(
+    device_rate=settings.RATE_LIMIT_DEVICE_PER_SECOND,
+    device_burst=settings.RATE_LIMIT_DEVICE_BURST,
+    global_rate=settings.RATE_LIMIT_GLOBAL_PER_SECOND,
+    global_burst=settings.RATE_LIMIT_GLOBAL_BURST,
+)
+
+# Para /auth: un bucket por IP en vez de por dispositivo
+auth_rate_limiter = RateLimiter(
+    device_rate=settings.RATE_LIMIT_AUTH_PER_SECOND,
+    device_burst=settings.RATE_LIMIT_AUTH_BURST,
+    global_rate=settings.RATE_LIMIT_AUTH_GLOBAL_PER_SECOND,
+    global_burst=settings.RATE_LIMIT_AUTH_GLOBAL_BURST,
+)
+
+
+def _too_many_requests(wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiados requests, reintentar más tarde",
+        headers={"Retry-After": retry_after(wait)},
+    )
+
+
+async def rate_limit(device: dict = Depends(get_current_device)) -> dict:
+    """
+    Dependencia: 429 con Retry-After si el dispositivo o el proceso
+    superaron su tasa. Devuelve el payload del token, como
+    get_current_device.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return device
+    wait = rate_limiter.check(device.get("device_id", ""))
+    if wait:
+        raise _too_many_requests(wait)
+    return device
+
+
+async def auth_rate_limit(request: Request) -> None:
+    """
+    Dependencia de /auth: 429 con Retry-After si la IP o el proceso
+    superaron su tasa de pedidos de token. Cuenta por IP del cliente
+    (detrás de un proxy, uvicorn con --proxy-headers para ver la real).
+    """
+    if not settings.RATE_LIMIT_AUTH_ENABLED:
+        return
+    wait = auth_rate_limiter.check(request.client.host if request.client else "")
+    if wait:
+        raise _too_many_requests(wait)
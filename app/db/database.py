@@ -2,10 +2,13 @@
 Conexión a la base de datos PostgreSQL usando SQLAlchemy.
 """
 
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
+from app.core.load import TimedQueuePool
 
 settings = get_settings()
 
@@ -16,6 +19,7 @@ engine = create_engine(
     echo=True,  # Cambiar a False en producción
     pool_size=5,  # Número de conexiones en el pool
     max_overflow=10,
+    poolclass=TimedQueuePool,  # Mide la espera por conexión (load shedding)
 )
 # Fábrica de sesiones
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -36,3 +40,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependencia que usan las rutas: sesión sync o async según DB_ASYNC.
+# El módulo async solo se importa si se usa (requiere asyncpg).
+if settings.DB_ASYNC:
+    from app.db.async_database import get_async_db as get_session
+else:
+    get_session = get_db
+
+
+async def run_db(db, function, *args):
+    """
+    Corre una función sync(db, ...) con la sesión de la ruta sin bloquear
+    el event loop: con AsyncSession vía run_sync (sobre la conexión
+    asyncpg), con Session en el threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(function, *args)
+    return await run_in_threadpool(function, db, *args)
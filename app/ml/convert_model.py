@@ -1,179 +1,200 @@
 """
-Script para descargar, convertir y preparar MobileFaceNet para Android.
+Conversión de MobileFaceNet (.pb congelado) a TensorFlow Lite.
 
-EJECUTAR UNA SOLA VEZ antes de empezar con Android.
+Variantes (ver VARIANTS):
+    float32  Pesos float32, batch dinámico: la referencia y la que usa el
+             servidor para micro-batches (app/ml/inference.py)
+    float16  Pesos float16 (mitad de tamaño), lo que se usaba en Android
+    int8     Cuantización entera completa (pesos, activaciones, entrada y
+             salida int8), calibrada con recortes de rostros reales
+
+Todas quedan con batch dinámico (shape_signature [-1, 112, 112, 3]); el
+shape por defecto sigue siendo [1, 112, 112, 3], así que Android las
+usa igual que antes.
+
+Uso:
+    python -m app.ml.convert_model --pb mobilefacenet.pb
+    python -m app.ml.convert_model --pb mobilefacenet.pb --variants float32 int8 \\
+        --calibration-dir rostros/ --out-dir modelos/
+
+Para comparar las variantes: python -m benchmarks.bench_models
 """
 
-import tensorflow as tf
-import numpy as np
-import urllib.request
+import argparse
 import os
+import urllib.request
+from typing import Callable, Iterator, List, Optional
 
-# ============================================
-# PASO 1: Descargar modelo pre-entrenado
-# ============================================
+import numpy as np
 
-print("📥 Descargando MobileFaceNet pre-entrenado...")
+from app.ml.inference import INPUT_SIZE, decode_image
 
-# Modelo pre-entrenado de GitHub
 MODEL_URL = "https://github.com/sirius-ai/MobileFaceNet_TF/raw/master/output/MobileFaceNet_9925_9680.pb"
-MODEL_PATH = "mobilefacenet.pb"
+INPUT_NAME = "input:0"
+OUTPUT_NAME = "embeddings:0"
+VARIANTS = ("float32", "float16", "int8")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
 
-if not os.path.exists(MODEL_PATH):
-    urllib.request.urlretrieve(MODEL_URL, MODEL_PATH)
-    print(f"✅ Modelo descargado: {MODEL_PATH}")
-else:
-    print(f"✅ Modelo ya existe: {MODEL_PATH}")
 
-# ============================================
-# PASO 2: Cargar modelo
-# ============================================
+def download_model(path: str, url: str = MODEL_URL) -> str:
+    """Descarga el .pb pre-entrenado si todavía no existe"""
+    if not os.path.exists(path):
+        urllib.request.urlretrieve(url, path)
+        print(f"✅ Modelo descargado: {path}")
+    return path
 
-print("\n📂 Cargando modelo...")
 
+def load_function(pb_path: str):
+    """
+    Carga el grafo congelado como función concreta input -> embeddings,
+    con el batch libre (None, 112, 112, 3).
+    """
+    import tensorflow as tf
 
-def load_graph(frozen_graph_filename):
-    """Carga un grafo de TensorFlow desde archivo .pb"""
-    with tf.io.gfile.GFile(frozen_graph_filename, "rb") as f:
-        graph_def = tf.compat.v1.GraphDef()
+    graph_def = tf.compat.v1.GraphDef()
+    with tf.io.gfile.GFile(pb_path, "rb") as f:
         graph_def.ParseFromString(f.read())
 
-    with tf.Graph().as_default() as graph:
-        tf.import_graph_def(graph_def, name="")
-
-    return graph
-
-
-graph = load_graph(MODEL_PATH)
-
-# Obtener tensores de entrada y salida
-input_tensor = graph.get_tensor_by_name("input:0")
-output_tensor = graph.get_tensor_by_name("embeddings:0")
-
-print("✅ Modelo cargado")
-print(f"   Input shape: {input_tensor.shape}")  # (None, 112, 112, 3)
-print(f"   Output shape: {output_tensor.shape}")  # (None, 128)
-
-# ============================================
-# PASO 3: Convertir a TensorFlow Lite
-# ============================================
-
-print("\n🔧 Convirtiendo a TensorFlow Lite...")
-
-# Convertir usando TF 1.x compatibility
-converter = tf.compat.v1.lite.TFLiteConverter.from_frozen_graph(
-    graph_def_file=MODEL_PATH,
-    input_arrays=["input"],
-    output_arrays=["embeddings"],
-    input_shapes={"input": [1, 112, 112, 3]},
-)
-
-# Optimizaciones para reducir tamaño y aumentar velocidad
-converter.optimizations = [tf.lite.Optimize.DEFAULT]
-converter.target_spec.supported_types = [tf.float16]  # Usar float16
-
-# Convertir
-tflite_model = converter.convert()
-
-# Guardar modelo .tflite
-TFLITE_PATH = "mobilefacenet.tflite"
-with open(TFLITE_PATH, "wb") as f:
-    f.write(tflite_model)
-
-print(f"✅ Modelo TFLite guardado: {TFLITE_PATH}")
-print(f"   Tamaño: {len(tflite_model) / 1024 / 1024:.2f} MB")
-
-# ============================================
-# PASO 4: Probar el modelo TFLite
-# ============================================
+    wrapped = tf.compat.v1.wrap_function(
+        lambda: tf.compat.v1.import_graph_def(graph_def, name=""), []
+    )
+    return wrapped.prune(
+        wrapped.graph.get_tensor_by_name(INPUT_NAME),
+        wrapped.graph.get_tensor_by_name(OUTPUT_NAME),
+    )
+
+
+def calibration_images(directory: str, limit: int = 200) -> np.ndarray:
+    """
+    Recortes de rostros para calibrar int8, normalizados como en producción.
+
+    Raises:
+        ValueError: Si el directorio no tiene imágenes válidas
+    """
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            try:
+                images.append(decode_image(f.read()))
+            except ValueError:
+                continue
+        if len(images) >= limit:
+            break
+    if not images:
+        raise ValueError(f"No hay imágenes de calibración en {directory}")
+    return np.stack(images)
+
+
+def representative_dataset(images: np.ndarray) -> Callable[[], Iterator[list]]:
+    """Generador que espera TFLiteConverter (una imagen por paso)"""
+
+    def generate():
+        for image in images:
+            yield [image[np.newaxis].astype(np.float32)]
+
+    return generate
+
+
+def convert(
+    pb_path: str, variant: str, calibration: Optional[np.ndarray] = None
+) -> bytes:
+    """
+    Convierte el modelo a TFLite en la variante pedida.
 
-print("\n🧪 Probando modelo TFLite...")
-
-# Crear intérprete
-interpreter = tf.lite.Interpreter(model_path=TFLITE_PATH)
-interpreter.allocate_tensors()
-
-# Obtener detalles de entrada/salida
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
-
-print("✅ Detalles del modelo:")
-print(f"   Input shape: {input_details[0]['shape']}")
-print(f"   Output shape: {output_details[0]['shape']}")
-
-# Crear imagen de prueba (rostro ficticio)
-test_image = np.random.rand(1, 112, 112, 3).astype(np.float32)
-
-# Normalizar (igual que en producción)
-test_image = (test_image - 127.5) / 127.5
-
-# Ejecutar inferencia
-interpreter.set_tensor(input_details[0]["index"], test_image)
-interpreter.invoke()
-embedding = interpreter.get_tensor(output_details[0]["index"])
-
-print("✅ Inferencia exitosa!")
-print(f"   Embedding shape: {embedding.shape}")  # (1, 128)
-print(f"   Primeros 5 valores: {embedding[0][:5]}")
-
-# ============================================
-# PASO 5: Crear script de prueba
-# ============================================
-
-print("\n📝 Creando script de prueba...")
-
-TEST_SCRIPT = """
-import tensorflow as tf
-import numpy as np
-
-# Cargar modelo
-interpreter = tf.lite.Interpreter(model_path="mobilefacenet.tflite")
-interpreter.allocate_tensors()
-
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
-
-def extract_embedding(image_array):
-    '''
-    Extrae embedding de una imagen.
-    
     Args:
-        image_array: numpy array (112, 112, 3) con valores 0-255
-    
-    Returns:
-        embedding: numpy array (128,) con el vector facial
-    '''
-    # Normalizar
-    image_normalized = (image_array - 127.5) / 127.5
-    image_normalized = np.expand_dims(image_normalized, axis=0).astype(np.float32)
-    
-    # Inferencia
-    interpreter.set_tensor(input_details[0]['index'], image_normalized)
-    interpreter.invoke()
-    embedding = interpreter.get_tensor(output_details[0]['index'])
-    
-    return embedding[0]
-
-# Ejemplo de uso
-if __name__ == "__main__":
-    # Crear imagen de prueba
-    test_img = np.random.randint(0, 255, (112, 112, 3), dtype=np.uint8)
-    
-    # Extraer embedding
-    emb = extract_embedding(test_img)
-    
-    print(f"Embedding shape: {emb.shape}")
-    print(f"Embedding (primeros 10): {emb[:10]}")
-"""
+        variant: "float32", "float16" o "int8"
+        calibration: Imágenes normalizadas (n, 112, 112, 3), obligatorias
+            para int8
+
+    Raises:
+        ValueError: Si la variante es inválida o falta la calibración
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Variante inválida: {variant} ({', '.join(VARIANTS)})")
+    if variant == "int8" and calibration is None:
+        raise ValueError("La variante int8 necesita imágenes de calibración")
+
+    import tensorflow as tf
+
+    function = load_function(pb_path)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([function], function)
+
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def output_path(out_dir: str, variant: str) -> str:
+    """mobilefacenet.tflite para float16 (el nombre que ya usa Android)"""
+    if variant == "float16":
+        return os.path.join(out_dir, "mobilefacenet.tflite")
+    return os.path.join(out_dir, f"mobilefacenet_{variant}.tflite")
+
+
+def convert_all(
+    pb_path: str,
+    variants: List[str],
+    out_dir: str = ".",
+    calibration_dir: Optional[str] = None,
+) -> List[str]:
+    """
+    Convierte y guarda cada variante.
 
-with open("test_model.py", "w") as f:
-    f.write(TEST_SCRIPT)
+    Returns:
+        Rutas de los .tflite generados, en el orden de variants
+    """
+    calibration = None
+    if "int8" in variants:
+        if calibration_dir is None:
+            raise ValueError("La variante int8 necesita --calibration-dir")
+        calibration = calibration_images(calibration_dir)
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for variant in variants:
+        model = convert(pb_path, variant, calibration)
+        path = output_path(out_dir, variant)
+        with open(path, "wb") as f:
+            f.write(model)
+        print(f"✅ {variant}: {path} ({len(model) / 1024 / 1024:.2f} MB)")
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pb", default="mobilefacenet.pb", help="Grafo congelado")
+    parser.add_argument(
+        "--download", action="store_true", help="Descargar el .pb si no existe"
+    )
+    parser.add_argument(
+        "--variants", nargs="+", choices=VARIANTS, default=["float32", "float16"]
+    )
+    parser.add_argument("--calibration-dir", help="Recortes de rostros (para int8)")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    if args.download:
+        download_model(args.pb)
+    if not os.path.exists(args.pb):
+        parser.error(f"No existe el modelo: {args.pb} (usar --download)")
+
+    convert_all(args.pb, args.variants, args.out_dir, args.calibration_dir)
+    print("\n📱 Copia 'mobilefacenet.tflite' a Android/app/src/main/assets/")
+    print(
+        f"🖥️  El servidor usa FACE_MODEL_PATH ({INPUT_SIZE}x{INPUT_SIZE}, batch libre)"
+    )
 
-print("✅ Script de prueba creado: test_model.py")
 
-print("\n" + "=" * 50)
-print("✨ ¡CONVERSIÓN COMPLETA!")
-print("=" * 50)
-print(f"\n📱 Copia el archivo '{TFLITE_PATH}' a tu proyecto Android:")
-print(f"   Android/app/src/main/assets/{TFLITE_PATH}")
-print("\n🎯 Ahora puedes usar el modelo en Android con TFLite Interpreter")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Búsqueda de pares duplicados (todos contra todos) en una galería.
+
+Nunca se arma la matriz N x N: se recorre el triángulo superior en
+bloques de block x block (memoria acotada a un bloque de scores por
+proceso) y de cada bloque solo se guardan los pares sobre el umbral.
+
+Con workers > 1 las filas de bloques se reparten en un pool de procesos;
+cada proceso recibe la matriz una sola vez al arrancar. Los procesos se
+crean con spawn: un fork desde el servidor copiaría los threads y locks
+tomados (threadpool, pool de conexiones) en un estado inconsistente.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+# Matriz de la galería en cada proceso del pool (la carga _init_worker)
+_matrix: Optional[np.ndarray] = None
+
+
+def block_pairs(
+    matrix: np.ndarray, start: int, block: int, threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pares (i, j) con i en [start, start + block), j > i y similitud
+    >= threshold. Recorre las columnas de a bloques desde start.
+
+    Returns:
+        (filas i, filas j, similitudes)
+    """
+    rows = matrix[start : start + block]
+    found_i, found_j, found_scores = [], [], []
+    for col_start in range(start, len(matrix), block):
+        scores = rows @ matrix[col_start : col_start + block].T
+        if col_start == start:
+            # Bloque diagonal: solo el triángulo superior (sin i == j)
+            scores[np.tril_indices(len(rows), m=scores.shape[1])] = -np.inf
+        i, j = np.nonzero(scores >= threshold)
+        found_i.append(i + start)
+        found_j.append(j + col_start)
+        found_scores.append(scores[i, j])
+    return (
+        np.concatenate(found_i).astype(np.int64),
+        np.concatenate(found_j).astype(np.int64),
+        np.concatenate(found_scores).astype(np.float32),
+    )
+
+
+def _init_worker(matrix: np.ndarray) -> None:
+    global _matrix
+    _matrix = matrix
+
+
+def _worker_block_pairs(args):
+    start, block, threshold = args
+    return block_pairs(_matrix, start, block, threshold)
+
+
+def find_duplicate_pairs(
+    matrix: np.ndarray, threshold: float, block: int = 2048, workers: int = 1
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Todos los pares de filas con similitud >= threshold.
+
+    Args:
+        matrix: Embeddings normalizados float32 (n, 128)
+        block: Filas por bloque (memoria: block x block floats por proceso)
+        workers: Procesos (1 = en este proceso)
+
+    Yields:
+        (filas i, filas j, similitudes) por cada fila de bloques, con i < j
+    """
+    starts = range(0, len(matrix), block)
+    if workers <= 1:
+        for start in starts:
+            yield block_pairs(matrix, start, block, threshold)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(matrix,),
+    ) as pool:
+        tasks = [(start, block, threshold) for start in starts]
+        yield from pool.map(_worker_block_pairs, tasks)
@@ -0,0 +1,84 @@
+"""
+Utilidades para embeddings faciales.
+
+Cada Worker.face_embedding son 128 floats de 32 bits little-endian
+(512 bytes), el mismo formato que genera el Android con MobileFaceNet.
+Todo se decodifica con NumPy de una sola vez, sin struct.unpack por fila.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+EMBEDDING_DIM = 128
+EMBEDDING_BYTES = EMBEDDING_DIM * 4
+EMBEDDING_DTYPE = np.dtype("<f4")  # float32 little-endian
+
+
+def decode_embedding(raw: bytes) -> np.ndarray:
+    """
+    Convierte los bytes de un embedding en un vector float32 (128,).
+
+    Raises:
+        ValueError: Si no son exactamente 512 bytes
+    """
+    if len(raw) != EMBEDDING_BYTES:
+        raise ValueError(
+            f"Embedding inválido: {len(raw)} bytes (se esperaban {EMBEDDING_BYTES})"
+        )
+    return np.frombuffer(raw, dtype=EMBEDDING_DTYPE).astype(np.float32)
+
+
+def decode_embeddings(raws: Sequence[bytes]) -> np.ndarray:
+    """
+    Convierte muchos embeddings en una matriz float32 (n, 128).
+    Une los bytes y hace un solo np.frombuffer.
+
+    Raises:
+        ValueError: Si algún embedding no tiene 512 bytes
+    """
+    if any(len(raw) != EMBEDDING_BYTES for raw in raws):
+        raise ValueError(f"Todos los embeddings deben tener {EMBEDDING_BYTES} bytes")
+    matrix = np.frombuffer(b"".join(raws), dtype=EMBEDDING_DTYPE)
+    return matrix.reshape(len(raws), EMBEDDING_DIM).astype(np.float32)
+
+
+def encode_embedding(vector: np.ndarray) -> bytes:
+    """Convierte un vector (128,) al formato de Worker.face_embedding"""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).reshape(EMBEDDING_DIM).tobytes()
+
+
+def centroid_embedding(raws: Sequence[bytes]) -> bytes:
+    """
+    Centroide de varios templates: promedio de los vectores normalizados,
+    normalizado, en el formato de Worker.face_embedding.
+
+    Raises:
+        ValueError: Si algún template no tiene 512 bytes
+    """
+    centroid = l2_normalize(decode_embeddings(raws)).mean(axis=0)
+    return encode_embedding(l2_normalize(centroid))
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normaliza cada fila a norma 1 (float32, C-contiguo).
+    Con filas normalizadas, similitud coseno = producto punto.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.ascontiguousarray(matrix / np.maximum(norms, 1e-12), dtype=np.float32)
+
+
+def as_query_matrix(vectors) -> np.ndarray:
+    """
+    Convierte uno o varios embeddings de consulta en una matriz
+    normalizada (m, 128).
+
+    Raises:
+        ValueError: Si la dimensión no es 128
+    """
+    queries = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if queries.ndim != 2 or queries.shape[1] != EMBEDDING_DIM:
+        raise ValueError(f"Los embeddings deben tener {EMBEDDING_DIM} valores")
+    return l2_normalize(queries)
@@ -0,0 +1,493 @@
+"""
+Galería en memoria de embeddings de trabajadores para identificación 1:N.
+
+Todos los embeddings viven en una matriz float32 (n, 128) normalizada.
+Buscar es un producto matriz-vector (o matriz-matriz para un batch de
+consultas) y un argpartition para quedarse con los top-k, sin bucles
+de Python por fila.
+
+La matriz también puede guardarse en float16 (mitad de memoria) o
+en int8 para una búsqueda en dos etapas: pasada gruesa sobre los
+códigos int8 y re-puntuación exacta en float32 de los mejores
+candidatos. En int8 las filas float32 no quedan en memoria: se leen del
+snapshot mapeado o de un archivo temporal mapeado (ver _spill_to_disk).
+"""
+
+import tempfile
+from collections.abc import Sequence as SequenceABC
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ml.embeddings import (
+    EMBEDDING_DIM,
+    as_query_matrix,
+    decode_embeddings,
+    l2_normalize,
+)
+from app.ml.quantization import ScalarQuantizer, to_float16
+
+# Máximo de celdas de la matriz de scores (consultas x galería) por bloque.
+# Con batches grandes contra galerías grandes se procesa por bloques de
+# consultas para no reservar gigas de memoria de una vez.
+MAX_SCORE_CELLS = 1 << 24
+
+# Filas de la galería que se convierten a float32 por bloque cuando la
+# matriz está guardada en float16/int8. Bloques chicos: el buffer float32
+# (1 MB) sigue en caché entre la conversión y el producto
+ROW_BLOCK = 2048
+
+# Representaciones soportadas para la matriz en memoria
+STORAGES = ("float32", "float16", "int8")
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k por fila de una matriz de scores (m, n), de mayor a menor.
+
+    argpartition es O(n) por fila; solo los k elegidos se ordenan.
+
+    Returns:
+        (indices (m, k), scores (m, k))
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(candidate_scores, order, axis=1),
+    )
+
+
+def _spill_to_disk(matrix: np.ndarray) -> np.ndarray:
+    """
+    Mueve una matriz float32 a un archivo temporal (ya borrado del
+    directorio) y la devuelve mapeada en solo lectura.
+
+    Las páginas son caché del sistema operativo, no memoria del proceso:
+    solo se leen las filas que se re-puntúan. El archivo va a TMPDIR; si
+    /tmp es tmpfs, apuntar TMPDIR a un disco (o usar FACE_SNAPSHOT_PATH).
+    """
+    if not len(matrix):
+        return matrix
+    with tempfile.TemporaryFile(prefix="gallery-") as f:
+        np.ascontiguousarray(matrix, dtype=np.float32).tofile(f)
+        f.flush()
+        # El mapeo conserva su propio descriptor: se puede cerrar el archivo
+        return np.memmap(f, dtype=np.float32, mode="r", shape=matrix.shape)
+
+
+class FaceGallery:
+    """
+    Matriz normalizada de embeddings + índice fila -> trabajador.
+
+    Atributos:
+    - ids: IDs de los trabajadores (int64), uno por fila
+    - uuids: UUID de cada fila
+    - names: Nombre de cada fila
+    - matrix: (n, 128) con filas de norma 1; float32, o float16 si
+      storage == "float16". Con storage == "int8" es un np.memmap (del
+      snapshot o de un archivo temporal) del que solo se leen las filas
+      a re-puntuar
+    - codes: copia int8 de la matriz (solo con storage == "int8")
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        uuids: Sequence[str],
+        names: Sequence[str],
+        matrix: np.ndarray,
+        storage: str = "float32",
+        rescore_candidates: int = 64,
+        normalized: bool = False,
+    ):
+        """
+        normalized=True indica que las filas ya tienen norma 1 (por ejemplo
+        un snapshot mapeado con np.memmap) y se usan sin copiarlas.
+        """
+        if storage not in STORAGES:
+            raise ValueError(f"storage inválido: {storage}")
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.uuids = uuids if isinstance(uuids, SequenceABC) else list(uuids)
+        self.names = names if isinstance(names, SequenceABC) else list(names)
+        self.storage = storage
+        self.rescore_candidates = rescore_candidates
+        if normalized:
+            normalized = matrix.reshape(-1, EMBEDDING_DIM)
+        else:
+            normalized = l2_normalize(matrix.reshape(-1, EMBEDDING_DIM))
+        if storage != "float16" and normalized.dtype != np.float32:
+            # Snapshot float16 con otro storage: copia privada en float32
+            normalized = normalized.astype(np.float32)
+        # Un snapshot float16 mapeado no se copia (to_float16 lo devuelve tal cual)
+        self.matrix = to_float16(normalized) if storage == "float16" else normalized
+        self.quantizer = None
+        self.codes = None
+        if storage == "int8":
+            self.quantizer = ScalarQuantizer.fit(normalized)
+            self.codes = self.quantizer.encode(normalized)
+            if not isinstance(normalized, np.memmap):
+                self.matrix = _spill_to_disk(normalized)
+        # Índice aproximado opcional (IVFIndex) para galerías grandes
+        self.index = None
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs) -> "FaceGallery":
+        """Construye la galería a partir de filas (id, uuid, name, face_embedding)"""
+        rows = list(rows)
+        return cls(
+            ids=[r[0] for r in rows],
+            uuids=[r[1] for r in rows],
+            names=[r[2] for r in rows],
+            matrix=decode_embeddings([r[3] for r in rows]),
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.uuids)
+
+    def search(self, query, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Top-k para un solo embedding: un producto matriz-vector.
+
+        Returns:
+            [(fila, similitud), ...] de mayor a menor
+        """
+        indices, top_scores = self.search_batch(query, k)
+        return [
+            (row, score)
+            for row, score in zip(indices[0].tolist(), top_scores[0].tolist())
+            if row >= 0
+        ]
+
+    def search_batch(
+        self, queries, k: int = 5, exclude: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k para muchos embeddings: un producto matriz-matriz por bloque.
+
+        Si la galería tiene un índice aproximado, se usa en su lugar
+        (las filas sin candidato vienen como -1).
+
+        Args:
+            exclude: Filas que no pueden salir como resultado (quedan con
+                similitud -inf antes del top-k)
+
+        Returns:
+            (indices (m, k), similitudes (m, k))
+        """
+        if self.index is not None:
+            return self.index.search_batch(queries, self.matrix, k, exclude=exclude)
+        queries = as_query_matrix(queries)
+        if exclude is not None and not len(exclude):
+            exclude = None
+        block = max(1, MAX_SCORE_CELLS // max(len(self), 1))
+        results = [
+            self._search_block(queries[start : start + block], k, exclude)
+            for start in range(0, len(queries), block)
+        ]
+        return (
+            np.concatenate([r[0] for r in results]),
+            np.concatenate([r[1] for r in results]),
+        )
+
+    def _search_block(
+        self, queries: np.ndarray, k: int, exclude: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k de un bloque de consultas según la representación en memoria"""
+        if self.storage == "float32":
+            scores = queries @ self.matrix.T
+        elif self.storage == "float16":
+            scores = self._scores_by_row_block(queries, self.matrix)
+        else:
+            return self._search_block_int8(queries, k, exclude)
+        if exclude is not None:
+            scores[:, exclude] = -np.inf
+        rows, top_scores = top_k(scores, k)
+        return np.where(np.isfinite(top_scores), rows, -1), top_scores
+
+    def _search_block_int8(
+        self, queries: np.ndarray, k: int, exclude: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pasada gruesa sobre los códigos int8 y re-puntuación exacta en
+        float32 de los mejores candidatos de cada consulta
+        """
+        coarse = self._scores_by_row_block(
+            self.quantizer.scale_queries(queries), self.codes
+        )
+        if exclude is not None:
+            coarse[:, exclude] = -np.inf
+        candidates, coarse_scores = top_k(coarse, max(k, self.rescore_candidates))
+        exact = np.einsum("mcd,md->mc", self.matrix[candidates], queries)
+        # Un excluido solo entra como relleno (quedan menos filas que k)
+        exact[~np.isfinite(coarse_scores)] = -np.inf
+        order, top_scores = top_k(exact, k)
+        rows = np.take_along_axis(candidates, order, axis=1)
+        return np.where(np.isfinite(top_scores), rows, -1), top_scores
+
+    @staticmethod
+    def _scores_by_row_block(queries: np.ndarray, stored: np.ndarray) -> np.ndarray:
+        """
+        queries @ stored.T convirtiendo a float32 de a ROW_BLOCK filas, así
+        la copia temporal en float32 nunca es de la galería completa.
+
+        La conversión domina el costo: en float16 (sin conversión
+        vectorizada en NumPy) una consulta individual tarda varias veces
+        lo que en float32. float16 cambia latencia por memoria; int8
+        convierte 4 veces menos bytes.
+        """
+        scores = np.empty((len(queries), len(stored)), dtype=np.float32)
+        # Un solo buffer por llamada (las búsquedas corren en paralelo)
+        buffer = np.empty((min(ROW_BLOCK, len(stored)), EMBEDDING_DIM), np.float32)
+        for start in range(0, len(stored), ROW_BLOCK):
+            block = stored[start : start + ROW_BLOCK]
+            rows = buffer[: len(block)]
+            np.copyto(rows, block, casting="unsafe")
+            scores[:, start : start + ROW_BLOCK] = queries @ rows.T
+        return scores
+
+    def nbytes(self) -> int:
+        """
+        Memoria propia del proceso para los vectores (matriz + códigos
+        int8). Una matriz mapeada (np.memmap) no cuenta: es caché del
+        sistema operativo, compartida entre procesos.
+        """
+        total = 0 if isinstance(self.matrix, np.memmap) else self.matrix.nbytes
+        if self.codes is not None:
+            total += self.codes.nbytes + self.quantizer.scales.nbytes
+        return total
+
+    def describe(self, row: int) -> dict:
+        """Datos del trabajador de una fila"""
+        return {
+            "worker_id": int(self.ids[row]),
+            "worker_uuid": self.uuids[row],
+            "name": self.names[row],
+        }
+
+
+class IncrementalGallery:
+    """
+    Galería mutable para los cambios posteriores a la base.
+
+    La matriz tiene capacidad que se duplica al llenarse (append en O(1)
+    amortizado). Modificar un trabajador pisa su fila; borrarlo deja una
+    lápida (fila muerta) que se descarta en la búsqueda hasta la próxima
+    compactación.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._matrix = np.empty((capacity, EMBEDDING_DIM), dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self.uuids: List[str] = []
+        self.names: List[str] = []
+        self.row_of: Dict[int, int] = {}
+        # Filas usadas (vivas + lápidas)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    @property
+    def tombstones(self) -> int:
+        return self.size - len(self.row_of)
+
+    def _grow(self) -> None:
+        capacity = max(1, 2 * len(self._ids))
+        matrix = np.empty((capacity, EMBEDDING_DIM), dtype=np.float32)
+        ids = np.empty(capacity, dtype=np.int64)
+        alive = np.zeros(capacity, dtype=bool)
+        matrix[: self.size] = self._matrix[: self.size]
+        ids[: self.size] = self._ids[: self.size]
+        alive[: self.size] = self._alive[: self.size]
+        self._matrix, self._ids, self._alive = matrix, ids, alive
+
+    def upsert(self, worker_id: int, uuid: str, name: str, embedding) -> None:
+        """Agrega un trabajador o pisa su fila si ya estaba"""
+        row = self.row_of.get(worker_id)
+        if row is None:
+            if self.size == len(self._ids):
+                self._grow()
+            row = self.size
+            self.uuids.append(uuid)
+            self.names.append(name)
+        else:
+            self.uuids[row] = uuid
+            self.names[row] = name
+        self._matrix[row] = l2_normalize(embedding)
+        self._ids[row] = worker_id
+        self._alive[row] = True
+        # Se publica al final: una búsqueda concurrente no ve la fila a medias
+        self.row_of[worker_id] = row
+        self.size = max(self.size, row + 1)
+
+    def remove(self, worker_id: int) -> bool:
+        """Deja una lápida en la fila del trabajador (si estaba)"""
+        row = self.row_of.pop(worker_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        return True
+
+    def search_batch(self, queries, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k exacto; las lápidas quedan con similitud -inf y fila -1"""
+        queries = as_query_matrix(queries)
+        size = self.size
+        scores = queries @ self._matrix[:size].T
+        if size > len(self.row_of):
+            scores[:, ~self._alive[:size]] = -np.inf
+        rows, top_scores = top_k(scores, k)
+        return np.where(np.isfinite(top_scores), rows, -1), top_scores
+
+    def describe(self, row: int) -> dict:
+        """Datos del trabajador de una fila"""
+        return {
+            "worker_id": int(self._ids[row]),
+            "worker_uuid": self.uuids[row],
+            "name": self.names[row],
+        }
+
+    def live_parts(self) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+        """Copia de las filas vivas: (ids, uuids, names, matriz normalizada)"""
+        rows = np.flatnonzero(self._alive[: self.size])
+        return (
+            self._ids[rows].copy(),
+            [self.uuids[r] for r in rows],
+            [self.names[r] for r in rows],
+            self._matrix[rows].copy(),
+        )
+
+
+class LayeredGallery:
+    """
+    Galería base inmutable (de la BD o de un snapshot) + cambios en memoria.
+
+    Las filas de la base que cambiaron o se borraron se enmascaran; sus
+    versiones nuevas viven en el delta (IncrementalGallery). Numeración
+    de filas: [0, len(base)) base, [len(base), ...) delta.
+
+    La base tiene que estar ordenada por id de trabajador.
+    """
+
+    def __init__(self, base: FaceGallery):
+        self.base = base
+        self.delta = IncrementalGallery()
+        # Set para preguntar si una fila ya está enmascarada y array con
+        # capacidad que se duplica al llenarse para pasárselas a la búsqueda
+        self._masked = set()
+        self._masked_buffer = np.empty(1024, dtype=np.int64)
+
+    @property
+    def masked_rows(self) -> np.ndarray:
+        """Filas enmascaradas de la base (vista, no copiar para buscar)"""
+        return self._masked_buffer[: len(self._masked)]
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self._masked) + len(self.delta)
+
+    def pending(self) -> int:
+        """Cambios acumulados desde la base (lo que ahorra una compactación)"""
+        return self.delta.size + len(self._masked)
+
+    def _base_row(self, worker_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.base.ids, worker_id))
+        if row < len(self.base.ids) and self.base.ids[row] == worker_id:
+            return row
+        return None
+
+    def _mask(self, worker_id: int) -> None:
+        """Enmascara la fila base del trabajador en O(1) amortizado"""
+        row = self._base_row(worker_id)
+        if row is None or row in self._masked:
+            return
+        size = len(self._masked)
+        if size == len(self._masked_buffer):
+            # Array nuevo: una búsqueda en curso sigue con la vista anterior
+            buffer = np.empty(2 * size, dtype=np.int64)
+            buffer[:size] = self._masked_buffer
+            self._masked_buffer = buffer
+        # Se escribe la fila antes de publicarla (el tamaño sale del set)
+        self._masked_buffer[size] = row
+        self._masked.add(row)
+
+    def upsert(self, worker_id: int, uuid: str, name: str, embedding) -> None:
+        """Alta o modificación de un trabajador"""
+        self._mask(worker_id)
+        self.delta.upsert(worker_id, uuid, name, embedding)
+
+    def remove(self, worker_id: int) -> None:
+        """Baja de un trabajador"""
+        self._mask(worker_id)
+        self.delta.remove(worker_id)
+
+    def search_batch(self, queries, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k sobre base y delta. Las filas enmascaradas se descartan dentro
+        de la búsqueda de la base, así que se le piden solo k (la latencia
+        no crece con la cantidad de enmascaradas).
+
+        Returns:
+            (indices (m, <=k), similitudes (m, <=k)); -1 = sin candidato
+        """
+        queries = as_query_matrix(queries)
+        base_rows, base_scores = self.base.search_batch(
+            queries, k, exclude=self.masked_rows
+        )
+        base_scores = np.where(base_rows < 0, -np.inf, base_scores)
+
+        delta_rows, delta_scores = self.delta.search_batch(queries, k)
+        delta_rows = np.where(delta_rows >= 0, delta_rows + len(self.base), -1)
+
+        rows = np.concatenate([base_rows, delta_rows], axis=1)
+        scores = np.concatenate([base_scores, delta_scores], axis=1)
+        best, best_scores = top_k(scores, k)
+        best_rows = np.take_along_axis(rows, best, axis=1)
+        return np.where(np.isfinite(best_scores), best_rows, -1), best_scores
+
+    def describe(self, row: int) -> dict:
+        """Datos del trabajador de una fila (base o delta)"""
+        if row < len(self.base):
+            return self.base.describe(row)
+        return self.delta.describe(row - len(self.base))
+
+
+def merge_layers(
+    base: FaceGallery, masked_rows: np.ndarray, delta_parts: tuple
+) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+    """
+    Compacta base + delta en una sola lista de filas ordenada por id.
+
+    Args:
+        delta_parts: IncrementalGallery.live_parts() tomado junto con
+            masked_rows (con el lock de la galería)
+
+    Returns:
+        (ids, uuids, names, matriz float32 normalizada)
+    """
+    keep = np.ones(len(base), dtype=bool)
+    keep[masked_rows] = False
+    base_rows = np.flatnonzero(keep)
+    delta_ids, delta_uuids, delta_names, delta_matrix = delta_parts
+
+    ids = np.concatenate([base.ids[base_rows], delta_ids])
+    uuids = [base.uuids[r] for r in base_rows] + delta_uuids
+    names = [base.names[r] for r in base_rows] + delta_names
+    matrix = np.concatenate([base.matrix[base_rows].astype(np.float32), delta_matrix])
+    order = np.argsort(ids, kind="stable")
+    return (
+        ids[order],
+        [uuids[r] for r in order],
+        [names[r] for r in order],
+        matrix[order],
+    )
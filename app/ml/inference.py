@@ -0,0 +1,127 @@
+"""
+Inferencia de MobileFaceNet (TFLite) dentro de procesos worker.
+
+Un intérprete TFLite no es thread-safe y corre mejor con un núcleo por
+instancia: cada proceso del pool crea el suyo al arrancar (init_worker)
+y procesa batches completos con embed_batch.
+
+TensorFlow se importa recién dentro del proceso worker: la API no lo
+carga si la inferencia en el servidor está desactivada.
+"""
+
+from typing import List, Optional, Union
+
+import numpy as np
+
+INPUT_SIZE = 112  # MobileFaceNet: rostros de 112x112 RGB
+
+# Estado de cada proceso worker
+_interpreter = None
+_batch_size: Optional[int] = None  # Batch para el que están reservados los tensores
+_dynamic_batch = True  # False si el modelo solo acepta batch 1
+
+
+def init_worker(model_path: str, num_threads: int = 1) -> None:
+    """Crea el intérprete de este proceso (initializer del pool)"""
+    global _interpreter, _batch_size
+    import tensorflow as tf
+
+    _interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+    _interpreter.allocate_tensors()
+    _batch_size = int(_interpreter.get_input_details()[0]["shape"][0])
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """
+    JPEG/PNG -> float32 (112, 112, 3) normalizado a [-1, 1], igual que
+    extract_embedding en el Android.
+
+    Raises:
+        ValueError: Si los bytes no son una imagen
+    """
+    import tensorflow as tf
+
+    try:
+        image = tf.io.decode_image(data, channels=3, expand_animations=False)
+    except tf.errors.InvalidArgumentError as e:
+        raise ValueError(f"Imagen inválida: {e.message}")
+    if image.shape[0] != INPUT_SIZE or image.shape[1] != INPUT_SIZE:
+        image = tf.image.resize(image, (INPUT_SIZE, INPUT_SIZE))
+    pixels = np.asarray(image, dtype=np.float32)
+    return (pixels - 127.5) / 127.5
+
+
+def quantize_input(details: dict, batch: np.ndarray) -> np.ndarray:
+    """Adapta el batch float32 a la entrada del modelo (int8 si está cuantizado)"""
+    if details["dtype"] == np.float32:
+        return batch
+    scale, zero_point = details["quantization"]
+    info = np.iinfo(details["dtype"])
+    quantized = np.round(batch / scale + zero_point)
+    return np.clip(quantized, info.min, info.max).astype(details["dtype"])
+
+
+def dequantize_output(details: dict, output: np.ndarray) -> np.ndarray:
+    """Salida del modelo -> embeddings float32"""
+    if details["dtype"] == np.float32:
+        return output.copy()
+    scale, zero_point = details["quantization"]
+    return ((output.astype(np.float32) - zero_point) * scale).astype(np.float32)
+
+
+def _invoke(batch: np.ndarray) -> np.ndarray:
+    """Una pasada del intérprete; reserva tensores si cambia el batch"""
+    global _batch_size
+    input_index = _interpreter.get_input_details()[0]["index"]
+    if _batch_size != len(batch):
+        # Si allocate_tensors falla (modelo de batch fijo), la entrada ya quedó
+        # redimensionada: None obliga a la próxima llamada a volver a reservar
+        _batch_size = None
+        _interpreter.resize_tensor_input(input_index, list(batch.shape))
+        _interpreter.allocate_tensors()
+        _batch_size = len(batch)
+    input_details = _interpreter.get_input_details()[0]
+    output_details = _interpreter.get_output_details()[0]
+    _interpreter.set_tensor(input_index, quantize_input(input_details, batch))
+    _interpreter.invoke()
+    return dequantize_output(
+        output_details, _interpreter.get_tensor(output_details["index"])
+    )
+
+
+def _embed(batch: np.ndarray) -> np.ndarray:
+    """
+    Embeddings de un batch (n, 112, 112, 3). Si el modelo se convirtió con
+    batch fijo 1 y no se deja redimensionar, procesa de a una imagen.
+    """
+    global _dynamic_batch
+    if _dynamic_batch and len(batch) > 1:
+        try:
+            return _invoke(batch)
+        except (ValueError, RuntimeError):
+            _dynamic_batch = False
+    return np.concatenate([_invoke(image[np.newaxis]) for image in batch])
+
+
+def embed_batch(images: List[bytes]) -> List[Union[np.ndarray, str]]:
+    """
+    Corre en el proceso worker: decodifica las imágenes y calcula todos
+    los embeddings en una sola invocación.
+
+    Returns:
+        Por imagen, su embedding (128,) o el mensaje de error si no se
+        pudo decodificar (una imagen mala no hace fallar al resto)
+    """
+    results: List[Union[np.ndarray, str]] = [""] * len(images)
+    decoded = []
+    for position, data in enumerate(images):
+        try:
+            decoded.append((position, decode_image(data)))
+        except ValueError as e:
+            results[position] = str(e)
+
+    if decoded:
+        embeddings = _embed(np.stack([pixels for _, pixels in decoded]))
+        for (position, _), embedding in zip(decoded, embeddings):
+            results[position] = embedding
+    return results
@@ -0,0 +1,212 @@
+"""
+Índice aproximado IVF (inverted file) para galerías grandes.
+
+Con cientos de miles de trabajadores, comparar contra cada embedding
+en cada consulta deja de ser barato. El índice IVF:
+
+1. Agrupa los embeddings en n_lists clusters con k-means esférico
+   (centroides normalizados, similitud coseno).
+2. Guarda las filas de la galería ordenadas por cluster (solo los
+   números de fila: los vectores siguen siendo los de la galería, sin
+   una segunda copia en memoria).
+3. En la consulta compara solo contra los vectores de los nprobe
+   clusters más cercanos.
+
+nprobe regula recall vs. latencia: nprobe = n_lists equivale a la
+búsqueda exacta. Todo es NumPy en CPU, sin dependencias extra.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIM, as_query_matrix, l2_normalize
+from app.ml.gallery import MAX_SCORE_CELLS, top_k
+
+
+def _nearest_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, n: int = 1
+) -> np.ndarray:
+    """Índices de los n centroides más cercanos a cada vector (por bloques)"""
+    if not len(vectors):
+        return np.empty((0, n), dtype=np.int64)
+    block = max(1, MAX_SCORE_CELLS // max(len(centroids), 1))
+    return np.concatenate(
+        [
+            top_k(vectors[start : start + block] @ centroids.T, n)[0]
+            for start in range(0, len(vectors), block)
+        ]
+    )
+
+
+def default_n_lists(n_vectors: int) -> int:
+    """Cantidad de clusters sugerida: ~sqrt(n), al menos 1"""
+    return max(1, int(np.sqrt(n_vectors)))
+
+
+class IVFIndex:
+    """
+    Índice IVF sobre embeddings normalizados.
+
+    Atributos:
+    - centroids: float32 (n_lists, 128)
+    - row_ids: int64 (n,), filas de la galería ordenadas por cluster
+    - offsets: int64 (n_lists + 1,), el cluster c son las filas
+      row_ids[offsets[c]:offsets[c+1]]
+    """
+
+    def __init__(self, n_lists: int, nprobe: int = 8):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.centroids = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self.row_ids = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def train(
+        self,
+        matrix: np.ndarray,
+        n_iter: int = 20,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Calcula los centroides con k-means esférico.
+
+        Args:
+            matrix: Embeddings normalizados (n, 128)
+            n_iter: Iteraciones de k-means
+            sample_size: Vectores usados para entrenar (por defecto
+                256 por cluster); entrenar con una muestra basta
+            seed: Semilla para reproducibilidad
+        """
+        rng = np.random.default_rng(seed)
+        n_lists = min(self.n_lists, len(matrix))
+        sample_size = min(len(matrix), sample_size or 256 * n_lists)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignment = _nearest_centroids(sample, centroids)[:, 0]
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Clusters vacíos: se re-siembran con un vector al azar
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = l2_normalize(sums)
+
+        self.n_lists = n_lists
+        self.centroids = centroids
+        return self
+
+    def add(self, matrix: np.ndarray) -> "IVFIndex":
+        """
+        Asigna cada embedding a su cluster y ordena las filas por cluster.
+        La fila i de matrix queda con row_id = i.
+        """
+        assignment = _nearest_centroids(matrix, self.centroids)[:, 0]
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=self.n_lists)
+        self.row_ids = order.astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return self
+
+    @classmethod
+    def build(
+        cls, matrix: np.ndarray, n_lists: Optional[int] = None, nprobe: int = 8
+    ) -> "IVFIndex":
+        """Entrena y llena un índice en un paso"""
+        index = cls(n_lists or default_n_lists(len(matrix)), nprobe)
+        return index.train(matrix).add(matrix)
+
+    def search_batch(
+        self,
+        queries,
+        vectors,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        exclude: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k aproximado para muchas consultas.
+
+        Los clusters a visitar se eligen para todas las consultas con un
+        solo producto matriz-matriz contra los centroides.
+
+        Args:
+            vectors: Matriz normalizada de la galería (n, 128) sobre la que
+                se armó el índice (float32, float16 o un np.memmap); solo se
+                leen las filas candidatas
+            exclude: Filas que no pueden salir como resultado
+
+        Returns:
+            (filas (m, k), similitudes (m, k)). Si hay menos de k
+            candidatos, se completa con fila -1 y similitud -inf.
+        """
+        queries = as_query_matrix(queries)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probes = _nearest_centroids(queries, self.centroids, nprobe)
+
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, (query, clusters) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate(
+                [self.row_ids[self.offsets[c] : self.offsets[c + 1]] for c in clusters]
+            )
+            if exclude is not None and len(exclude):
+                candidates = candidates[~np.isin(candidates, exclude)]
+            if not len(candidates):
+                continue
+            candidate_scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+            best, best_scores = top_k(candidate_scores[np.newaxis, :], k)
+            rows[i, : best.shape[1]] = candidates[best[0]]
+            scores[i, : best.shape[1]] = best_scores[0]
+        return rows, scores
+
+    def save(self, path: str, **metadata) -> None:
+        """
+        Guarda el índice en un .npz (sin pickle).
+        metadata: valores enteros extra (por ejemplo la versión del padrón).
+
+        Se escribe en un archivo temporal y se reemplaza con os.replace:
+        otro proceso que lo esté cargando nunca ve un archivo a medias.
+        """
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        # Con un archivo abierto np.savez no le agrega ".npz" al nombre
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                row_ids=self.row_ids,
+                offsets=self.offsets,
+                params=np.array([self.n_lists, self.nprobe], dtype=np.int64),
+                **{f"meta_{key}": np.array(value) for key, value in metadata.items()},
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["IVFIndex", dict]:
+        """
+        Carga un índice guardado con save().
+
+        Returns:
+            (índice, metadata)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            n_lists, nprobe = data["params"].tolist()
+            index = cls(int(n_lists), int(nprobe))
+            index.centroids = data["centroids"]
+            index.row_ids = data["row_ids"]
+            index.offsets = data["offsets"]
+            metadata = {
+                key[len("meta_") :]: data[key].item()
+                for key in data.files
+                if key.startswith("meta_")
+            }
+        return index, metadata
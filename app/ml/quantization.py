@@ -0,0 +1,52 @@
+"""
+Cuantización escalar de embeddings (float16 e int8).
+
+Cada embedding en float32 ocupa 512 bytes. Representaciones más chicas:
+
+- float16: 256 bytes, sin calibración; el error es despreciable para
+  similitud coseno.
+- int8: 128 bytes. Cada dimensión d usa su propio factor
+  scale[d] = max|x[:, d]| / 127, calculado sobre la galería:
+  x[:, d] ≈ codes[:, d] * scale[d].
+
+El int8 se usa para una primera pasada gruesa; los mejores candidatos
+se vuelven a puntuar con float32 (ver FaceGallery).
+"""
+
+import numpy as np
+
+
+def to_float16(matrix: np.ndarray) -> np.ndarray:
+    """Copia float16 (C-contigua) de una matriz de embeddings"""
+    return np.ascontiguousarray(matrix, dtype=np.float16)
+
+
+class ScalarQuantizer:
+    """Cuantizador int8 simétrico con un factor de escala por dimensión"""
+
+    def __init__(self, scales: np.ndarray):
+        self.scales = np.asarray(scales, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray) -> "ScalarQuantizer":
+        """Calcula los factores de escala a partir de la galería"""
+        if not len(matrix):
+            return cls(np.ones(matrix.shape[1], dtype=np.float32))
+        max_abs = np.abs(matrix).max(axis=0)
+        return cls(np.maximum(max_abs, 1e-12) / 127.0)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        """float32 (n, d) -> int8 (n, d)"""
+        codes = np.rint(np.asarray(matrix, dtype=np.float32) / self.scales)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """int8 (n, d) -> float32 (n, d) aproximado"""
+        return codes.astype(np.float32) * self.scales
+
+    def scale_queries(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Prepara consultas para puntuar directo contra los códigos int8:
+        q · x ≈ q · (codes * scales) = (q * scales) · codes
+        """
+        return np.asarray(queries, dtype=np.float32) * self.scales
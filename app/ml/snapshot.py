@@ -0,0 +1,203 @@
+"""
+Snapshot binario de la galería, compartido entre procesos con np.memmap.
+
+Si cada worker de uvicorn/gunicorn lee todos los embeddings de Postgres,
+el arranque y la memoria crecen con (procesos x galería). Con un
+snapshot en disco cada proceso mapea el mismo archivo: el kernel guarda
+una sola copia en el page cache y abrirlo tarda milisegundos.
+
+Formato (little endian):
+
+    [0:8]      magic b"FGSNAP01"
+    [8:12]     largo del header JSON (uint32)
+    [12:...]   header JSON: versión del padrón, cursor de cambios,
+               cantidad de filas y (offset, bytes) de cada sección
+    secciones alineadas a 64 bytes:
+    - ids:          int64 (n,)
+    - matrix:       float32 o float16 (n, 128), filas normalizadas; el
+                    header indica cuál (matrix_dtype)
+    - uuid_offsets: int64 (n + 1,) + uuids: UTF-8 concatenados
+    - name_offsets: int64 (n + 1,) + names: UTF-8 concatenados
+
+El archivo se escribe en uno temporal y se renombra (os.replace): los
+procesos que todavía mapean el anterior siguen leyendo el inode viejo.
+
+Con FACE_GALLERY_STORAGE=float16 la matriz se guarda en float16: la
+galería la usa mapeada tal cual, sin una copia privada por proceso.
+"""
+
+import json
+import os
+import struct
+from collections.abc import Sequence as SequenceABC
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIM, l2_normalize
+
+MAGIC = b"FGSNAP01"
+MATRIX_DTYPES = {"float32": "<f4", "float16": "<f2"}
+_PREFIX = struct.Struct("<8sI")
+_ALIGN = 64
+
+
+class StringColumn(SequenceABC):
+    """Strings UTF-8 de un snapshot, decodificados recién al accederlos"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self.data[start:end].tobytes().decode("utf-8")
+
+
+def _encode_strings(values: Sequence[str]):
+    """Strings -> (offsets int64 (n + 1,), bytes concatenados)"""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def write_snapshot(
+    path: str,
+    ids: Sequence[int],
+    uuids: Sequence[str],
+    names: Sequence[str],
+    matrix: np.ndarray,
+    version: int = 0,
+    cursor: Optional[str] = None,
+    dtype: str = "float32",
+) -> None:
+    """
+    Escribe un snapshot de la galería de forma atómica.
+
+    Args:
+        matrix: Embeddings float32 (n, 128); se guardan normalizados
+        version: Versión del padrón con la que se armó
+        cursor: Cursor de /workers/changes hasta el que llega el snapshot
+        dtype: Tipo de la matriz en disco ("float32" o "float16")
+    """
+    if dtype not in MATRIX_DTYPES:
+        raise ValueError(f"dtype inválido: {dtype} (float32 o float16)")
+    uuid_offsets, uuid_data = _encode_strings(uuids)
+    name_offsets, name_data = _encode_strings(names)
+    sections = {
+        "ids": np.asarray(ids, dtype="<i8"),
+        "matrix": l2_normalize(matrix.reshape(-1, EMBEDDING_DIM)).astype(
+            MATRIX_DTYPES[dtype]
+        ),
+        "uuid_offsets": uuid_offsets.astype("<i8"),
+        "uuids": uuid_data,
+        "name_offsets": name_offsets.astype("<i8"),
+        "names": name_data,
+    }
+
+    # El header necesita los offsets y los offsets dependen del largo del
+    # header: se reserva un bloque fijo generoso para el JSON
+    header_size = 4096
+    layout, offset = {}, header_size
+    for name, array in sections.items():
+        offset += -offset % _ALIGN
+        layout[name] = [offset, array.nbytes]
+        offset += array.nbytes
+    header = json.dumps(
+        {
+            "version": version,
+            "cursor": cursor,
+            "count": len(sections["ids"]),
+            "dim": EMBEDDING_DIM,
+            "matrix_dtype": dtype,
+            "sections": layout,
+        }
+    ).encode()
+    if _PREFIX.size + len(header) > header_size:
+        raise ValueError("Header del snapshot demasiado grande")
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)) + header)
+        for name, array in sections.items():
+            f.seek(layout[name][0])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _map(f, section, dtype) -> np.ndarray:
+    """Sección (offset, bytes) del archivo abierto f como np.memmap de solo lectura"""
+    offset, nbytes = section
+    itemsize = np.dtype(dtype).itemsize
+    if nbytes == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(
+        f, dtype=dtype, mode="r", offset=offset, shape=(nbytes // itemsize,)
+    )
+
+
+class GallerySnapshot:
+    """
+    Snapshot abierto con np.memmap (solo lectura).
+
+    Atributos: ids, uuids, names, matrix (mapeados, sin copiar),
+    version, cursor y count.
+
+    El archivo se abre una sola vez y el header, el stat y todas las
+    secciones salen de ese descriptor: si otro proceso hace os.replace
+    en el medio, todo sigue siendo del mismo inode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} no es un snapshot de galería")
+            header = json.loads(f.read(header_len))
+            if header["dim"] != EMBEDDING_DIM:
+                raise ValueError(f"Snapshot con dimensión {header['dim']}")
+
+            self.version: int = header["version"]
+            self.cursor: Optional[str] = header["cursor"]
+            self.count: int = header["count"]
+            self.stat = os.fstat(f.fileno())
+
+            # Cada np.memmap duplica el descriptor: siguen válidos al cerrar f
+            layout = header["sections"]
+            self.ids = _map(f, layout["ids"], "<i8")
+            # Los snapshots anteriores a matrix_dtype son float32
+            matrix_dtype = MATRIX_DTYPES[header.get("matrix_dtype", "float32")]
+            self.matrix = _map(f, layout["matrix"], matrix_dtype).reshape(
+                -1, EMBEDDING_DIM
+            )
+            self.uuids = StringColumn(
+                _map(f, layout["uuid_offsets"], "<i8"), _map(f, layout["uuids"], "u1")
+            )
+            self.names = StringColumn(
+                _map(f, layout["name_offsets"], "<i8"), _map(f, layout["names"], "u1")
+            )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def is_current(self) -> bool:
+        """False si el archivo en disco fue reemplazado por otro snapshot"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) == (
+            self.stat.st_ino,
+            self.stat.st_mtime_ns,
+        )
@@ -1,4 +1,17 @@
 from app.models.worker import Worker
 from app.models.attendance import Attendance
+from app.models.roster_version import RosterVersion
+from app.models.worker_template import WorkerTemplate
+from app.models.duplicate_candidate import DuplicateCandidate
+from app.models.duplicate_audit import DuplicateAudit
+from app.models.device import Device
 
-__all__ = ["Worker", "Attendance"]
+__all__ = [
+    "Worker",
+    "Attendance",
+    "RosterVersion",
+    "WorkerTemplate",
+    "DuplicateCandidate",
+    "DuplicateAudit",
+    "Device",
+]
@@ -0,0 +1,54 @@
+"""
+Modelo para los dispositivos (tablets) autorizados a usar la API.
+
+El secreto de cada tablet se guarda hasheado con bcrypt. El refresh token
+es un valor al azar de alta entropía: alcanza con guardar su sha256 (no
+hace falta bcrypt para renovarlo).
+
+También guarda el estado de sincronización del tablet: la marca de agua
+(high_water_mark) hasta la que el servidor acusó sus registros, y desde
+cuándo valen sus access tokens (tokens_revoked_before, ver
+app/auth/revocation_sync.py).
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime, timezone
+from app.db.database import Base
+
+
+class Device(Base):
+    """
+    Tabla de dispositivos.
+
+    Campos:
+    - id: Identificador único
+    - device_id: Identificador del tablet (ej: "tablet_001")
+    - secret_hash: Hash bcrypt del secreto del tablet
+    - active: False = no puede pedir ni renovar tokens
+    - refresh_token_hash: sha256 del refresh token vigente (uno por tablet)
+    - refresh_expires_at: Vencimiento del refresh token
+    - created_at: Cuándo se dio de alta
+    - high_water_mark: Timestamp del registro acusado más nuevo sin
+      pendientes detrás en su batch (ver GET /attendance/sync/state)
+    - acknowledged_total: Registros acusados (creados o duplicados) en total
+    - last_sync_at: Última sincronización por batch
+    - tokens_revoked_before: Los access tokens emitidos antes se rechazan
+      (cierre de sesión o bloqueo)
+    """
+
+    __tablename__ = "devices"
+
+    id = Column(Integer, primary_key=True)
+    device_id = Column(String, unique=True, index=True, nullable=False)
+    secret_hash = Column(String, nullable=False)
+    active = Column(Boolean, default=True, nullable=False)
+    refresh_token_hash = Column(String(64), unique=True, index=True, nullable=True)
+    refresh_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    high_water_mark = Column(DateTime(timezone=True), nullable=True)
+    acknowledged_total = Column(Integer, default=0, nullable=False)
+    last_sync_at = Column(DateTime(timezone=True), nullable=True)
+    tokens_revoked_before = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Device(id={self.id}, device_id='{self.device_id}')>"
@@ -0,0 +1,39 @@
+"""
+Modelo para las corridas de la auditoría de duplicados.
+Guarda el estado de cada corrida (DuplicateAuditService.run).
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime, timezone
+from app.db.database import Base
+
+
+class DuplicateAudit(Base):
+    """
+    Tabla de corridas de la auditoría de duplicados.
+
+    Campos:
+    - id: ID de la corrida (el audit_id de duplicate_candidates)
+    - status: running, done o failed
+    - threshold: Similitud mínima usada
+    - workers: Trabajadores comparados (al terminar)
+    - pairs: Pares sospechosos encontrados (al terminar)
+    - error: Mensaje del error si falló
+    - started_at / finished_at: Inicio y fin de la corrida
+    """
+
+    __tablename__ = "duplicate_audits"
+
+    id = Column(String, primary_key=True)
+    status = Column(String, nullable=False)
+    threshold = Column(Float, nullable=False)
+    workers = Column(Integer, nullable=True)
+    pairs = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    started_at = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc), index=True
+    )
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<DuplicateAudit(id={self.id}, status={self.status})>"
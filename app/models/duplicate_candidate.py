@@ -0,0 +1,43 @@
+"""
+Modelo para pares de trabajadores sospechados de ser la misma persona.
+Lo llena la auditoría de duplicados (DuplicateAuditService).
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime, timezone
+from app.db.database import Base
+
+
+class DuplicateCandidate(Base):
+    """
+    Tabla de candidatos a identidad duplicada.
+
+    Campos:
+    - id: Identificador único
+    - audit_id: Corrida de la auditoría que encontró el par
+    - worker_id / worker_uuid: Un trabajador del par (el de menor id)
+    - duplicate_worker_id / duplicate_worker_uuid: El otro trabajador
+    - similarity: Similitud coseno entre sus embeddings
+    - created_at: Cuándo se detectó
+
+    Sin foreign keys a workers: el resultado de una auditoría se conserva
+    aunque después se elimine uno de los trabajadores.
+    """
+
+    __tablename__ = "duplicate_candidates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    audit_id = Column(String, nullable=False, index=True)
+    worker_id = Column(Integer, nullable=False)
+    worker_uuid = Column(String, nullable=False)
+    duplicate_worker_id = Column(Integer, nullable=False)
+    duplicate_worker_uuid = Column(String, nullable=False)
+    similarity = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return (
+            f"<DuplicateCandidate(worker_id={self.worker_id}, "
+            f"duplicate_worker_id={self.duplicate_worker_id}, "
+            f"similarity={self.similarity:.3f})>"
+        )
@@ -0,0 +1,25 @@
+"""
+Modelo para la versión del padrón de trabajadores.
+Una sola fila (id=1) cuya versión sube cada vez que cambia un trabajador.
+"""
+
+from sqlalchemy import BigInteger, Column, Integer
+from app.db.database import Base
+
+
+class RosterVersion(Base):
+    """
+    Tabla con la versión del padrón.
+
+    Cada proceso de uvicorn guarda en memoria un caché de trabajadores;
+    comparando esta versión saben si otro proceso cambió algún trabajador
+    y deben invalidar su caché.
+    """
+
+    __tablename__ = "roster_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RosterVersion(version={self.version})>"
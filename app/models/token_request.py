@@ -1,5 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class TokenRequest(BaseModel):
     device_id: str
+    secret: str = Field(..., min_length=1, max_length=72)  # bcrypt usa hasta 72 bytes
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int  # Segundos de vida del access token
@@ -3,7 +3,7 @@ Modelo de base de datos para trabajadores.
 Representa la tabla 'workers' en PostgreSQL.
 """
 
-from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, LargeBinary, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.db.database import Base
@@ -17,9 +17,14 @@ class Worker(Base):
     - id: Identificador único
     - uuid: UUID para sincronización entre dispositivos
     - name: Nombre del trabajador
-    - face_embedding: Vector del rostro (128 floats guardados como bytes)
+    - face_embedding: Vector del rostro (128 floats guardados como bytes); si
+      se enroló con varias fotos, el centroide de sus templates
+    - site: Sitio/campo donde trabaja (opcional, filtra la galería exportada)
     - created_at: Cuándo se registró
     - updated_at: Última actualización
+    - roster_version: Versión del padrón en la que cambió por última vez
+      (cursor de /workers/changes)
+    - deleted_at: Baja lógica; el trabajador y su historial se conservan
     """
 
     __tablename__ = "workers"
@@ -28,13 +33,17 @@ class Worker(Base):
     uuid = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     face_embedding = Column(LargeBinary, nullable=False)
+    site = Column(String, nullable=True, index=True)
 
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    # lambda: la fecha se calcula por fila, no una sola vez al importar
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
-        default=datetime.now(timezone.utc),
-        onupdate=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
     )
+    roster_version = Column(BigInteger, nullable=False, server_default="0")
+    deleted_at = Column(DateTime, nullable=True)
 
     # Relación con attendance (un trabajador tiene muchas asistencias)
     # attendances = relationship("Attendance", back_populates="worker")
@@ -45,5 +54,16 @@ class Worker(Base):
         passive_deletes=True,
     )
 
+    # Templates individuales (enrolamiento con varias fotos)
+    templates = relationship(
+        "WorkerTemplate",
+        back_populates="worker",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    # Keyset sobre (roster_version, id) para /workers/changes
+    __table_args__ = (Index("ix_workers_roster_version_id", "roster_version", "id"),)
+
     def __repr__(self):
         return f"<Worker(id={self.id}, name='{self.name}')>"
@@ -0,0 +1,41 @@
+"""
+Modelo para los templates de rostro de cada trabajador.
+
+Un trabajador se enrola con varias fotos: cada embedding se guarda como
+template y Worker.face_embedding pasa a ser su centroide (promedio
+normalizado), que es lo que usa la primera pasada de búsqueda.
+"""
+
+from sqlalchemy import Column, Integer, LargeBinary, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.db.database import Base
+
+
+class WorkerTemplate(Base):
+    """
+    Tabla de templates (embeddings individuales) por trabajador.
+
+    Campos:
+    - id: Identificador único
+    - worker_id: Trabajador al que pertenece
+    - embedding: 128 floats guardados como bytes (mismo formato que face_embedding)
+    - created_at: Cuándo se enroló
+    """
+
+    __tablename__ = "worker_templates"
+
+    id = Column(Integer, primary_key=True)
+    worker_id = Column(
+        Integer,
+        ForeignKey("workers.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    worker = relationship("Worker", back_populates="templates")
+
+    def __repr__(self):
+        return f"<WorkerTemplate(id={self.id}, worker_id={self.worker_id})>"
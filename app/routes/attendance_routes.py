@@ -2,19 +2,45 @@
 Endpoints para registros de asistencia.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional, Union
 
-from app.db.database import get_db
+from app.core.config import get_settings
+from app.db.database import get_session, run_db
 from app.schemas.attendance import (
     AttendanceCreate,
     AttendanceResponse,
     AttendanceBatchCreate,
+    AttendanceBatchResponse,
+    AttendancePage,
+    DeviceSyncState,
+    SyncPlan,
+)
+from app.services.device_service import DeviceService
+from app.services.facade import AttendanceFacade, WorkerFacade
+from app.services.stream_sync_service import (
+    DuplexStreamingResponse,
+    StreamSyncService,
 )
-from app.services.attendance_service import AttendanceService
+from app.services.ingest_queue import get_ingest_queue
+from app.services.sync_plan_service import SyncPlanService
 from app.auth.auth import get_current_device
 
+settings = get_settings()
+
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
 
@@ -26,7 +52,8 @@ router = APIRouter(prefix="/attendance", tags=["attendance"])
 )
 async def checkin(
     attendance: AttendanceCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Union[Session, AsyncSession] = Depends(get_session),
     device: dict = Depends(get_current_device),
 ):
     """
@@ -48,17 +75,27 @@ async def checkin(
           "device_id": "tablet_001"
         }
     ```
-    """
-    try:
-        db_attendance = AttendanceService.create_attendance(db, attendance)
 
-        # Agregar nombre del trabajador a la respuesta
-        response_data = {
-            **db_attendance.__dict__,
-            "worker_name": db_attendance.worker.name,
-        }
+        Responde `201` si el registro es nuevo y `200` con el registro
+        guardado si es un reintento (mismo `uuid`). `400` si el trabajador
+        no existe.
+
+        Con `INGEST_WRITE_BEHIND=true` el registro se guarda en la cola
+        local durable y se responde `202 Accepted` sin esperar a PostgreSQL:
+    ```json
+        {"uuid": "rec-12345-abcde", "status": "queued"}
+    ```
+    """
+    if settings.INGEST_WRITE_BEHIND:
+        await run_in_threadpool(get_ingest_queue().append, [attendance])
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"uuid": attendance.uuid, "status": "queued"},
+        )
 
-        return response_data
+    try:
+        # Un solo statement: inserta (o recupera) y trae el nombre del trabajador
+        row = await AttendanceFacade.checkin(db, attendance)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -67,11 +104,20 @@ async def checkin(
             detail=f"Error al registrar asistencia: {str(e)}",
         )
 
+    if not row["created"]:
+        # Reintento de un registro ya guardado (idempotencia)
+        response.status_code = status.HTTP_200_OK
+    return row
+
 
-@router.post("/sync/batch", summary="Sincronizar múltiples registros")
+@router.post(
+    "/sync/batch",
+    response_model=AttendanceBatchResponse,
+    summary="Sincronizar múltiples registros",
+)
 async def sync_batch(
     batch: AttendanceBatchCreate,
-    db: Session = Depends(get_db),
+    db: Union[Session, AsyncSession] = Depends(get_session),
     device: dict = Depends(get_current_device),
 ):
     """
@@ -108,15 +154,35 @@ async def sync_batch(
         **Response:**
     ```json
         {
-          "created": 45,
-          "skipped": 5,
-          "errors": []
+          "created": 1,
+          "skipped": 1,
+          "errors": [],
+          "statuses": ["created", "duplicate"],
+          "high_water_mark": "2025-10-24T17:00:00Z",
+          "sync_plan": {...}
         }
     ```
+
+        `statuses` trae el estado de cada registro en la misma posición
+        del request: `created`, `duplicate`, `unknown_worker`, `error` o
+        `invalid`. Cada registro se valida por separado, así uno mal
+        formado queda `invalid` sin rechazar el resto del batch.
+
+        El dispositivo puede borrar de su SQLite los `created` y
+        `duplicate` (el servidor ya los tiene) y los `invalid` (nunca van
+        a entrar); `unknown_worker` y `error` se reenvían más tarde.
+        `high_water_mark` es la marca de agua del dispositivo (ver
+        `GET /attendance/sync/state` para lo que garantiza y lo que no).
+
+        La respuesta trae también `sync_plan`: cuándo volver a sincronizar,
+        de a cuántos registros y con cuántos requests simultáneos (ver
+        `GET /attendance/sync/plan`).
     """
     try:
-        result = AttendanceService.create_attendance_batch(db, batch)
-        return result
+        result = await AttendanceFacade.create_attendance_batch(
+            db, batch, device.get("device_id")
+        )
+        return {**result, "sync_plan": SyncPlanService.plan()}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -124,26 +190,166 @@ async def sync_batch(
         )
 
 
+@router.post("/sync/stream", summary="Sincronización en streaming (NDJSON)")
+async def sync_stream(
+    request: Request,
+    device: dict = Depends(get_current_device),
+):
+    """
+        Sincroniza cualquier cantidad de registros en un solo request.
+
+        **Usado por dispositivos que estuvieron offline mucho tiempo:**
+        el body es NDJSON (un registro JSON por línea, puede ir chunked).
+        El servidor inserta por bloques mientras lee y responde, también
+        en NDJSON, un acuse por bloque. Si la conexión se cae, reenviar
+        desde `last_line + 1` del último acuse recibido.
+
+        Con cada acuse el dispositivo puede borrar de su SQLite las líneas
+        `first_line`..`last_line`, **salvo** las listadas en `pending`
+        (`unknown_worker` o `error`): esas se guardan y se reenvían más
+        tarde, como en `/sync/batch`. Las de `errors` son `invalid` y
+        nunca van a entrar, así que también se borran.
+
+        **Request** (`Content-Type: application/x-ndjson`):
+    ```
+        {"uuid": "rec-1", "worker_uuid": "worker-1", "timestamp": "2025-10-24T08:00:00", "type": "IN"}
+        {"uuid": "rec-2", "worker_uuid": "worker-1", "timestamp": "2025-10-24T17:00:00", "type": "OUT"}
+    ```
+
+        **Response** (una línea por bloque y una final):
+    ```
+        {"chunk": 0, "first_line": 1, "last_line": 2, "created": 2, "duplicate": 0, "unknown_worker": 0, "error": 0, "invalid": 0, "errors": [], "pending": []}
+        {"done": true, "lines": 2, "created": 2, "duplicate": 0, "unknown_worker": 0, "error": 0, "invalid": 0, "sync_plan": {...}}
+    ```
+    """
+    return DuplexStreamingResponse(
+        StreamSyncService.ingest(
+            request.stream(),
+            final=lambda: {
+                "sync_plan": SyncPlan(**SyncPlanService.plan()).model_dump(mode="json")
+            },
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get(
+    "/sync/plan",
+    response_model=SyncPlan,
+    summary="Cuándo y cómo sincronizar según la carga del servidor",
+)
+async def sync_plan(device: dict = Depends(get_current_device)):
+    """
+        Plan para la próxima sincronización del tablet, calculado con la
+        carga actual del servidor (pool de conexiones, cola de ingesta,
+        tasa de requests). Con más carga: intervalo más largo, batches más
+        chicos y menos requests simultáneos. El intervalo lleva jitter
+        para repartir a los tablets en el tiempo.
+
+        **Response:**
+    ```json
+        {
+          "next_sync_in_seconds": 274,
+          "next_sync_at": "2025-10-24T08:04:34Z",
+          "batch_size": 100,
+          "max_concurrency": 4,
+          "load": 0.05
+        }
+    ```
+    """
+    return SyncPlanService.plan()
+
+
+@router.get(
+    "/sync/state",
+    response_model=DeviceSyncState,
+    summary="Marca de agua de sincronización del dispositivo",
+)
+async def sync_state(
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    device: dict = Depends(get_current_device),
+):
+    """
+        Hasta dónde tiene el servidor los registros de este dispositivo.
+
+        `high_water_mark` es el timestamp acusado (`created` o
+        `duplicate`) más nuevo que no deja atrás un `unknown_worker` o
+        `error` del mismo batch. Solo cubre registros que el dispositivo
+        envió y pasa por encima de los `invalid`.
+
+        Garantiza que todo registro anterior está guardado únicamente si
+        el dispositivo envía en orden de timestamp, de a un batch por vez
+        (`max_concurrency` = 1), y reintenta un batch fallido antes de
+        seguir. Con batches en paralelo, uno más nuevo puede avanzarla
+        mientras otro más viejo sigue en vuelo o falló: en ese caso sirve
+        de referencia, no para borrar el SQLite local.
+
+        **Response:**
+    ```json
+        {
+          "device_id": "tablet_001",
+          "high_water_mark": "2025-10-24T17:00:00Z",
+          "acknowledged_total": 1520,
+          "last_sync_at": "2025-10-24T17:05:12Z"
+        }
+    ```
+    """
+    try:
+        return await run_db(db, DeviceService.get_sync_state, device.get("device_id"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get("/ingest/status", summary="Estado de la cola de ingesta")
+async def ingest_status(device: dict = Depends(get_current_device)):
+    """
+        Profundidad y lag de la cola write-behind.
+
+        **Response:**
+    ```json
+        {
+          "enabled": true,
+          "depth": 120,
+          "lag_seconds": 0.42,
+          "retrying": 2,
+          "dead_letter": 1,
+          "flushed_total": 98000,
+          "dead_letter_total": 1,
+          "last_flush_at": 1761300000.5,
+          "last_error": null
+        }
+    ```
+    """
+    if not settings.INGEST_WRITE_BEHIND:
+        return {"enabled": False}
+    stats = await run_in_threadpool(get_ingest_queue().stats)
+    return {"enabled": True, **stats}
+
+
 @router.get(
     "/worker/{worker_uuid}",
-    response_model=List[AttendanceResponse],
+    response_model=AttendancePage,
     summary="Historial de asistencia de un trabajador",
 )
 async def get_worker_attendance(
     worker_uuid: str,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    from_time: Optional[datetime] = Query(None, alias="from"),
+    to_time: Optional[datetime] = Query(None, alias="to"),
+    db: Union[Session, AsyncSession] = Depends(get_session),
     device: dict = Depends(get_current_device),
 ):
     """
     Obtiene el historial de asistencia de un trabajador.
 
     Útil para ver los últimos registros desde el Android.
+    Ordenado del más reciente al más viejo y paginado por cursor: para
+    la siguiente página mandar el `next_cursor` recibido como `cursor`.
+    Filtros opcionales `from` / `to` (ISO 8601) sobre el timestamp.
     """
-    from app.services.worker_service import WorkerService
-
-    # Buscar trabajador
-    worker = WorkerService.get_worker_by_uuid(db, worker_uuid)
+    # Buscar trabajador (id y nombre salen del caché si ya se conoce)
+    worker = await WorkerFacade.resolve_worker(db, worker_uuid)
     if not worker:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -151,11 +357,17 @@ async def get_worker_attendance(
         )
 
     # Obtener registros
-    attendances = AttendanceService.get_worker_attendance(db, worker.id, limit)
+    try:
+        page = await AttendanceFacade.get_worker_attendance(
+            db, worker.id, limit, cursor, from_time, to_time
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # Agregar nombre del trabajador
-    result = []
-    for att in attendances:
-        result.append({**att.__dict__, "worker_name": worker.name})
-
-    return result
+    return {
+        "items": [
+            {**att.__dict__, "worker_name": worker.name} for att in page["items"]
+        ],
+        "next_cursor": page["next_cursor"],
+    }
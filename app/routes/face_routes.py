@@ -0,0 +1,241 @@
+"""
+Endpoints para reconocimiento facial en el servidor.
+
+El cálculo es NumPy (CPU): se ejecuta en el threadpool para no
+bloquear el event loop. Usan la sesión sync, que corre en ese mismo hilo.
+"""
+
+import asyncio
+import uuid as uuid_lib
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.database import get_db
+from app.schemas.face import (
+    DuplicateAuditRequest,
+    DuplicateAuditResponse,
+    DuplicateAuditStarted,
+    EmbedRequest,
+    EmbedResponse,
+    IdentifyRequest,
+    IdentifyResponse,
+    VerifyRequest,
+    VerifyResponse,
+)
+from app.services.duplicate_audit_service import DuplicateAuditService
+from app.services.embedding_service import get_embedding_service
+from app.services.face_service import FaceService
+from app.auth.auth import get_current_device, require_admin
+
+settings = get_settings()
+
+router = APIRouter(prefix="/faces", tags=["faces"])
+
+
+@router.post(
+    "/identify",
+    response_model=IdentifyResponse,
+    summary="Identificar rostros contra todos los trabajadores",
+)
+async def identify(
+    request: IdentifyRequest,
+    db: Session = Depends(get_db),
+    device: dict = Depends(get_current_device),
+):
+    """
+        Busca los trabajadores más parecidos a uno o varios embeddings.
+
+        **Request:**
+    ```json
+        {
+          "embeddings": [[0.12, -0.03, ...128 valores...]],
+          "top_k": 3
+        }
+    ```
+
+        **Response:**
+    ```json
+        {
+          "results": [
+            [
+              {"worker_id": 7, "worker_uuid": "...", "name": "Juan Pérez", "similarity": 0.83},
+              {"worker_id": 2, "worker_uuid": "...", "name": "Ana Gómez", "similarity": 0.41}
+            ]
+          ]
+        }
+    ```
+    """
+    try:
+        results = await run_in_threadpool(
+            FaceService.identify, db, request.embeddings, request.top_k
+        )
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post(
+    "/verify",
+    response_model=VerifyResponse,
+    summary="Verificar pares trabajador-rostro (1:1) en batch",
+)
+async def verify(
+    request: VerifyRequest,
+    db: Session = Depends(get_db),
+    device: dict = Depends(get_current_device),
+):
+    """
+        Re-verifica en el servidor la identidad declarada por los
+        dispositivos: por cada par compara el embedding capturado contra
+        el enrolado del trabajador (similitud coseno).
+
+        Auditar un batch de sincronización completo cuesta una consulta
+        y una operación vectorizada.
+
+        **Request:**
+    ```json
+        {
+          "pairs": [
+            {"worker_uuid": "550e8400-...", "embedding": [0.12, -0.03, ...128 valores...]}
+          ],
+          "threshold": 0.6
+        }
+    ```
+
+        **Response:**
+    ```json
+        {
+          "threshold": 0.6,
+          "results": [
+            {"worker_uuid": "550e8400-...", "worker_id": 7, "similarity": 0.81, "verified": true}
+          ]
+        }
+    ```
+    """
+    threshold = (
+        settings.FACE_VERIFY_THRESHOLD
+        if request.threshold is None
+        else request.threshold
+    )
+    try:
+        results = await run_in_threadpool(
+            FaceService.verify,
+            db,
+            [(pair.worker_uuid, pair.embedding) for pair in request.pairs],
+            threshold,
+        )
+        return {"threshold": threshold, "results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post(
+    "/audit/duplicates",
+    response_model=DuplicateAuditStarted,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Auditar el padrón buscando personas registradas dos veces",
+    dependencies=[Depends(require_admin)],
+)
+async def start_duplicate_audit(
+    background_tasks: BackgroundTasks,
+    request: DuplicateAuditRequest = DuplicateAuditRequest(),
+):
+    """
+        Compara todos los rostros contra todos en segundo plano y guarda
+        los pares sospechosos en `duplicate_candidates`. El estado
+        (`running`, `done`, `failed`) y los resultados se consultan con
+        `GET /faces/audit/duplicates?audit_id=...`.
+
+        Solo administradores: además del token del tablet, header
+        `X-Admin-Key` con ADMIN_API_KEY.
+
+        **Response:**
+    ```json
+        {"audit_id": "2b0c...", "status": "started"}
+    ```
+    """
+    audit_id = str(uuid_lib.uuid4())
+    background_tasks.add_task(
+        DuplicateAuditService.run_in_background,
+        audit_id,
+        request.threshold,
+        request.workers,
+    )
+    return {"audit_id": audit_id}
+
+
+@router.get(
+    "/audit/duplicates",
+    response_model=DuplicateAuditResponse,
+    summary="Pares sospechosos de una auditoría de duplicados",
+    dependencies=[Depends(require_admin)],
+)
+async def get_duplicate_audit(
+    audit_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Estado y pares de la auditoría indicada (o de la última), de mayor a
+    menor similitud. Solo administradores (header `X-Admin-Key`).
+    """
+    try:
+        return await run_in_threadpool(
+            DuplicateAuditService.get_candidates, db, audit_id, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post(
+    "/embed",
+    response_model=EmbedResponse,
+    summary="Calcular embeddings en el servidor a partir de imágenes",
+)
+async def embed(
+    request: EmbedRequest,
+    device: dict = Depends(get_current_device),
+):
+    """
+        Para tablets que no pueden correr MobileFaceNet: suben el recorte
+        del rostro y reciben el embedding (el mismo que calcularía el
+        Android). Las imágenes de requests concurrentes se procesan juntas
+        en micro-batches.
+
+        **Request:**
+    ```json
+        {"images": ["/9j/4AAQSkZJRgABAQ..."]}
+    ```
+
+        **Response:**
+    ```json
+        {"embeddings": [[0.12, -0.03, ...128 valores...]]}
+    ```
+    """
+    service = get_embedding_service()
+    if not service.running:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La inferencia en el servidor no está habilitada",
+        )
+    try:
+        embeddings = await asyncio.gather(
+            *(service.embed(image) for image in request.images)
+        )
+        return {"embeddings": [embedding.tolist() for embedding in embeddings]}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+
+
+@router.get("/embed/stats", summary="Métricas del servicio de inferencia")
+async def embed_stats(device: dict = Depends(get_current_device)):
+    """Procesos, cola y tamaño promedio de los micro-batches de este proceso"""
+    return get_embedding_service().stats()
@@ -2,14 +2,33 @@
 Endpoints (rutas) para operaciones de trabajadores.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Literal, Optional, Union
 
-from app.db.database import get_db
-from app.schemas.worker import WorkerCreate, WorkerResponse, WorkerListResponse
-from app.services.worker_service import WorkerService
-from app.auth.auth import get_current_device
+from app.core.config import get_settings
+from app.db.database import get_db, get_session
+from app.schemas.worker import (
+    WorkerCreate,
+    WorkerUpdate,
+    WorkerResponse,
+    WorkerPage,
+    WorkerChangesResponse,
+)
+from app.services.face_service import FaceService
+from app.services.facade import WorkerFacade
+from app.services.worker_cache import worker_cache
+from app.services.gallery_export_service import (
+    GalleryExportService,
+    RangeNotSatisfiableError,
+    parse_byte_range,
+)
+from app.auth.auth import get_current_device, require_admin
+
+settings = get_settings()
 
 # Crear router
 router = APIRouter(
@@ -26,7 +45,8 @@ router = APIRouter(
 )
 async def register_worker(
     worker: WorkerCreate,
-    db: Session = Depends(get_db),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    gallery_db: Session = Depends(get_db),
     device: dict = Depends(get_current_device),  # Requiere autenticación
 ):
     """
@@ -57,10 +77,27 @@ async def register_worker(
           "updated_at": "2025-10-24T10:30:00"
         }
     ```
+
+        **Duplicados:** con `FACE_DUPLICATE_POLICY=reject` un rostro ya
+        enrolado con otro UUID se rechaza (400); con `flag` se registra
+        igual y la respuesta trae `duplicate_of` (UUID) y `duplicate_score`.
     """
     try:
-        db_worker = WorkerService.create_worker(db, worker)
-        return db_worker
+        # Búsqueda en la galería (numpy) en el threadpool con sesión sync,
+        # también con DB_ASYNC: con run_sync correría en el event loop
+        duplicate = await run_in_threadpool(
+            FaceService.check_enrollment,
+            gallery_db,
+            worker.face_embedding,
+            worker.uuid,
+        )
+        db_worker = await WorkerFacade.create_worker(db, worker)
+
+        response = WorkerResponse.model_validate(db_worker)
+        if duplicate:
+            response.duplicate_of = duplicate["worker_uuid"]
+            response.duplicate_score = duplicate["similarity"]
+        return response
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -72,22 +109,154 @@ async def register_worker(
 
 @router.get(
     "/list",
-    response_model=List[WorkerListResponse],
+    response_model=WorkerPage,
     summary="Listar todos los trabajadores",
 )
 async def list_workers(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    device: dict = Depends(get_current_device),
+):
+    """
+        Lista todos los trabajadores registrados (sin embeddings).
+
+        Usado por el Android para mostrar lista de trabajadores.
+        Paginado por cursor: para la siguiente página mandar el
+        `next_cursor` recibido como `cursor`. `next_cursor` null = última página.
+
+        **Response:**
+    ```json
+        {
+          "items": [{"id": 1, "uuid": "...", "name": "Juan Pérez", "created_at": "..."}],
+          "next_cursor": "WzEwMF0"
+        }
+    ```
+    """
+    try:
+        return await WorkerFacade.get_all_workers(db, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/changes",
+    response_model=WorkerChangesResponse,
+    summary="Cambios del padrón desde un cursor",
+)
+async def worker_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    device: dict = Depends(get_current_device),
+):
+    """
+        Sincronización incremental del padrón.
+
+        El Android guarda `next_cursor` y en la próxima sincronización
+        lo manda como `since`: solo recibe los trabajadores creados,
+        modificados o dados de baja desde entonces. Sin `since` devuelve
+        el padrón completo (paginado). Si `has_more` es true, volver a
+        llamar con el nuevo cursor.
+
+        `changes` viene en el orden en que se confirmaron los cambios y
+        hay que aplicarlo en ese orden: `op` es `upsert` (alta o
+        modificación) o `delete` (baja).
+
+        **Response:**
+    ```json
+        {
+          "changes": [
+            {"op": "upsert", "roster_version": 41, "id": 7, "uuid": "...", "name": "Juan Pérez", ...},
+            {"op": "delete", "roster_version": 42, "id": 3, "uuid": "...", "deleted_at": "...", ...}
+          ],
+          "next_cursor": "WzQyLDNd",
+          "has_more": false
+        }
+    ```
+    """
+    try:
+        return await WorkerFacade.get_changes(db, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/cache/stats", summary="Métricas del caché de trabajadores")
+async def worker_cache_stats(device: dict = Depends(get_current_device)):
+    """Hits, misses e invalidaciones del caché uuid -> (id, nombre) de este proceso"""
+    return worker_cache.stats()
+
+
+@router.get(
+    "/gallery/export",
+    response_class=Response,
+    summary="Galería binaria de embeddings para los tablets",
+)
+async def export_gallery(
+    request: Request,
+    dtype: Literal["float32", "float16"] = "float32",
+    site: Optional[str] = None,
     db: Session = Depends(get_db),
     device: dict = Depends(get_current_device),
 ):
     """
-    Lista todos los trabajadores registrados (sin embeddings).
+    Descarga en un solo archivo binario los embeddings de todos los
+    trabajadores (o solo los de `site`), para identificar en el tablet.
+
+    Formato: ver `app/services/gallery_export_service.py`.
+    `dtype=float16` baja la mitad de bytes.
 
-    Usado por el Android para mostrar lista de trabajadores.
+    **Descargas reanudables:**
+    - `ETag` cambia solo cuando cambia el padrón. Con `If-None-Match`
+      igual se responde 304 sin cuerpo.
+    - `Range: bytes=<inicio>-` continúa una descarga cortada (206).
+      Mandar `If-Range: <etag>`: si el padrón cambió en el medio se
+      recibe el archivo nuevo completo (200).
     """
-    workers = WorkerService.get_all_workers(db, skip, limit)
-    return workers
+    try:
+        export = await run_in_threadpool(GalleryExportService.export, db, dtype, site)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {
+        "ETag": export.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "X-Gallery-Count": str(export.count),
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if export.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = export.size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range in (None, export.etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                export.iter_bytes(start, end + 1),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="application/octet-stream",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end + 1 - start),
+                },
+            )
+
+    return StreamingResponse(
+        export.iter_bytes(),
+        media_type="application/octet-stream",
+        headers={**headers, "Content-Length": str(size)},
+    )
 
 
 @router.get(
@@ -97,11 +266,11 @@ async def list_workers(
 )
 async def get_worker(
     worker_uuid: str,
-    db: Session = Depends(get_db),
+    db: Union[Session, AsyncSession] = Depends(get_session),
     device: dict = Depends(get_current_device),
 ):
     """Obtiene los datos de un trabajador específico"""
-    worker = WorkerService.get_worker_by_uuid(db, worker_uuid)
+    worker = await WorkerFacade.get_worker_by_uuid(db, worker_uuid)
 
     if not worker:
         raise HTTPException(
@@ -110,3 +279,55 @@ async def get_worker(
         )
 
     return worker
+
+
+@router.patch(
+    "/{worker_uuid}",
+    response_model=WorkerResponse,
+    summary="Actualizar un trabajador",
+)
+async def update_worker(
+    worker_uuid: str,
+    worker: WorkerUpdate,
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    device: dict = Depends(get_current_device),
+):
+    """Actualiza nombre y/o embedding de un trabajador"""
+    db_worker = await WorkerFacade.update_worker(db, worker_uuid, worker)
+
+    if not db_worker:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trabajador no encontrado: {worker_uuid}",
+        )
+
+    return db_worker
+
+
+@router.delete(
+    "/{worker_uuid}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Dar de baja un trabajador (administración)",
+    dependencies=[Depends(require_admin)],
+)
+async def delete_worker(
+    worker_uuid: str,
+    db: Union[Session, AsyncSession] = Depends(get_session),
+):
+    """
+    Baja lógica de un trabajador: deja de aparecer en listados, galería y
+    checkins, pero la fila y su historial de asistencias se conservan.
+    Los dispositivos la ven como `op: delete` en /workers/changes.
+
+    Además del token requiere el header `X-Admin-Key` (ver ADMIN_API_KEY):
+    un tablet solo con su token no puede dar de baja trabajadores.
+    """
+    deleted = await WorkerFacade.delete_worker(db, worker_uuid)
+
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trabajador no encontrado: {worker_uuid}",
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -2,12 +2,23 @@
 Schemas para registros de asistencia.
 """
 
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import BaseModel, Field, SkipValidation, field_validator, ConfigDict
 from datetime import datetime, timezone
+from enum import Enum
 from typing import Literal, Optional
 import uuid as uuid_lib
 
 
+class RecordStatus(str, Enum):
+    """Resultado de procesar un registro dentro de una sincronización"""
+
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    UNKNOWN_WORKER = "unknown_worker"
+    ERROR = "error"
+    INVALID = "invalid"
+
+
 class AttendanceCreate(BaseModel):
     """
     Schema para CREAR un registro de asistencia.
@@ -73,10 +84,27 @@ class AttendanceResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AttendancePage(BaseModel):
+    """Página del historial de asistencia (paginación por cursor)"""
+
+    items: list[AttendanceResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Cursor de la siguiente página (null = última)"
+    )
+
+
 class AttendanceBatchCreate(BaseModel):
-    """Para sincronizar múltiples registros a la vez"""
+    """
+    Para sincronizar múltiples registros a la vez.
+
+    Cada registro se valida por separado (como AttendanceCreate) en el
+    servicio: uno mal formado queda como "invalid" en vez de rechazar
+    todo el batch con 422.
+    """
 
-    records: list[AttendanceCreate] = Field(
+    # SkipValidation: el OpenAPI documenta cada registro como
+    # AttendanceCreate, pero llegan sin validar (dicts) a _parse_records
+    records: list[SkipValidation[AttendanceCreate]] = Field(
         ..., min_length=1, max_length=100, description="Lista de registros (máximo 100)"
     )
 
@@ -84,13 +112,48 @@ class AttendanceBatchCreate(BaseModel):
 class AttendanceBatchResponse(BaseModel):
     """Respuesta de sincronización por lotes"""
 
-    success: int = Field(
-        ..., description="Cantidad de registros procesados exitosamente"
+    created: int = Field(..., description="Cantidad de registros creados")
+    skipped: int = Field(..., description="Cantidad de registros no creados")
+    errors: list[str] = Field(default_factory=list, description="Mensajes de error")
+    statuses: list[RecordStatus] = Field(
+        ..., description="Estado de cada registro, en el mismo orden del request"
     )
-    failed: int = Field(default=0, description="Cantidad de registros fallidos")
-    errors: Optional[list[str]] = Field(
-        default=None, description="Mensajes de error si los hay"
+    high_water_mark: Optional[datetime] = Field(
+        default=None, description="Marca de agua del dispositivo (ver /sync/state)"
     )
+    sync_plan: Optional["SyncPlan"] = None
+
+
+class SyncPlan(BaseModel):
+    """
+    Cuándo y cómo sincronizar la próxima vez, según la carga del servidor.
+    Viaja en GET /attendance/sync/plan y en las respuestas de sincronización.
+    """
+
+    next_sync_in_seconds: int = Field(..., description="Espera sugerida (con jitter)")
+    next_sync_at: datetime
+    batch_size: int = Field(..., description="Registros por /sync/batch")
+    max_concurrency: int = Field(..., description="Requests simultáneos del tablet")
+    load: float = Field(..., description="Carga del servidor (0 = libre, 1 = saturado)")
+
+
+class DeviceSyncState(BaseModel):
+    """
+    Hasta dónde acusó el servidor los registros de un dispositivo.
+
+    high_water_mark es el timestamp acusado más nuevo que no deja atrás
+    pendientes (unknown_worker o error) del mismo batch. Solo cubre lo que
+    el dispositivo envió, y pasa por encima de los invalid. Equivale a
+    "todo lo anterior está guardado" solo si el dispositivo envía en orden
+    de timestamp, de a un batch por vez, y reintenta un batch fallido
+    antes de seguir: con max_concurrency > 1 un batch más nuevo puede
+    avanzarla mientras otro más viejo sigue en vuelo o falló.
+    """
+
+    device_id: str
+    high_water_mark: Optional[datetime]
+    acknowledged_total: int = Field(..., description="Registros acusados en total")
+    last_sync_at: Optional[datetime]
 
 
 # """
@@ -0,0 +1,166 @@
+"""
+Schemas para reconocimiento facial en el servidor.
+
+Los embeddings viajan como listas de 128 floats (el mismo vector que
+genera MobileFaceNet en el Android).
+"""
+
+from datetime import datetime
+from pydantic import Base64Bytes, BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+
+EMBEDDING_LENGTH = 128
+
+
+def _check_embedding_lengths(embeddings: List[List[float]]) -> List[List[float]]:
+    """Cada embedding debe tener exactamente 128 valores"""
+    for embedding in embeddings:
+        if len(embedding) != EMBEDDING_LENGTH:
+            raise ValueError(f"Cada embedding debe tener {EMBEDDING_LENGTH} valores")
+    return embeddings
+
+
+class IdentifyRequest(BaseModel):
+    """
+    Schema para IDENTIFICAR rostros (POST /api/v1/faces/identify).
+    Un embedding o un batch de embeddings en la misma llamada.
+    """
+
+    embeddings: List[List[float]] = Field(
+        ..., min_length=1, max_length=64, description="Embeddings a identificar"
+    )
+    top_k: int = Field(default=5, ge=1, le=50, description="Coincidencias por rostro")
+
+    @field_validator("embeddings")
+    @classmethod
+    def embeddings_have_128_values(cls, v: List[List[float]]) -> List[List[float]]:
+        """Valida la dimensión de cada embedding"""
+        return _check_embedding_lengths(v)
+
+
+class FaceMatch(BaseModel):
+    """Un trabajador candidato y su similitud coseno"""
+
+    worker_id: int
+    worker_uuid: str
+    name: str
+    similarity: float
+
+
+class IdentifyResponse(BaseModel):
+    """Coincidencias por cada embedding enviado, en el mismo orden"""
+
+    results: List[List[FaceMatch]]
+
+
+class VerifyPair(BaseModel):
+    """Un trabajador declarado y el embedding capturado (verificación 1:1)"""
+
+    worker_uuid: str
+    embedding: List[float]
+
+    @field_validator("embedding")
+    @classmethod
+    def embedding_has_128_values(cls, v: List[float]) -> List[float]:
+        """Valida la dimensión del embedding"""
+        return _check_embedding_lengths([v])[0]
+
+
+class VerifyRequest(BaseModel):
+    """
+    Schema para VERIFICAR pares (POST /api/v1/faces/verify).
+    Por ejemplo, todos los registros de un batch de sincronización.
+    """
+
+    pairs: List[VerifyPair] = Field(
+        ..., min_length=1, max_length=1000, description="Pares a verificar"
+    )
+    threshold: Optional[float] = Field(
+        default=None,
+        ge=-1.0,
+        le=1.0,
+        description="Similitud mínima para aceptar (default FACE_VERIFY_THRESHOLD)",
+    )
+
+
+class VerifyResult(BaseModel):
+    """
+    Resultado de un par. worker_id/similarity son null si el trabajador
+    no existe o no tiene embedding válido.
+    """
+
+    worker_uuid: str
+    worker_id: Optional[int] = None
+    similarity: Optional[float] = None
+    verified: bool
+
+
+class VerifyResponse(BaseModel):
+    """Resultados en el mismo orden que los pares enviados"""
+
+    threshold: float
+    results: List[VerifyResult]
+
+
+class DuplicateAuditRequest(BaseModel):
+    """Parámetros de una auditoría de duplicados"""
+
+    threshold: Optional[float] = Field(
+        default=None,
+        ge=-1.0,
+        le=1.0,
+        description="Similitud mínima (default FACE_DUPLICATE_THRESHOLD)",
+    )
+    workers: int = Field(default=1, ge=1, le=32, description="Procesos")
+
+
+class DuplicateAuditStarted(BaseModel):
+    """Auditoría encolada en segundo plano"""
+
+    audit_id: str
+    status: str = "started"
+
+
+class DuplicateCandidateResponse(BaseModel):
+    """Par de trabajadores sospechado de ser la misma persona"""
+
+    worker_id: int
+    worker_uuid: str
+    duplicate_worker_id: int
+    duplicate_worker_uuid: str
+    similarity: float
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DuplicateAuditResponse(BaseModel):
+    """Estado de una auditoría y sus pares, de mayor a menor similitud"""
+
+    audit_id: Optional[str] = None
+    status: Optional[Literal["running", "done", "failed"]] = None
+    threshold: Optional[float] = None
+    workers: Optional[int] = None
+    pairs: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    candidates: List[DuplicateCandidateResponse]
+
+
+class EmbedRequest(BaseModel):
+    """
+    Schema para CALCULAR embeddings en el servidor (POST /api/v1/faces/embed).
+    Recortes del rostro (JPEG/PNG, idealmente 112x112) en base64.
+    """
+
+    images: List[Base64Bytes] = Field(
+        ..., min_length=1, max_length=32, description="Imágenes en base64"
+    )
+
+
+class EmbedResponse(BaseModel):
+    """Un embedding de 128 valores por imagen, en el mismo orden"""
+
+    embeddings: List[List[float]]
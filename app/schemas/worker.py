@@ -7,8 +7,13 @@ Schemas Pydantic para validación de datos de trabajadores.
 - Genera documentación automática en Swagger
 """
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, computed_field, field_validator, model_validator
 from datetime import datetime
+from typing import List, Literal, Optional
+
+from app.ml.embeddings import EMBEDDING_BYTES, centroid_embedding
+
+MAX_TEMPLATES = 10
 
 
 class WorkerBase(BaseModel):
@@ -25,7 +30,18 @@ class WorkerCreate(WorkerBase):
     """
 
     uuid: str = Field(..., description="UUID generado por el dispositivo")
-    face_embedding: bytes = Field(..., description="Embedding del rostro (128 floats)")
+    face_embedding: Optional[bytes] = Field(
+        default=None, description="Embedding del rostro (128 floats)"
+    )
+    templates: Optional[List[bytes]] = Field(
+        default=None,
+        min_length=1,
+        max_length=MAX_TEMPLATES,
+        description="Un embedding por foto; face_embedding pasa a ser su centroide",
+    )
+    site: Optional[str] = Field(
+        default=None, max_length=100, description="Sitio/campo donde trabaja"
+    )
 
     @field_validator("name")
     def name_must_not_be_empty(cls, v):
@@ -34,6 +50,59 @@ class WorkerCreate(WorkerBase):
             raise ValueError("El nombre no puede estar vacío")
         return v.strip().title()  # "juan perez" -> "Juan Perez"
 
+    @model_validator(mode="after")
+    def face_from_templates(self):
+        """Con templates, face_embedding = centroide; sin templates es obligatorio"""
+        if self.templates:
+            self.face_embedding = centroid_embedding(self.templates)
+        elif self.face_embedding is None:
+            raise ValueError("Se requiere face_embedding o templates")
+        return self
+
+
+class WorkerUpdate(BaseModel):
+    """
+    Schema para ACTUALIZAR un trabajador (PATCH /api/v1/workers/{uuid}).
+    Solo se cambian los campos enviados.
+    """
+
+    name: Optional[str] = Field(default=None, min_length=3, max_length=100)
+    face_embedding: Optional[bytes] = Field(
+        default=None, description="Embedding del rostro (128 floats)"
+    )
+    site: Optional[str] = Field(
+        default=None, max_length=100, description="Sitio/campo donde trabaja"
+    )
+    templates: Optional[List[bytes]] = Field(
+        default=None,
+        min_length=1,
+        max_length=MAX_TEMPLATES,
+        description="Reemplaza los templates; face_embedding pasa a ser su centroide",
+    )
+
+    @field_validator("name")
+    def name_must_not_be_empty(cls, v):
+        """Valida que el nombre no esté vacío"""
+        if v is not None and not v.strip():
+            raise ValueError("El nombre no puede estar vacío")
+        return v.strip().title() if v is not None else v
+
+    @field_validator("face_embedding")
+    def embedding_size(cls, v):
+        """Valida que sean 128 floats (512 bytes)"""
+        if v is not None and len(v) != EMBEDDING_BYTES:
+            raise ValueError(
+                f"face_embedding inválido: {len(v)} bytes (se esperaban {EMBEDDING_BYTES})"
+            )
+        return v
+
+    @model_validator(mode="after")
+    def face_from_templates(self):
+        """Con templates, face_embedding = centroide"""
+        if self.templates:
+            self.face_embedding = centroid_embedding(self.templates)
+        return self
+
 
 class WorkerResponse(WorkerBase):
     """
@@ -44,8 +113,13 @@ class WorkerResponse(WorkerBase):
 
     id: int
     uuid: str
+    site: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    # Solo al registrar con FACE_DUPLICATE_POLICY=flag: trabajador ya
+    # enrolado con un rostro casi igual
+    duplicate_of: Optional[str] = None
+    duplicate_score: Optional[float] = None
 
     class Config:
         # Permite crear desde un modelo SQLAlchemy
@@ -58,7 +132,54 @@ class WorkerListResponse(BaseModel):
     id: int
     uuid: str
     name: str
+    site: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class WorkerPage(BaseModel):
+    """Página de trabajadores (paginación por cursor)"""
+
+    items: List[WorkerListResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Cursor de la siguiente página (null = última)"
+    )
+
+
+class WorkerChange(BaseModel):
+    """Trabajador creado, actualizado o dado de baja desde el cursor"""
+
+    roster_version: int = Field(..., description="Versión del padrón del cambio")
+    id: int
+    uuid: str
+    name: str
+    site: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    deleted_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def op(self) -> Literal["upsert", "delete"]:
+        """upsert = alta o modificación, delete = baja"""
+        return "delete" if self.deleted_at is not None else "upsert"
+
+    class Config:
+        from_attributes = True
+
+
+class WorkerChangesResponse(BaseModel):
+    """Cambios del padrón desde un cursor (sincronización incremental)"""
+
+    changes: List[WorkerChange] = Field(
+        default_factory=list,
+        description="Cambios en el orden en que se confirmaron (aplicar en orden)",
+    )
+    next_cursor: Optional[str] = Field(
+        default=None, description="Cursor para la próxima llamada"
+    )
+    has_more: bool = Field(
+        default=False, description="Hay más cambios: volver a llamar ya"
+    )
@@ -0,0 +1,179 @@
+"""
+Versión async de AttendanceService (para DB_ASYNC=true).
+
+Reutiliza los mismos statements que app/services/attendance_service.py;
+solo cambia la forma de ejecutarlos (await sobre AsyncSession).
+"""
+
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cursor import keyset_page
+from app.schemas.attendance import (
+    AttendanceCreate,
+    AttendanceBatchCreate,
+    RecordStatus,
+)
+from app.services.attendance_service import (
+    _attendance_page_key,
+    _attendance_row,
+    _batch_summary,
+    _bulk_insert_statement,
+    _checkin_statement,
+    _classify_records,
+    _existing_checkin_statement,
+    _high_water_mark,
+    _merge_statuses,
+    _parse_records,
+    _worker_attendance_statement,
+)
+from app.services.async_worker_service import AsyncWorkerService
+from app.services.device_service import DeviceService
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class AsyncAttendanceService:
+    """Servicio async para registros de asistencia"""
+
+    @staticmethod
+    async def checkin(db: AsyncSession, attendance_data: AttendanceCreate) -> dict:
+        """
+        Registra un checkin en un solo round trip.
+        Ver AttendanceService.checkin.
+
+        Raises:
+            ValueError: Si el trabajador no existe
+        """
+        try:
+            result = await db.execute(_checkin_statement(attendance_data))
+            row = result.mappings().first()
+            if row is None:
+                # Carrera con otra transacción: su fila ya está confirmada
+                result = await db.execute(
+                    _existing_checkin_statement(
+                        attendance_data.uuid, attendance_data.worker_uuid
+                    )
+                )
+                row = result.mappings().first()
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            raise
+
+        if row is None:
+            raise ValueError(f"Trabajador no encontrado: {attendance_data.worker_uuid}")
+        return dict(row)
+
+    @staticmethod
+    async def resolve_worker_ids(
+        db: AsyncSession, worker_uuids: Iterable[str]
+    ) -> Dict[str, int]:
+        """
+        Resuelve muchos UUID de trabajador a su ID.
+        Usa el caché de trabajadores; lo que falta se busca con un solo IN.
+        """
+        workers = await AsyncWorkerService.resolve_workers(db, worker_uuids)
+        return {uuid: worker.id for uuid, worker in workers.items()}
+
+    @staticmethod
+    async def bulk_insert(
+        db: AsyncSession, records: List[AttendanceCreate]
+    ) -> List[RecordStatus]:
+        """
+        Inserta muchos registros en una sola transacción.
+        Ver AttendanceService.bulk_insert.
+        """
+        if not records:
+            return []
+
+        worker_ids = await AsyncAttendanceService.resolve_worker_ids(
+            db, (r.worker_uuid for r in records)
+        )
+        rows = [
+            _attendance_row(r, worker_ids[r.worker_uuid])
+            for r in records
+            if r.worker_uuid in worker_ids
+        ]
+
+        inserted: Set[str] = set()
+        failed: Set[str] = set()
+        if rows:
+            try:
+                result = await db.execute(_bulk_insert_statement(rows))
+                inserted = set(result.scalars())
+                await db.commit()
+            except SQLAlchemyError:
+                await db.rollback()
+                inserted, failed = await AsyncAttendanceService._insert_rows_one_by_one(
+                    db, rows
+                )
+
+        return _classify_records(records, worker_ids, inserted, failed)
+
+    @staticmethod
+    async def _insert_rows_one_by_one(db: AsyncSession, rows: List[dict]):
+        """Camino lento con un SAVEPOINT por fila (ver AttendanceService)"""
+        inserted: Set[str] = set()
+        failed: Set[str] = set()
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(_bulk_insert_statement([row]))
+                    inserted.update(result.scalars())
+            except SQLAlchemyError:
+                failed.add(row["uuid"])
+        await db.commit()
+        return inserted, failed
+
+    @staticmethod
+    async def create_attendance_batch(
+        db: AsyncSession,
+        batch_data: AttendanceBatchCreate,
+        device_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Crea múltiples registros de asistencia.
+        Ver AttendanceService.create_attendance_batch.
+
+        Returns:
+            {"created": 45, "skipped": 5, "errors": [...],
+             "statuses": ["created", "duplicate", ...], "high_water_mark": ...}
+        """
+        records, invalid = _parse_records(batch_data.records)
+        valid_statuses = await AsyncAttendanceService.bulk_insert(
+            db, [record for record in records if record is not None]
+        )
+        statuses = _merge_statuses(records, valid_statuses)
+        summary = _batch_summary(records, statuses, invalid)
+        if device_id is not None:
+            summary["high_water_mark"] = await db.run_sync(
+                DeviceService.advance_high_water_mark,
+                device_id,
+                _high_water_mark(records, statuses),
+                statuses.count(RecordStatus.CREATED)
+                + statuses.count(RecordStatus.DUPLICATE),
+            )
+        return summary
+
+    @staticmethod
+    async def get_worker_attendance(
+        db: AsyncSession,
+        worker_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Obtiene el historial de un trabajador, paginado por cursor.
+        Ver AttendanceService.get_worker_attendance.
+        """
+        rows = (
+            await db.scalars(
+                _worker_attendance_statement(
+                    worker_id, limit, cursor, from_time, to_time
+                )
+            )
+        ).all()
+        items, next_cursor = keyset_page(rows, limit, _attendance_page_key)
+        return {"items": items, "next_cursor": next_cursor}
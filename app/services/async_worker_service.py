@@ -0,0 +1,143 @@
+"""
+Versión async de WorkerService (para DB_ASYNC=true).
+
+Misma lógica que app/services/worker_service.py, pero con AsyncSession:
+cada consulta cede el event loop mientras espera a PostgreSQL.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.worker import Worker
+from app.models.worker_template import WorkerTemplate
+from app.schemas.worker import WorkerCreate, WorkerUpdate
+from app.services.worker_cache import CachedWorker, worker_cache
+from app.core.cursor import keyset_page
+from app.services.worker_service import (
+    WorkerService,
+    _bump_roster_version_statement,
+    _cache_workers,
+    _roster_version_statement,
+    _workers_by_uuid_statement,
+    _workers_page_statement,
+)
+from typing import Dict, Iterable, Optional
+
+
+class AsyncWorkerService:
+    """Servicio async para operaciones de trabajadores"""
+
+    @staticmethod
+    async def create_worker(db: AsyncSession, worker_data: WorkerCreate) -> Worker:
+        """
+        Crea un nuevo trabajador en la base de datos.
+
+        Args:
+            db: Sesión async de base de datos
+            worker_data: Datos del trabajador (validados por Pydantic)
+
+        Returns:
+            Worker creado con su ID asignado
+        """
+        # Verificar si ya existe un trabajador con ese UUID
+        existing = await db.scalar(
+            select(Worker.id).where(Worker.uuid == worker_data.uuid)
+        )
+        if existing:
+            raise ValueError(f"Ya existe un trabajador con UUID {worker_data.uuid}")
+
+        # Subir la versión del padrón en la misma transacción: la fila la
+        # guarda como cursor de /workers/changes
+        version = (await db.execute(_bump_roster_version_statement())).scalar_one()
+
+        db_worker = Worker(
+            uuid=worker_data.uuid,
+            name=worker_data.name,
+            face_embedding=worker_data.face_embedding,
+            site=worker_data.site,
+            templates=[
+                WorkerTemplate(embedding=template)
+                for template in worker_data.templates or []
+            ],
+            roster_version=version,
+        )
+
+        # Guardar en BD
+        db.add(db_worker)
+        await db.commit()
+        await db.refresh(db_worker)  # Para obtener el ID generado
+
+        worker_cache.invalidate(db_worker.uuid)
+        worker_cache.sync_version(version)
+        return db_worker
+
+    # Operaciones poco frecuentes: se reutiliza la lógica sync con run_sync,
+    # que la ejecuta sobre la conexión async sin bloquear el event loop.
+
+    @staticmethod
+    async def update_worker(
+        db: AsyncSession, uuid: str, worker_data: WorkerUpdate
+    ) -> Optional[Worker]:
+        """Ver WorkerService.update_worker"""
+        return await db.run_sync(WorkerService.update_worker, uuid, worker_data)
+
+    @staticmethod
+    async def delete_worker(db: AsyncSession, uuid: str) -> bool:
+        """Ver WorkerService.delete_worker"""
+        return await db.run_sync(WorkerService.delete_worker, uuid)
+
+    @staticmethod
+    async def get_changes(
+        db: AsyncSession, since: Optional[str] = None, limit: int = 500
+    ) -> dict:
+        """Ver WorkerService.get_changes"""
+        return await db.run_sync(WorkerService.get_changes, since, limit)
+
+    @staticmethod
+    async def get_worker_by_uuid(db: AsyncSession, uuid: str) -> Optional[Worker]:
+        """Busca un trabajador por UUID (sin las bajas)"""
+        return await db.scalar(
+            select(Worker).where(Worker.uuid == uuid, Worker.deleted_at.is_(None))
+        )
+
+    @staticmethod
+    async def resolve_workers(
+        db: AsyncSession, uuids: Iterable[str]
+    ) -> Dict[str, CachedWorker]:
+        """
+        Resuelve UUID de trabajadores a (id, nombre) usando el caché.
+        Ver WorkerService.resolve_workers.
+        """
+        if worker_cache.version_check_due():
+            version = await db.scalar(_roster_version_statement())
+            worker_cache.sync_version(version or 0)
+
+        found, missing = worker_cache.get_many(uuids)
+        if missing:
+            generation = worker_cache.generation
+            result = await db.execute(_workers_by_uuid_statement(missing))
+            found.update(_cache_workers(result.all(), generation))
+        return found
+
+    @staticmethod
+    async def resolve_worker(db: AsyncSession, uuid: str) -> Optional[CachedWorker]:
+        """Resuelve un solo UUID a (id, nombre) usando el caché"""
+        return (await AsyncWorkerService.resolve_workers(db, [uuid])).get(uuid)
+
+    @staticmethod
+    async def get_worker_by_id(db: AsyncSession, worker_id: int) -> Optional[Worker]:
+        """Busca un trabajador por ID (sin las bajas)"""
+        return await db.scalar(
+            select(Worker).where(Worker.id == worker_id, Worker.deleted_at.is_(None))
+        )
+
+    @staticmethod
+    async def get_all_workers(
+        db: AsyncSession, cursor: Optional[str] = None, limit: int = 100
+    ) -> dict:
+        """
+        Obtiene lista de trabajadores (paginado por cursor).
+        Ver WorkerService.get_all_workers.
+        """
+        rows = (await db.scalars(_workers_page_statement(cursor, limit))).all()
+        items, next_cursor = keyset_page(rows, limit, lambda w: (w.id,))
+        return {"items": items, "next_cursor": next_cursor}
@@ -2,95 +2,479 @@
 Servicio para operaciones de asistencia.
 """
 
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from pydantic import ValidationError
+from sqlalchemy import cast, exists, false, select, true, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
+from app.core.cursor import decode_cursor, keyset_page
 from app.models.attendance import Attendance
 from app.models.worker import Worker
-from app.schemas.attendance import AttendanceCreate, AttendanceBatchCreate
-from typing import List
+from app.services.device_service import DeviceService
+from app.services.worker_service import WorkerService
+from app.schemas.attendance import (
+    AttendanceCreate,
+    AttendanceBatchCreate,
+    RecordStatus,
+)
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Columnas que devuelve el checkin (las que necesita AttendanceResponse)
+_CHECKIN_COLUMNS = (
+    "id",
+    "uuid",
+    "worker_id",
+    "timestamp",
+    "type",
+    "confidence",
+    "device_id",
+    "synced_at",
+)
+
+
+def _attendance_row(attendance_data: AttendanceCreate, worker_id: int) -> dict:
+    """Convierte un registro validado en una fila lista para INSERT"""
+    now = datetime.now(timezone.utc)
+    return {
+        "uuid": attendance_data.uuid,
+        "worker_id": worker_id,
+        "timestamp": attendance_data.timestamp,
+        "type": attendance_data.type,
+        "confidence": attendance_data.confidence,
+        "device_id": attendance_data.device_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _bulk_insert_statement(rows: List[dict]):
+    """
+    INSERT multi-fila idempotente.
+
+    ON CONFLICT (uuid) DO NOTHING descarta los registros que ya existen
+    y RETURNING devuelve solo los UUID realmente insertados.
+    """
+    return (
+        pg_insert(Attendance)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["uuid"])
+        .returning(Attendance.uuid)
+    )
+
+
+def _checkin_statement(attendance_data: AttendanceCreate):
+    """
+    Checkin idempotente en un solo statement.
+
+        WITH worker AS (SELECT id, name FROM workers WHERE uuid = :worker_uuid),
+             inserted AS (INSERT INTO attendance (...) SELECT ... FROM worker
+                          ON CONFLICT (uuid) DO NOTHING RETURNING ...)
+        SELECT inserted.*, worker.name, true FROM inserted JOIN worker ...
+        UNION ALL
+        SELECT attendance.*, workers.name, false FROM attendance JOIN workers ...
+        WHERE attendance.uuid = :uuid AND NOT EXISTS (SELECT 1 FROM inserted)
+
+    Devuelve una fila con el registro (nuevo o existente), el nombre del
+    trabajador y si fue creado. Si no devuelve filas, o el trabajador no
+    existe, o el registro lo está insertando otra transacción concurrente
+    (el fallback no ve filas confirmadas después del inicio del statement).
+    """
+    now = datetime.now(timezone.utc)
+    worker = (
+        select(Worker.id, Worker.name)
+        .where(Worker.uuid == attendance_data.worker_uuid, Worker.deleted_at.is_(None))
+        .cte("worker")
+    )
+    inserted = (
+        pg_insert(Attendance)
+        .from_select(
+            [
+                "uuid",
+                "worker_id",
+                "timestamp",
+                "type",
+                "confidence",
+                "device_id",
+                "created_at",
+                "updated_at",
+            ],
+            # CAST explícito: en INSERT ... SELECT los parámetros no se
+            # convierten solos al tipo de la columna (enum, float, ...)
+            select(
+                cast(attendance_data.uuid, Attendance.uuid.type),
+                worker.c.id,
+                cast(attendance_data.timestamp, Attendance.timestamp.type),
+                cast(attendance_data.type, Attendance.type.type),
+                cast(attendance_data.confidence, Attendance.confidence.type),
+                cast(attendance_data.device_id, Attendance.device_id.type),
+                cast(now, Attendance.created_at.type),
+                cast(now, Attendance.updated_at.type),
+            ),
+        )
+        .on_conflict_do_nothing(index_elements=["uuid"])
+        .returning(*(Attendance.__table__.c[name] for name in _CHECKIN_COLUMNS))
+        .cte("inserted")
+    )
+    created = select(
+        *(inserted.c[name] for name in _CHECKIN_COLUMNS),
+        worker.c.name.label("worker_name"),
+        true().label("created"),
+    ).join_from(inserted, worker, inserted.c.worker_id == worker.c.id)
+    existing = _existing_checkin_statement(
+        attendance_data.uuid, attendance_data.worker_uuid
+    ).where(~exists(select(inserted.c.id)))
+    return union_all(created, existing)
+
+
+def _existing_checkin_statement(attendance_uuid: str, worker_uuid: str):
+    """
+    Registro existente + nombre del trabajador, con las columnas del checkin.
+    Solo si el trabajador del request existe: un reintento con un
+    trabajador desconocido sigue siendo un error, aunque el UUID exista.
+    """
+    requested = aliased(Worker)
+    return (
+        select(
+            *(Attendance.__table__.c[name] for name in _CHECKIN_COLUMNS),
+            Worker.name.label("worker_name"),
+            false().label("created"),
+        )
+        .join(Worker, Worker.id == Attendance.worker_id)
+        .where(
+            Attendance.uuid == attendance_uuid,
+            exists(
+                select(requested.id).where(
+                    requested.uuid == worker_uuid, requested.deleted_at.is_(None)
+                )
+            ),
+        )
+    )
+
+
+def _worker_attendance_statement(
+    worker_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    from_time: Optional[datetime] = None,
+    to_time: Optional[datetime] = None,
+):
+    """
+    Página del historial de un trabajador, del más reciente al más viejo.
+
+    Keyset sobre (timestamp, id) dentro de worker_id: usa el índice
+    ix_attendance_worker_timestamp, así la página N cuesta lo mismo que
+    la primera. Lee limit + 1 filas para saber si hay otra página.
+
+    Raises:
+        ValueError: Si el cursor es inválido
+    """
+    query = (
+        select(Attendance)
+        .where(Attendance.worker_id == worker_id)
+        .order_by(Attendance.timestamp.desc(), Attendance.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        last_key = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            tuple_(Attendance.timestamp, Attendance.id) < tuple_(*last_key)
+        )
+    if from_time is not None:
+        query = query.where(Attendance.timestamp >= from_time)
+    if to_time is not None:
+        query = query.where(Attendance.timestamp < to_time)
+    return query
+
+
+def _attendance_page_key(attendance: Attendance) -> tuple:
+    """Clave de keyset de un registro del historial"""
+    return (attendance.timestamp, attendance.id)
+
+
+def _classify_records(
+    records: List[AttendanceCreate],
+    worker_ids: Dict[str, int],
+    inserted: AbstractSet[str],
+    failed: AbstractSet[str] = frozenset(),
+) -> List[RecordStatus]:
+    """
+    Asigna un estado a cada registro, en el mismo orden del batch.
+
+    Si un UUID viene repetido dentro del mismo batch, solo la primera
+    aparición que llegó al INSERT (trabajador conocido) cuenta como
+    creada; el resto son duplicados.
+    """
+    statuses = []
+    seen = set()
+    for record in records:
+        if record.worker_uuid not in worker_ids:
+            # No llegó al INSERT: no ocupa el UUID para las apariciones siguientes
+            statuses.append(RecordStatus.UNKNOWN_WORKER)
+            continue
+        if record.uuid in failed:
+            statuses.append(RecordStatus.ERROR)
+        elif record.uuid in inserted and record.uuid not in seen:
+            statuses.append(RecordStatus.CREATED)
+        else:
+            statuses.append(RecordStatus.DUPLICATE)
+        seen.add(record.uuid)
+    return statuses
+
+
+def _parse_records(
+    raw_records: List[Dict[str, Any]],
+) -> Tuple[List[Optional[AttendanceCreate]], Dict[int, str]]:
+    """
+    Valida cada registro del batch por separado.
+
+    Returns:
+        (registros con None en las posiciones inválidas,
+         {posición: motivo} de los inválidos)
+    """
+    records: List[Optional[AttendanceCreate]] = []
+    invalid: Dict[int, str] = {}
+    for position, raw in enumerate(raw_records):
+        try:
+            records.append(AttendanceCreate.model_validate(raw))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            invalid[position] = (
+                f"{location}: {error['msg']}" if location else error["msg"]
+            )
+            records.append(None)
+    return records, invalid
+
+
+def _merge_statuses(
+    records: List[Optional[AttendanceCreate]], valid_statuses: List[RecordStatus]
+) -> List[RecordStatus]:
+    """Reubica los estados de los registros válidos en su posición del batch"""
+    pending = iter(valid_statuses)
+    return [
+        RecordStatus.INVALID if record is None else next(pending) for record in records
+    ]
+
+
+def _high_water_mark(
+    records: List[Optional[AttendanceCreate]], statuses: List[RecordStatus]
+) -> Optional[datetime]:
+    """
+    Timestamp del registro acusado (creado o duplicado) más nuevo del batch
+    que no deja atrás ningún pendiente.
+
+    UNKNOWN_WORKER y ERROR quedan pendientes (el tablet los reenvía, por
+    ejemplo cuando llegue el trabajador en el roster): la marca no los
+    pasa. INVALID no: nunca va a entrar, el tablet lo descarta.
+
+    Solo mira este batch: no sabe de registros que el tablet no envió ni
+    de otros batches en vuelo (ver GET /attendance/sync/state).
+    """
+    pending = [
+        record.timestamp
+        for record, record_status in zip(records, statuses)
+        if record_status in (RecordStatus.UNKNOWN_WORKER, RecordStatus.ERROR)
+    ]
+    limit = min(pending, default=None)
+    return max(
+        (
+            record.timestamp
+            for record, record_status in zip(records, statuses)
+            if record_status in (RecordStatus.CREATED, RecordStatus.DUPLICATE)
+            and (limit is None or record.timestamp < limit)
+        ),
+        default=None,
+    )
+
+
+def _batch_summary(
+    records: List[Optional[AttendanceCreate]],
+    statuses: List[RecordStatus],
+    invalid: Dict[int, str],
+) -> dict:
+    """Arma la respuesta de sincronización a partir de los estados"""
+    errors = []
+    for position, (record, record_status) in enumerate(zip(records, statuses)):
+        if record_status == RecordStatus.INVALID:
+            errors.append(f"Registro {position} inválido: {invalid[position]}")
+        elif record_status == RecordStatus.UNKNOWN_WORKER:
+            errors.append(f"Trabajador no encontrado: {record.worker_uuid}")
+        elif record_status == RecordStatus.ERROR:
+            errors.append(f"Error al guardar registro: {record.uuid}")
+
+    created_count = statuses.count(RecordStatus.CREATED)
+    return {
+        "created": created_count,
+        "skipped": len(statuses) - created_count,
+        "errors": errors,
+        "statuses": statuses,
+    }
 
 
 class AttendanceService:
     """Servicio para registros de asistencia"""
 
     @staticmethod
-    def create_attendance(db: Session, attendance_data: AttendanceCreate) -> Attendance:
+    def checkin(db: Session, attendance_data: AttendanceCreate) -> dict:
         """
-        Crea un registro de asistencia.
+        Registra un checkin en un solo round trip.
 
-        Flow:
-        1. Buscar al trabajador por UUID
-        2. Verificar que no exista registro duplicado
-        3. Crear el registro
+        Inserta o devuelve el registro existente (idempotencia por UUID)
+        junto con el nombre del trabajador. Si dos reintentos del mismo
+        registro llegan a la vez, el perdedor espera al ganador en el
+        ON CONFLICT y luego lee su fila con un segundo SELECT.
+
+        Returns:
+            Diccionario con los campos de AttendanceResponse y "created"
+
+        Raises:
+            ValueError: Si el trabajador no existe
         """
-        # Buscar trabajador
-        worker = (
-            db.query(Worker).filter(Worker.uuid == attendance_data.worker_uuid).first()
-        )
-        if not worker:
+        try:
+            row = db.execute(_checkin_statement(attendance_data)).mappings().first()
+            if row is None:
+                # Carrera con otra transacción: su fila ya está confirmada
+                row = (
+                    db.execute(
+                        _existing_checkin_statement(
+                            attendance_data.uuid, attendance_data.worker_uuid
+                        )
+                    )
+                    .mappings()
+                    .first()
+                )
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+
+        if row is None:
             raise ValueError(f"Trabajador no encontrado: {attendance_data.worker_uuid}")
+        return dict(row)
 
-        # Verificar duplicado (mismo UUID de registro)
-        existing = (
-            db.query(Attendance).filter(Attendance.uuid == attendance_data.uuid).first()
-        )
-        if existing:
-            # Ya existe, no es error (idempotencia para sincronización)
-            return existing
-
-        # Crear registro
-        db_attendance = Attendance(
-            uuid=attendance_data.uuid,
-            worker_id=worker.id,
-            timestamp=attendance_data.timestamp,
-            type=attendance_data.type,
-            confidence=attendance_data.confidence,
-            device_id=attendance_data.device_id,
+    @staticmethod
+    def resolve_worker_ids(db: Session, worker_uuids: Iterable[str]) -> Dict[str, int]:
+        """
+        Resuelve muchos UUID de trabajador a su ID.
+        Usa el caché de trabajadores; lo que falta se busca con un solo IN.
+        """
+        workers = WorkerService.resolve_workers(db, worker_uuids)
+        return {uuid: worker.id for uuid, worker in workers.items()}
+
+    @staticmethod
+    def bulk_insert(db: Session, records: List[AttendanceCreate]) -> List[RecordStatus]:
+        """
+        Inserta muchos registros en una sola transacción.
+
+        Flow:
+        1. Resolver todos los trabajadores con un solo IN
+        2. Un único INSERT ... ON CONFLICT (uuid) DO NOTHING RETURNING
+        3. Si el INSERT falla, reintentar fila por fila con SAVEPOINT
+           para que un registro malo no tumbe al resto
+
+        Returns:
+            Un RecordStatus por registro, en el mismo orden recibido
+        """
+        if not records:
+            return []
+
+        worker_ids = AttendanceService.resolve_worker_ids(
+            db, (r.worker_uuid for r in records)
         )
+        rows = [
+            _attendance_row(r, worker_ids[r.worker_uuid])
+            for r in records
+            if r.worker_uuid in worker_ids
+        ]
 
-        db.add(db_attendance)
-        db.commit()
-        db.refresh(db_attendance)
+        inserted: Set[str] = set()
+        failed: Set[str] = set()
+        if rows:
+            try:
+                inserted = set(db.execute(_bulk_insert_statement(rows)).scalars())
+                db.commit()
+            except SQLAlchemyError:
+                db.rollback()
+                inserted, failed = AttendanceService._insert_rows_one_by_one(db, rows)
 
-        return db_attendance
+        return _classify_records(records, worker_ids, inserted, failed)
 
     @staticmethod
-    def create_attendance_batch(db: Session, batch_data: AttendanceBatchCreate) -> dict:
+    def _insert_rows_one_by_one(db: Session, rows: List[dict]):
+        """
+        Camino lento: solo se usa cuando el INSERT multi-fila falla.
+        Cada fila va en su propio SAVEPOINT.
+        """
+        inserted: Set[str] = set()
+        failed: Set[str] = set()
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    inserted.update(db.execute(_bulk_insert_statement([row])).scalars())
+            except SQLAlchemyError:
+                failed.add(row["uuid"])
+        db.commit()
+        return inserted, failed
+
+    @staticmethod
+    def create_attendance_batch(
+        db: Session, batch_data: AttendanceBatchCreate, device_id: Optional[str] = None
+    ) -> dict:
         """
         Crea múltiples registros de asistencia.
 
         Útil para sincronización offline.
         El Android acumula 50-100 registros y los envía todos juntos.
+        La base de datos ve una consulta de trabajadores y un INSERT por
+        batch, no 5 round trips por registro.
+
+        Cada registro se valida por separado: los inválidos no frenan al
+        resto. Con device_id se avanza además la marca de agua del tablet.
 
         Returns:
-            {"created": 45, "skipped": 5}
+            {"created": 45, "skipped": 5, "errors": [...],
+             "statuses": ["created", "duplicate", ...], "high_water_mark": ...}
+            statuses va en el mismo orden que batch_data.records
         """
-        created_count = 0
-        skipped_count = 0
-        errors = []
-
-        for attendance_data in batch_data.records:
-            try:
-                AttendanceService.create_attendance(db, attendance_data)
-                created_count += 1
-            except ValueError as e:
-                # Trabajador no encontrado
-                errors.append(str(e))
-                skipped_count += 1
-            except Exception:
-                # Otro error (probablemente duplicado)
-                skipped_count += 1
-
-        return {"created": created_count, "skipped": skipped_count, "errors": errors}
+        records, invalid = _parse_records(batch_data.records)
+        valid_statuses = AttendanceService.bulk_insert(
+            db, [record for record in records if record is not None]
+        )
+        statuses = _merge_statuses(records, valid_statuses)
+        summary = _batch_summary(records, statuses, invalid)
+        if device_id is not None:
+            summary["high_water_mark"] = DeviceService.advance_high_water_mark(
+                db,
+                device_id,
+                _high_water_mark(records, statuses),
+                statuses.count(RecordStatus.CREATED)
+                + statuses.count(RecordStatus.DUPLICATE),
+            )
+        return summary
 
     @staticmethod
     def get_worker_attendance(
-        db: Session, worker_id: int, limit: int = 50
-    ) -> List[Attendance]:
-        """Obtiene los últimos N registros de un trabajador"""
-        return (
-            db.query(Attendance)
-            .filter(Attendance.worker_id == worker_id)
-            .order_by(Attendance.timestamp.desc())
-            .limit(limit)
-            .all()
-        )
+        db: Session,
+        worker_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        from_time: Optional[datetime] = None,
+        to_time: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Obtiene el historial de un trabajador, paginado por cursor.
+
+        Args:
+            cursor: next_cursor de la página anterior (None = más recientes)
+            from_time: Solo registros con timestamp >= from_time
+            to_time: Solo registros con timestamp < to_time
+
+        Returns:
+            {"items": [...], "next_cursor": "..." o None}
+        """
+        rows = db.scalars(
+            _worker_attendance_statement(worker_id, limit, cursor, from_time, to_time)
+        ).all()
+        items, next_cursor = keyset_page(rows, limit, _attendance_page_key)
+        return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,306 @@
+"""
+Credenciales de los dispositivos y emisión de tokens.
+
+bcrypt cuesta ~100 ms de CPU por verificación a propósito. Para que un
+turno entero de tablets autenticándose a la vez no frene al resto de los
+requests:
+
+- bcrypt corre en un pool de hilos propio y acotado (AUTH_HASH_WORKERS),
+  fuera del event loop: como mucho esos núcleos se dedican a hashear y
+  los demás pedidos de token esperan su turno en la cola del pool.
+- Los tablets renuevan con el refresh token (un sha256 y un SELECT por
+  índice), sin volver a pasar por bcrypt.
+
+También lleva la marca de agua de sincronización de cada tablet.
+"""
+
+import asyncio
+import hashlib
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional, Union
+
+import bcrypt
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.auth.jwt_handler import create_access_token
+from app.core.config import get_settings
+from app.db.database import run_db
+from app.models.device import Device
+
+settings = get_settings()
+
+MAX_SECRET_BYTES = 72  # bcrypt ignora (o rechaza) lo que sigue
+
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.AUTH_HASH_WORKERS or max(1, (os.cpu_count() or 2) // 2),
+    thread_name_prefix="bcrypt",
+)
+
+
+def _refresh_digest(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+@lru_cache()
+def _dummy_hash() -> bytes:
+    """Hash contra el que se verifica si el device_id no existe (mismo tiempo)"""
+    return bcrypt.hashpw(
+        secrets.token_bytes(16), bcrypt.gensalt(settings.AUTH_BCRYPT_ROUNDS)
+    )
+
+
+def _check_secret(secret: str, secret_hash: Optional[str]) -> bool:
+    encoded = secret.encode()
+    if len(encoded) > MAX_SECRET_BYTES:
+        return False
+    hashed = secret_hash.encode() if secret_hash else _dummy_hash()
+    return bcrypt.checkpw(encoded, hashed) and secret_hash is not None
+
+
+class DeviceService:
+    """Servicio para credenciales de dispositivos y tokens"""
+
+    @staticmethod
+    def hash_secret(secret: str) -> str:
+        """
+        Hash bcrypt del secreto de un tablet.
+
+        Raises:
+            ValueError: Si el secreto supera los 72 bytes
+        """
+        encoded = secret.encode()
+        if len(encoded) > MAX_SECRET_BYTES:
+            raise ValueError(f"El secreto no puede superar {MAX_SECRET_BYTES} bytes")
+        return bcrypt.hashpw(
+            encoded, bcrypt.gensalt(settings.AUTH_BCRYPT_ROUNDS)
+        ).decode()
+
+    @staticmethod
+    def create_device(db: Session, device_id: str, secret: str) -> Device:
+        """
+        Da de alta un tablet.
+
+        Raises:
+            ValueError: Si el device_id ya existe
+        """
+        device = Device(
+            device_id=device_id, secret_hash=DeviceService.hash_secret(secret)
+        )
+        db.add(device)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise ValueError(f"El dispositivo {device_id} ya existe")
+        db.refresh(device)
+        return device
+
+    @staticmethod
+    def set_active(db: Session, device_id: str, active: bool) -> Device:
+        """
+        Habilita o bloquea un tablet. Al bloquearlo se invalida su refresh
+        token y se revocan sus access tokens vigentes: los servidores en
+        marcha dejan de aceptarlos en AUTH_REVOCATION_SYNC_SECONDS (ver
+        app/auth/revocation_sync.py).
+
+        Raises:
+            ValueError: Si el dispositivo no existe
+        """
+        device = db.scalar(select(Device).where(Device.device_id == device_id))
+        if device is None:
+            raise ValueError(f"No existe el dispositivo {device_id}")
+        device.active = active
+        if not active:
+            device.refresh_token_hash = None
+            device.refresh_expires_at = None
+            device.tokens_revoked_before = datetime.now(timezone.utc)
+        db.commit()
+        return device
+
+    @staticmethod
+    def revoke_tokens(db: Session, device_id: str, before: datetime) -> None:
+        """
+        Rechaza en todos los procesos los access tokens del tablet
+        emitidos antes de `before` (ver app/auth/revocation_sync.py).
+        Nunca retrocede una revocación anterior.
+        """
+        db.execute(
+            update(Device).where(Device.device_id == device_id)
+            # GREATEST ignora NULL: la primera revocación entra tal cual
+            .values(
+                tokens_revoked_before=func.greatest(
+                    Device.tokens_revoked_before, before
+                )
+            )
+        )
+        db.commit()
+
+    @staticmethod
+    def get_secret_hash(db: Session, device_id: str) -> Optional[str]:
+        """Hash del secreto de un tablet activo (None si no existe o está bloqueado)"""
+        return db.scalar(
+            select(Device.secret_hash).where(
+                Device.device_id == device_id, Device.active.is_(True)
+            )
+        )
+
+    @staticmethod
+    def rotate_refresh_token(
+        db: Session, device_id: str, old_digest: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Genera un refresh token nuevo para el tablet (reemplaza al anterior).
+
+        Args:
+            old_digest: Si se indica, solo rota si el refresh vigente es ese
+                (renovación): dos renovaciones con el mismo token no pasan
+
+        Returns:
+            El refresh token, o None si el tablet no está activo o el
+            refresh ya no es el vigente
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        query = select(Device).where(
+            Device.device_id == device_id, Device.active.is_(True)
+        )
+        if old_digest is not None:
+            query = query.where(
+                Device.refresh_token_hash == old_digest,
+                Device.refresh_expires_at > now,
+            )
+        device = db.scalar(query.with_for_update())
+        if device is None:
+            return None
+
+        refresh_token = secrets.token_urlsafe(32)
+        device.refresh_token_hash = _refresh_digest(refresh_token)
+        device.refresh_expires_at = now + timedelta(
+            days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+        )
+        db.commit()
+        return refresh_token
+
+    @staticmethod
+    def device_for_refresh(db: Session, refresh_token: str) -> Optional[str]:
+        """device_id dueño de un refresh token vigente (None si no es válido)"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return db.scalar(
+            select(Device.device_id).where(
+                Device.refresh_token_hash == _refresh_digest(refresh_token),
+                Device.refresh_expires_at > now,
+                Device.active.is_(True),
+            )
+        )
+
+    @staticmethod
+    def _tokens(device_id: str, refresh_token: str) -> dict:
+        return {
+            "access_token": create_access_token({"device_id": device_id}),
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        }
+
+    @staticmethod
+    async def authenticate(
+        db: Union[Session, AsyncSession], device_id: str, secret: str
+    ) -> dict:
+        """
+        Verifica device_id + secreto y emite access y refresh token.
+        bcrypt corre en el pool acotado, nunca en el event loop.
+
+        Raises:
+            ValueError: Si las credenciales son inválidas o el tablet está bloqueado
+        """
+        secret_hash = await run_db(db, DeviceService.get_secret_hash, device_id)
+        valid = await asyncio.get_running_loop().run_in_executor(
+            _hash_pool, _check_secret, secret, secret_hash
+        )
+        if not valid:
+            raise ValueError("Credenciales inválidas")
+
+        refresh_token = await run_db(db, DeviceService.rotate_refresh_token, device_id)
+        if refresh_token is None:
+            raise ValueError("Credenciales inválidas")
+        return DeviceService._tokens(device_id, refresh_token)
+
+    @staticmethod
+    async def refresh(db: Union[Session, AsyncSession], refresh_token: str) -> dict:
+        """
+        Renueva los tokens con un refresh token (sin bcrypt). El refresh
+        token se rota: el usado deja de servir.
+
+        Raises:
+            ValueError: Si el refresh token es inválido, venció o ya se usó
+        """
+        device_id = await run_db(db, DeviceService.device_for_refresh, refresh_token)
+        if device_id is None:
+            raise ValueError("Refresh token inválido o expirado")
+
+        new_refresh = await run_db(
+            db,
+            DeviceService.rotate_refresh_token,
+            device_id,
+            _refresh_digest(refresh_token),
+        )
+        if new_refresh is None:
+            raise ValueError("Refresh token inválido o expirado")
+        return DeviceService._tokens(device_id, new_refresh)
+
+    @staticmethod
+    def advance_high_water_mark(
+        db: Session, device_id: str, mark: Optional[datetime], acknowledged: int
+    ) -> Optional[datetime]:
+        """
+        Avanza la marca de agua del tablet (nunca la retrocede) y suma los
+        registros acusados, en un solo UPDATE.
+
+        Returns:
+            La marca vigente (None si el tablet no existe o aún no tiene)
+        """
+        values = {
+            "acknowledged_total": Device.acknowledged_total + acknowledged,
+            "last_sync_at": datetime.now(timezone.utc),
+        }
+        if mark is not None:
+            # GREATEST ignora NULL: la primera marca entra tal cual
+            values["high_water_mark"] = func.greatest(Device.high_water_mark, mark)
+        current = db.scalar(
+            update(Device)
+            .where(Device.device_id == device_id)
+            .values(**values)
+            .returning(Device.high_water_mark)
+        )
+        db.commit()
+        return current
+
+    @staticmethod
+    def get_sync_state(db: Session, device_id: str) -> dict:
+        """
+        Marca de agua y contadores de sincronización de un tablet.
+
+        Raises:
+            ValueError: Si el dispositivo no existe
+        """
+        row = (
+            db.execute(
+                select(
+                    Device.device_id,
+                    Device.high_water_mark,
+                    Device.acknowledged_total,
+                    Device.last_sync_at,
+                ).where(Device.device_id == device_id)
+            )
+            .mappings()
+            .first()
+        )
+        if row is None:
+            raise ValueError(f"No existe el dispositivo {device_id}")
+        return dict(row)
@@ -0,0 +1,213 @@
+"""
+Auditoría de identidades duplicadas en todo el padrón.
+
+Compara todos los embeddings contra todos (multiplicación por bloques,
+sin la matriz N x N) y guarda los pares sobre el umbral en la tabla
+duplicate_candidates y/o en un CSV. Se corre desde la línea de comandos
+(python -m app.cli audit-duplicates) o como tarea en segundo plano
+(POST /api/v1/faces/audit/duplicates). El estado de cada corrida
+(running, done, failed) queda en duplicate_audits.
+"""
+
+import csv
+import logging
+import uuid as uuid_lib
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.ml.duplicates import find_duplicate_pairs
+from app.ml.embeddings import decode_embeddings, l2_normalize
+from app.models.duplicate_audit import DuplicateAudit
+from app.models.duplicate_candidate import DuplicateCandidate
+from app.services.face_service import FaceService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_CSV_COLUMNS = [
+    "worker_id",
+    "worker_uuid",
+    "duplicate_worker_id",
+    "duplicate_worker_uuid",
+    "similarity",
+]
+
+
+class DuplicateAuditService:
+    """Servicio para la auditoría de duplicados"""
+
+    @staticmethod
+    def run(
+        db: Session,
+        threshold: Optional[float] = None,
+        workers: int = 1,
+        csv_path: Optional[str] = None,
+        save: bool = True,
+        audit_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Busca pares de trabajadores con rostros casi iguales.
+
+        Args:
+            threshold: Similitud mínima (default FACE_DUPLICATE_THRESHOLD)
+            workers: Procesos para repartir los bloques (1 = este proceso)
+            csv_path: Si se indica, también escribe los pares en ese CSV
+            save: Guardar los pares en duplicate_candidates y el estado de
+                la corrida en duplicate_audits
+            audit_id: ID de la corrida (se genera si no viene)
+
+        Returns:
+            {"audit_id", "workers", "pairs", "threshold"}
+        """
+        if threshold is None:
+            threshold = settings.FACE_DUPLICATE_THRESHOLD
+        audit_id = audit_id or str(uuid_lib.uuid4())
+
+        audit = None
+        if save:
+            # La corrida queda visible como running mientras compara
+            audit = DuplicateAudit(id=audit_id, status="running", threshold=threshold)
+            db.add(audit)
+            db.commit()
+        try:
+            return DuplicateAuditService._run(
+                db, audit_id, threshold, workers, csv_path, audit
+            )
+        except Exception as e:
+            if audit is not None:
+                db.rollback()
+                audit.status = "failed"
+                audit.error = f"{type(e).__name__}: {e}"[:1000]
+                audit.finished_at = datetime.now(timezone.utc)
+                db.commit()
+            raise
+
+    @staticmethod
+    def _run(
+        db: Session,
+        audit_id: str,
+        threshold: float,
+        workers: int,
+        csv_path: Optional[str],
+        audit: Optional[DuplicateAudit],
+    ) -> dict:
+        """La auditoría en sí; con audit, guarda los pares y la cierra como done"""
+        rows = FaceService.load_rows(db)
+        ids = [r[0] for r in rows]
+        uuids = [r[1] for r in rows]
+        matrix = l2_normalize(decode_embeddings([r[3] for r in rows]))
+        logger.info("Auditoría %s: %d trabajadores", audit_id, len(rows))
+
+        with open(csv_path, "w", newline="") if csv_path else nullcontext() as csv_file:
+            writer = csv.DictWriter(csv_file, _CSV_COLUMNS) if csv_file else None
+            if writer:
+                writer.writeheader()
+
+            total = 0
+            for rows_i, rows_j, scores in find_duplicate_pairs(
+                matrix, threshold, settings.FACE_AUDIT_BLOCK_SIZE, workers
+            ):
+                pairs = [
+                    {
+                        "worker_id": ids[i],
+                        "worker_uuid": uuids[i],
+                        "duplicate_worker_id": ids[j],
+                        "duplicate_worker_uuid": uuids[j],
+                        "similarity": score,
+                    }
+                    for i, j, score in zip(
+                        rows_i.tolist(), rows_j.tolist(), scores.tolist()
+                    )
+                ]
+                if not pairs:
+                    continue
+                if audit is not None:
+                    db.execute(
+                        insert(DuplicateCandidate),
+                        [{"audit_id": audit_id, **pair} for pair in pairs],
+                    )
+                if writer:
+                    writer.writerows(pairs)
+                total += len(pairs)
+            if audit is not None:
+                # Los pares y el fin de la corrida en la misma transacción
+                audit.status = "done"
+                audit.workers = len(rows)
+                audit.pairs = total
+                audit.finished_at = datetime.now(timezone.utc)
+                db.commit()
+
+        logger.info("Auditoría %s: %d pares sospechosos", audit_id, total)
+        return {
+            "audit_id": audit_id,
+            "workers": len(rows),
+            "pairs": total,
+            "threshold": threshold,
+        }
+
+    @staticmethod
+    def run_in_background(audit_id: str, threshold: Optional[float], workers: int):
+        """
+        Corre la auditoría con su propia sesión (tarea en segundo plano).
+        Un error queda en duplicate_audits (status failed).
+        """
+        try:
+            with SessionLocal() as db:
+                DuplicateAuditService.run(
+                    db, threshold=threshold, workers=workers, audit_id=audit_id
+                )
+        except Exception:
+            logger.exception("Error en la auditoría de duplicados %s", audit_id)
+
+    @staticmethod
+    def get_candidates(
+        db: Session, audit_id: Optional[str] = None, limit: int = 100
+    ) -> dict:
+        """
+        Estado y pares encontrados por una auditoría (la última si no se
+        indica), de mayor a menor similitud.
+
+        Returns:
+            {"audit_id", "status", "threshold", "workers", "pairs", "error",
+            "started_at", "finished_at", "candidates": [...]}; sin
+            auditorías, todo en None y sin candidatos
+
+        Raises:
+            ValueError: Si no existe la auditoría indicada
+        """
+        if audit_id is None:
+            audit = db.scalars(
+                select(DuplicateAudit)
+                .order_by(DuplicateAudit.started_at.desc())
+                .limit(1)
+            ).first()
+            if audit is None:
+                return {"audit_id": None, "candidates": []}
+        else:
+            audit = db.get(DuplicateAudit, audit_id)
+            if audit is None:
+                raise ValueError(f"Auditoría {audit_id} no encontrada")
+
+        candidates = db.scalars(
+            select(DuplicateCandidate)
+            .where(DuplicateCandidate.audit_id == audit.id)
+            .order_by(DuplicateCandidate.similarity.desc())
+            .limit(limit)
+        ).all()
+        return {
+            "audit_id": audit.id,
+            "status": audit.status,
+            "threshold": audit.threshold,
+            "workers": audit.workers,
+            "pairs": audit.pairs,
+            "error": audit.error,
+            "started_at": audit.started_at,
+            "finished_at": audit.finished_at,
+            "candidates": candidates,
+        }
@@ -0,0 +1,172 @@
+"""
+Servicio de inferencia de embeddings en el servidor (micro-batching).
+
+Los tablets viejos que no pueden correr MobileFaceNet suben el recorte
+del rostro y el servidor calcula el embedding. Las imágenes de requests
+concurrentes se juntan en micro-batches: un batch sale cuando llega a
+FACE_INFERENCE_MAX_BATCH imágenes o cuando la primera lleva
+FACE_INFERENCE_MAX_DELAY_MS esperando, lo que pase primero. Cada batch
+va a un pool de procesos con un intérprete TFLite cada uno.
+
+Cada worker de uvicorn arma su propio pool: por defecto se usan
+min(núcleos, DEFAULT_MAX_WORKERS) procesos, para que varios workers de
+uvicorn no lancen núcleos x workers intérpretes (cada uno con el modelo
+en memoria). FACE_INFERENCE_WORKERS fija la cantidad exacta. Los
+procesos se crean con spawn: un fork copiaría los threads y locks del
+servidor en un estado inconsistente.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.ml.inference import embed_batch, init_worker
+
+logger = logging.getLogger(__name__)
+
+# Procesos por defecto (sin FACE_INFERENCE_WORKERS), como máximo
+DEFAULT_MAX_WORKERS = 4
+
+
+class EmbeddingService:
+    """Micro-batcher asyncio delante de un pool de intérpretes TFLite"""
+
+    def __init__(
+        self,
+        model_path: str,
+        workers: Optional[int] = None,
+        max_batch: int = 32,
+        max_delay_ms: float = 10.0,
+    ):
+        self.model_path = model_path
+        self.workers = workers or min(os.cpu_count() or 1, DEFAULT_MAX_WORKERS)
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        # Batches en vuelo: hasta 2 por proceso; mientras esperan un lugar,
+        # los pedidos nuevos se acumulan y el batch siguiente sale más grande
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.batches_total = 0
+        self.images_total = 0
+
+    def start(self) -> None:
+        """Arranca el pool de procesos (cada uno carga el modelo)"""
+        if self._pool is not None:
+            return
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"No existe el modelo: {self.model_path}")
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(self.model_path,),
+        )
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(2 * self.workers)
+        self._collector = asyncio.get_running_loop().create_task(self._collect())
+        logger.info("Inferencia: %d procesos, modelo %s", self.workers, self.model_path)
+
+    async def stop(self) -> None:
+        """Detiene el colector y el pool"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    async def embed(self, image: bytes) -> np.ndarray:
+        """
+        Embedding (128,) de una imagen JPEG/PNG del rostro.
+
+        Raises:
+            ValueError: Si la imagen no se puede decodificar
+            RuntimeError: Si el servicio no está iniciado
+        """
+        if not self.running:
+            raise RuntimeError("El servicio de inferencia no está iniciado")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((image, future))
+        result = await future
+        if isinstance(result, str):
+            raise ValueError(result)
+        return result
+
+    async def _collect(self) -> None:
+        """Arma micro-batches: hasta max_batch imágenes o max_delay de espera"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            await self._slots.acquire()
+            # Sin esperar el resultado: el próximo batch se arma mientras este corre
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: list) -> None:
+        """Manda un batch al pool y resuelve el future de cada imagen"""
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._pool, embed_batch, [image for image, _ in batch]
+            )
+        except Exception as e:
+            logger.exception("Error de inferencia en un batch de %d", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Error de inferencia: {e}"))
+            return
+        finally:
+            self._slots.release()
+
+        self.batches_total += 1
+        self.images_total += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Procesos, cola y tamaño promedio de los batches"""
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches_total": self.batches_total,
+            "images_total": self.images_total,
+            "avg_batch_size": round(self.images_total / max(self.batches_total, 1), 2),
+        }
+
+
+@lru_cache()
+def get_embedding_service() -> EmbeddingService:
+    """Devuelve la instancia única del servicio de inferencia"""
+    settings = get_settings()
+    return EmbeddingService(
+        settings.FACE_MODEL_PATH,
+        workers=settings.FACE_INFERENCE_WORKERS,
+        max_batch=settings.FACE_INFERENCE_MAX_BATCH,
+        max_delay_ms=settings.FACE_INFERENCE_MAX_DELAY_MS,
+    )
@@ -0,0 +1,69 @@
+"""
+Fachada de los servicios de base de datos para las rutas.
+
+Las rutas no preguntan por DB_ASYNC: llaman a AttendanceFacade y
+WorkerFacade, que al importar quedan apuntando a la versión async
+(AsyncAttendanceService, AsyncWorkerService) o a la sync, que corre en
+el threadpool para no bloquear el event loop (ver run_db).
+
+    page = await WorkerFacade.get_all_workers(db, cursor, limit)
+"""
+
+from app.core.config import get_settings
+from app.db.database import run_db
+from app.services.attendance_service import AttendanceService
+from app.services.async_attendance_service import AsyncAttendanceService
+from app.services.worker_service import WorkerService
+from app.services.async_worker_service import AsyncWorkerService
+
+settings = get_settings()
+
+
+def _dispatch(sync_method, async_method):
+    """Método de la fachada: el async tal cual, o el sync vía run_db"""
+    if settings.DB_ASYNC:
+        return staticmethod(async_method)
+
+    async def method(db, *args):
+        return await run_db(db, sync_method, *args)
+
+    method.__doc__ = sync_method.__doc__
+    return staticmethod(method)
+
+
+class AttendanceFacade:
+    """AttendanceService o AsyncAttendanceService, según DB_ASYNC"""
+
+    checkin = _dispatch(AttendanceService.checkin, AsyncAttendanceService.checkin)
+    create_attendance_batch = _dispatch(
+        AttendanceService.create_attendance_batch,
+        AsyncAttendanceService.create_attendance_batch,
+    )
+    get_worker_attendance = _dispatch(
+        AttendanceService.get_worker_attendance,
+        AsyncAttendanceService.get_worker_attendance,
+    )
+
+
+class WorkerFacade:
+    """WorkerService o AsyncWorkerService, según DB_ASYNC"""
+
+    create_worker = _dispatch(
+        WorkerService.create_worker, AsyncWorkerService.create_worker
+    )
+    update_worker = _dispatch(
+        WorkerService.update_worker, AsyncWorkerService.update_worker
+    )
+    delete_worker = _dispatch(
+        WorkerService.delete_worker, AsyncWorkerService.delete_worker
+    )
+    get_changes = _dispatch(WorkerService.get_changes, AsyncWorkerService.get_changes)
+    get_worker_by_uuid = _dispatch(
+        WorkerService.get_worker_by_uuid, AsyncWorkerService.get_worker_by_uuid
+    )
+    get_all_workers = _dispatch(
+        WorkerService.get_all_workers, AsyncWorkerService.get_all_workers
+    )
+    resolve_worker = _dispatch(
+        WorkerService.resolve_worker, AsyncWorkerService.resolve_worker
+    )
@@ -0,0 +1,599 @@
+"""
+Servicio de reconocimiento facial del lado del servidor.
+
+Mantiene en memoria una galería con los embeddings de todos los
+trabajadores (matriz float32 normalizada) y la usa para identificar
+rostros 1:N. La galería se construye una vez; cuando cambia la versión
+del padrón (roster_version) cada proceso trae solo los cambios que no vio
+(/workers/changes desde su último cursor) y los aplica en memoria.
+
+La galería es una base inmutable + un delta incremental. La base sale de
+la BD o, con FACE_SNAPSHOT_PATH, de un snapshot en disco mapeado con
+np.memmap (compartido por todos los procesos). Cuando el delta crece se
+compacta en segundo plano.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.ml.embeddings import (
+    EMBEDDING_BYTES,
+    as_query_matrix,
+    decode_embedding,
+    decode_embeddings,
+    l2_normalize,
+)
+from app.ml.gallery import FaceGallery, LayeredGallery, merge_layers
+from app.ml.ivf_index import IVFIndex
+from app.ml.snapshot import GallerySnapshot, write_snapshot
+from app.models.worker import Worker
+from app.models.worker_template import WorkerTemplate
+from app.services.worker_service import WorkerService, _roster_version_statement
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _enrolled_embeddings_statement(uuids: Iterable[str]):
+    """SELECT uuid, id, face_embedding de los activos con uuid IN (...)"""
+    return select(Worker.uuid, Worker.id, Worker.face_embedding).where(
+        Worker.uuid.in_(uuids), Worker.deleted_at.is_(None)
+    )
+
+
+def _templates_statement(worker_ids: Iterable[int]):
+    """SELECT worker_id, embedding FROM worker_templates WHERE worker_id IN (...)"""
+    return select(WorkerTemplate.worker_id, WorkerTemplate.embedding).where(
+        WorkerTemplate.worker_id.in_(worker_ids)
+    )
+
+
+class _GalleryState:
+    """
+    Galería vigente de este proceso.
+
+    - version: versión del padrón (roster_version) ya aplicada
+    - cursor: cursor de /workers/changes del último cambio aplicado
+    - snapshot: snapshot mapeado que hace de base (si hay)
+
+    lock protege los campos y se toma por poco tiempo. load_lock es para
+    quien lee de la BD para actualizar la galería (carga, cambios,
+    compactación): uno a la vez, sin frenar las búsquedas.
+    """
+
+    def __init__(self):
+        self.gallery: Optional[LayeredGallery] = None
+        self.version: Optional[int] = None
+        self.cursor: Optional[str] = None
+        self.snapshot: Optional[GallerySnapshot] = None
+        self.compacting = False
+        self.compacted_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+
+_state = _GalleryState()
+
+
+def _pending_update(version: Optional[int]) -> Optional[str]:
+    """
+    Qué le falta a la galería vigente para llegar a version (con
+    _state.lock tomado): "open" (armarla entera), "pull" (traer los
+    cambios) o None.
+    """
+    if _state.gallery is None or (
+        _state.version != version
+        and _state.snapshot is not None
+        and not _state.snapshot.is_current()
+    ):
+        return "open"
+    if _state.version != version:
+        return "pull"
+    return None
+
+
+class FaceService:
+    """Servicio para identificación facial"""
+
+    @staticmethod
+    def valid_rows(rows) -> list:
+        """
+        Filas (id, uuid, name, face_embedding) con embedding de tamaño válido.
+        Las inválidas se descartan (con aviso).
+        """
+        rows = list(rows)
+        valid = [r for r in rows if len(r[3]) == EMBEDDING_BYTES]
+        if len(valid) < len(rows):
+            logger.warning(
+                "Galería: %d trabajadores con embedding inválido",
+                len(rows) - len(valid),
+            )
+        return valid
+
+    @staticmethod
+    def load_rows(db: Session) -> list:
+        """Lee (id, uuid, name, face_embedding) de todos los trabajadores activos"""
+        # Orden por id: las filas de la galería (y de un índice guardado) son estables
+        query = select(
+            Worker.id, Worker.uuid, Worker.name, Worker.face_embedding
+        ).where(Worker.deleted_at.is_(None))
+        return FaceService.valid_rows(db.execute(query.order_by(Worker.id)).all())
+
+    @staticmethod
+    def load_gallery(db: Session) -> FaceGallery:
+        """Lee todos los embeddings de la BD y arma la galería"""
+        return FaceGallery.from_rows(
+            FaceService.load_rows(db),
+            storage=settings.FACE_GALLERY_STORAGE,
+            rescore_candidates=settings.FACE_RESCORE_CANDIDATES,
+        )
+
+    @staticmethod
+    def write_snapshot(db: Session, path: str) -> GallerySnapshot:
+        """
+        Vuelca la galería completa de la BD a un snapshot en disco.
+
+        El cursor de cambios se lee ANTES que las filas: lo que cambie
+        mientras tanto vuelve a aparecer en el delta (repetirlo no hace daño,
+        perderlo sí).
+        """
+        cursor = WorkerService.get_changes_cursor(db)
+        version = db.execute(_roster_version_statement()).scalar() or 0
+        rows = FaceService.load_rows(db)
+        # float16 en disco: cada proceso mapea la matriz sin copiarla
+        dtype = "float16" if settings.FACE_GALLERY_STORAGE == "float16" else "float32"
+        write_snapshot(
+            path,
+            ids=[r[0] for r in rows],
+            uuids=[r[1] for r in rows],
+            names=[r[2] for r in rows],
+            matrix=decode_embeddings([r[3] for r in rows]),
+            version=version,
+            cursor=cursor,
+            dtype=dtype,
+        )
+        logger.info("Snapshot de galería escrito: %s (%d filas)", path, len(rows))
+        return GallerySnapshot(path)
+
+    @staticmethod
+    def pull_changes(
+        db: Session, gallery: LayeredGallery, since: Optional[str]
+    ) -> Optional[str]:
+        """
+        Aplica a la galería los cambios del padrón posteriores a since:
+        solo lo que este proceso no vio, no la galería entera.
+
+        Returns:
+            Cursor del último cambio aplicado
+        """
+        while True:
+            changes = WorkerService.get_changes(db, since=since, limit=1000)
+            for worker in changes["changes"]:
+                if worker.deleted_at is not None:
+                    gallery.remove(worker.id)
+                elif len(worker.face_embedding) == EMBEDDING_BYTES:
+                    gallery.upsert(
+                        worker.id,
+                        worker.uuid,
+                        worker.name,
+                        decode_embedding(worker.face_embedding),
+                    )
+                else:
+                    logger.warning("Galería: embedding inválido (worker %d)", worker.id)
+                    gallery.remove(worker.id)
+            since = changes["next_cursor"]
+            if not changes["has_more"]:
+                return since
+
+    @staticmethod
+    def open_gallery(
+        db: Session, version: Optional[int], wait_index: bool = False
+    ) -> Tuple[LayeredGallery, Optional[str], Optional[GallerySnapshot]]:
+        """
+        Arma la galería desde cero: base desde el snapshot (si existe
+        FACE_SNAPSHOT_PATH) o desde la BD, más los cambios posteriores.
+        wait_index: ver attach_index.
+
+        Returns:
+            (galería, cursor del último cambio aplicado, snapshot o None)
+        """
+        path = settings.FACE_SNAPSHOT_PATH
+        if path and os.path.exists(path):
+            snapshot = GallerySnapshot(path)
+            base = FaceGallery(
+                snapshot.ids,
+                snapshot.uuids,
+                snapshot.names,
+                snapshot.matrix,
+                storage=settings.FACE_GALLERY_STORAGE,
+                rescore_candidates=settings.FACE_RESCORE_CANDIDATES,
+                normalized=True,
+            )
+            FaceService.attach_index(base, snapshot.version, wait_index)
+            cursor = snapshot.cursor
+        else:
+            snapshot = None
+            # Cursor antes que las filas: un cambio concurrente se repite, no se pierde
+            cursor = WorkerService.get_changes_cursor(db)
+            base = FaceService.load_gallery(db)
+            FaceService.attach_index(base, version, wait_index)
+
+        gallery = LayeredGallery(base)
+        cursor = FaceService.pull_changes(db, gallery, cursor)
+        return gallery, cursor, snapshot
+
+    @staticmethod
+    def compaction_due(gallery: LayeredGallery) -> bool:
+        """Delta grande, o con cambios y ya pasó el intervalo de compactación"""
+        pending = gallery.pending()
+        elapsed = time.monotonic() - _state.compacted_at
+        return pending >= settings.FACE_GALLERY_MAX_DELTA or (
+            pending > 0 and elapsed >= settings.FACE_GALLERY_COMPACT_INTERVAL_SECONDS
+        )
+
+    @staticmethod
+    def compact() -> None:
+        """
+        Compacta la galería en segundo plano: base + delta -> nueva base.
+
+        Con snapshot, regenera el archivo (un solo proceso a la vez, con un
+        lock de archivo) y lo vuelve a abrir. Sin snapshot, fusiona base y
+        delta en memoria. En ambos casos los cambios que llegaron mientras
+        tanto se aplican con pull_changes antes de publicar la galería nueva.
+        """
+        try:
+            path = settings.FACE_SNAPSHOT_PATH
+            with SessionLocal() as db:
+                if path:
+                    with open(f"{path}.lock", "w") as lock_file:
+                        try:
+                            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            return  # Otro proceso ya lo está regenerando
+                        FaceService.write_snapshot(db, path)
+                    gallery, cursor, snapshot = FaceService.open_gallery(
+                        db, None, wait_index=True
+                    )
+                else:
+                    # load_lock: nadie aplica cambios mientras se toman las partes
+                    with _state.load_lock, _state.lock:
+                        current, cursor = _state.gallery, _state.cursor
+                        # La base fusionada es exactamente el padrón de esta versión
+                        version = _state.version
+                        masked_rows = current.masked_rows
+                        delta_parts = current.delta.live_parts()
+                    ids, uuids, names, matrix = merge_layers(
+                        current.base, masked_rows, delta_parts
+                    )
+                    base = FaceGallery(
+                        ids,
+                        uuids,
+                        names,
+                        matrix,
+                        storage=settings.FACE_GALLERY_STORAGE,
+                        rescore_candidates=settings.FACE_RESCORE_CANDIDATES,
+                        normalized=True,
+                    )
+                    FaceService.attach_index(base, version, wait=True)
+                    gallery, snapshot = LayeredGallery(base), None
+
+                # Los cambios de mientras tanto se leen sin frenar búsquedas
+                with _state.load_lock:
+                    cursor = FaceService.pull_changes(db, gallery, cursor)
+                    with _state.lock:
+                        _state.gallery, _state.cursor = gallery, cursor
+                        _state.snapshot = snapshot
+                logger.info("Galería compactada: %d trabajadores", len(gallery))
+        except Exception:
+            logger.exception("Error compactando la galería")
+        finally:
+            with _state.lock:
+                _state.compacting = False
+                _state.compacted_at = time.monotonic()
+
+    @staticmethod
+    def attach_index(
+        gallery: FaceGallery, version: Optional[int], wait: bool = False
+    ) -> None:
+        """
+        Si la galería es grande, le agrega un índice IVF.
+
+        Si FACE_ANN_INDEX_PATH existe y se armó con la misma versión del
+        padrón y el mismo tamaño, se carga de disco en vez de reentrenar.
+        Con version None el índice no se lee ni se guarda.
+
+        Entrenar tarda: salvo con wait=True (la compactación, que ya corre
+        en segundo plano) se hace en un hilo aparte, fuera del request y
+        de _state.lock. Mientras tanto la galería busca de forma exacta.
+        """
+        if len(gallery) < settings.FACE_ANN_MIN_GALLERY:
+            return
+
+        path = settings.FACE_ANN_INDEX_PATH if version is not None else None
+        if path and os.path.exists(path):
+            try:
+                index, metadata = IVFIndex.load(path)
+            except Exception:
+                logger.exception("No se pudo leer el índice IVF de %s", path)
+            else:
+                if metadata.get("version") == version and len(index) == len(gallery):
+                    index.nprobe = settings.FACE_ANN_NPROBE
+                    gallery.index = index
+                    logger.info("Índice IVF cargado de %s", path)
+                    return
+
+        if wait:
+            FaceService.build_index(gallery, path, version)
+        else:
+            threading.Thread(
+                target=FaceService.build_index,
+                args=(gallery, path, version),
+                name="ivf-build",
+                daemon=True,
+            ).start()
+
+    @staticmethod
+    def build_index(
+        gallery: FaceGallery, path: Optional[str], version: Optional[int]
+    ) -> None:
+        """Entrena el índice IVF de la galería y, si hay path, lo guarda"""
+        try:
+            index = IVFIndex.build(
+                gallery.matrix, settings.FACE_ANN_N_LISTS, settings.FACE_ANN_NPROBE
+            )
+            # Se publica entero: una búsqueda en curso sigue siendo exacta
+            gallery.index = index
+            logger.info("Índice IVF construido: %d clusters", index.n_lists)
+            if path:
+                index.save(path, version=version)
+        except Exception:
+            logger.exception("Error construyendo el índice IVF")
+
+    @staticmethod
+    def _update_gallery(db: Session, version: Optional[int]) -> None:
+        """Lleva la galería a version (con _state.load_lock tomado)"""
+        # Otro request pudo actualizarla mientras se esperaba el lock
+        with _state.lock:
+            update = _pending_update(version)
+            gallery, cursor = _state.gallery, _state.cursor
+        if update == "open":
+            gallery, cursor, snapshot = FaceService.open_gallery(db, version)
+            logger.info("Galería cargada: %d trabajadores", len(gallery))
+            with _state.lock:
+                _state.gallery, _state.snapshot = gallery, snapshot
+                _state.cursor, _state.version = cursor, version
+        elif update == "pull":
+            # Las búsquedas en curso toleran los cambios (ver LayeredGallery)
+            cursor = FaceService.pull_changes(db, gallery, cursor)
+            with _state.lock:
+                _state.cursor, _state.version = cursor, version
+
+    @staticmethod
+    def get_gallery(db: Session) -> LayeredGallery:
+        """
+        Devuelve la galería en memoria.
+
+        La primera vez (o si otro proceso reemplazó el snapshot) la arma
+        entera. Si solo cambió la versión del padrón, aplica los cambios
+        desde el último cursor. Cuando el delta crece, agenda una
+        compactación en segundo plano.
+
+        La BD se lee sin _state.lock (con load_lock): mientras un request
+        carga o trae cambios, los demás siguen buscando en la galería
+        vigente (solo esperan si todavía no hay ninguna). Lo nuevo se
+        publica con _state.lock, como en compact().
+        """
+        version = WorkerService.refresh_roster_version(db)
+        with _state.lock:
+            update = _pending_update(version)
+            loaded = _state.gallery is not None
+        # Si otro request ya la está actualizando, se usa la vigente
+        if update is not None and _state.load_lock.acquire(blocking=not loaded):
+            try:
+                FaceService._update_gallery(db, version)
+            finally:
+                _state.load_lock.release()
+
+        with _state.lock:
+            if not _state.compacting and FaceService.compaction_due(_state.gallery):
+                _state.compacting = True
+                threading.Thread(
+                    target=FaceService.compact, name="gallery-compaction", daemon=True
+                ).start()
+            return _state.gallery
+
+    @staticmethod
+    def load_templates(db: Session, worker_ids: Iterable[int]) -> Dict[int, np.ndarray]:
+        """
+        Templates de varios trabajadores en una sola consulta.
+
+        Returns:
+            worker_id -> matriz normalizada (t, 128). Los trabajadores sin
+            templates (enrolados con un solo embedding) no aparecen.
+        """
+        worker_ids = set(worker_ids)
+        if not worker_ids:
+            return {}
+        grouped: Dict[int, list] = {}
+        for worker_id, raw in db.execute(_templates_statement(worker_ids)):
+            if len(raw) == EMBEDDING_BYTES:
+                grouped.setdefault(worker_id, []).append(raw)
+        return {
+            worker_id: l2_normalize(decode_embeddings(raws))
+            for worker_id, raws in grouped.items()
+        }
+
+    @staticmethod
+    def identify(db: Session, embeddings: List[List[float]], top_k: int = 5) -> list:
+        """
+        Identifica uno o varios rostros contra toda la galería.
+
+        Dos pasadas:
+        1. Centroides: un producto matriz-matriz contra toda la galería
+           elige FACE_TEMPLATE_CANDIDATES candidatos por rostro.
+        2. Templates: solo para esos candidatos, la similitud final es la
+           máxima contra sus templates (o la del centroide si no tienen).
+
+        Returns:
+            Una lista de coincidencias por embedding, de mayor a menor:
+            [[{"worker_id", "worker_uuid", "name", "similarity"}, ...], ...]
+        """
+        gallery = FaceService.get_gallery(db)
+        queries = as_query_matrix(embeddings)
+        candidates_k = max(top_k, settings.FACE_TEMPLATE_CANDIDATES)
+        indices, scores = gallery.search_batch(queries, candidates_k)
+        candidates = [
+            [
+                {**gallery.describe(row), "similarity": score}
+                for row, score in zip(row_indices.tolist(), row_scores.tolist())
+                if row >= 0
+            ]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+        if settings.FACE_TEMPLATE_CANDIDATES <= 0:
+            return [matches[:top_k] for matches in candidates]
+
+        templates = FaceService.load_templates(
+            db, (m["worker_id"] for matches in candidates for m in matches)
+        )
+        results = []
+        for query, matches in zip(queries, candidates):
+            for match in matches:
+                worker_templates = templates.get(match["worker_id"])
+                if worker_templates is not None:
+                    match["similarity"] = float((worker_templates @ query).max())
+            matches.sort(key=lambda m: m["similarity"], reverse=True)
+            results.append(matches[:top_k])
+        return results
+
+    @staticmethod
+    def find_duplicate(
+        db: Session, face_embedding: bytes, exclude_uuid: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Busca en la galería (matriz normalizada ya en memoria) un trabajador
+        con un rostro casi igual, para no enrolar dos veces a la misma persona.
+
+        Args:
+            exclude_uuid: Trabajador que no cuenta como duplicado (el mismo
+                que se está registrando)
+
+        Returns:
+            {"worker_id", "worker_uuid", "name", "similarity"} del más
+            parecido si supera FACE_DUPLICATE_THRESHOLD, o None
+        """
+        if len(face_embedding) != EMBEDDING_BYTES:
+            return None
+        gallery = FaceService.get_gallery(db)
+        # Con exclude_uuid se pide uno más, por si el primero es él mismo
+        rows, scores = gallery.search_batch(
+            decode_embedding(face_embedding), 2 if exclude_uuid else 1
+        )
+        for row, similarity in zip(rows[0].tolist(), scores[0].tolist()):
+            if row < 0 or similarity < settings.FACE_DUPLICATE_THRESHOLD:
+                return None
+            match = gallery.describe(row)
+            if match["worker_uuid"] != exclude_uuid:
+                return {**match, "similarity": similarity}
+        return None
+
+    @staticmethod
+    def check_enrollment(
+        db: Session, face_embedding: bytes, worker_uuid: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Control de duplicados al registrar según FACE_DUPLICATE_POLICY:
+        - off: no busca
+        - flag: devuelve la coincidencia (el registro sigue)
+        - reject: rechaza el registro
+
+        Un rostro enrolado con el mismo worker_uuid no es duplicado.
+
+        Raises:
+            ValueError: Con policy reject, si el rostro ya está enrolado
+        """
+        if settings.FACE_DUPLICATE_POLICY == "off":
+            return None
+        duplicate = FaceService.find_duplicate(db, face_embedding, worker_uuid)
+        if duplicate is None:
+            return None
+        logger.warning(
+            "Registro con rostro ya enrolado: %s (similitud %.3f)",
+            duplicate["worker_uuid"],
+            duplicate["similarity"],
+        )
+        if settings.FACE_DUPLICATE_POLICY == "reject":
+            raise ValueError(
+                f"El rostro ya está registrado como {duplicate['worker_uuid']} "
+                f"(similitud {duplicate['similarity']:.2f})"
+            )
+        return duplicate
+
+    @staticmethod
+    def verify(
+        db: Session,
+        pairs: Sequence[Tuple[str, List[float]]],
+        threshold: Optional[float] = None,
+    ) -> list:
+        """
+        Verificación 1:1 de muchos pares (worker_uuid, embedding).
+
+        Una sola consulta trae los embeddings enrolados de todos los
+        trabajadores del batch; las similitudes salen de un solo producto
+        punto fila a fila. Si el trabajador tiene templates, cuenta el
+        más parecido.
+
+        Returns:
+            Un resultado por par, en el mismo orden:
+            [{"worker_uuid", "worker_id", "similarity", "verified"}, ...]
+        """
+        if threshold is None:
+            threshold = settings.FACE_VERIFY_THRESHOLD
+        uuids = [worker_uuid for worker_uuid, _ in pairs]
+        rows = db.execute(_enrolled_embeddings_statement(set(uuids))).all()
+        enrolled = {
+            worker_uuid: (worker_id, raw)
+            for worker_uuid, worker_id, raw in rows
+            if len(raw) == EMBEDDING_BYTES
+        }
+
+        results = [
+            {"worker_uuid": u, "worker_id": None, "similarity": None, "verified": False}
+            for u in uuids
+        ]
+        known = [i for i, worker_uuid in enumerate(uuids) if worker_uuid in enrolled]
+        if not known:
+            return results
+
+        probes = as_query_matrix([pairs[i][1] for i in known])
+        references = l2_normalize(
+            decode_embeddings([enrolled[uuids[i]][1] for i in known])
+        )
+        scores = np.einsum("ij,ij->i", probes, references)
+
+        # Con varios templates vale el más parecido (una consulta más)
+        templates = FaceService.load_templates(
+            db, (enrolled[uuids[i]][0] for i in known)
+        )
+        for position, i in enumerate(known):
+            worker_templates = templates.get(enrolled[uuids[i]][0])
+            if worker_templates is not None:
+                scores[position] = (worker_templates @ probes[position]).max()
+
+        for i, score in zip(known, scores.tolist()):
+            results[i].update(
+                worker_id=enrolled[uuids[i]][0],
+                similarity=score,
+                verified=score >= threshold,
+            )
+        return results
@@ -0,0 +1,247 @@
+"""
+Exportación binaria de la galería para los tablets.
+
+Los tablets que identifican rostros en el dispositivo necesitan el
+embedding de todos los trabajadores. En vez de N requests JSON, bajan un
+solo archivo binario, que se lee de corrido:
+
+    header (32 bytes, little endian):
+        magic      8s   b"WKGALLRY"
+        count      u32  cantidad de trabajadores
+        dim        u32  128
+        dtype      u32  1 = float32, 2 = float16
+        uuid_bytes u32  largo del bloque de uuids
+        version    i64  versión del padrón (roster_version)
+    ids           int64 (count,)
+    uuid_offsets  uint32 (count + 1,)   uuid i = uuids[off[i]:off[i+1]]
+    uuids         UTF-8 concatenados, con relleno hasta múltiplo de 8
+    matrix        float32/float16 (count, 128), filas normalizadas
+
+El archivo depende solo de (versión del padrón, dtype, site): eso es el
+ETag, y los últimos archivos armados quedan en memoria para servir
+reintentos con Range sin volver a leer la BD. Se guardan las secciones
+sin concatenar y se mandan de a EXPORT_CHUNK_BYTES (StreamingResponse):
+ni el armado ni la respuesta copian el archivo entero.
+"""
+
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.ml.embeddings import (
+    EMBEDDING_BYTES,
+    EMBEDDING_DIM,
+    decode_embeddings,
+    l2_normalize,
+)
+from app.models.worker import Worker
+from app.services.worker_service import _roster_version_statement
+
+settings = get_settings()
+
+MAGIC = b"WKGALLRY"
+_HEADER = struct.Struct("<8sIIIIq")
+DTYPES = {"float32": (1, "<f4"), "float16": (2, "<f2")}
+# Trabajadores leídos de la BD por tanda (cursor del lado del servidor)
+EXPORT_FETCH_ROWS = 5000
+# Tamaño de cada pedazo de la respuesta
+EXPORT_CHUNK_BYTES = 256 * 1024
+
+
+class RangeNotSatisfiableError(ValueError):
+    """El header Range pide bytes fuera del archivo"""
+
+
+class GalleryExport(NamedTuple):
+    """Archivo de galería ya armado, en secciones"""
+
+    etag: str
+    parts: Tuple[memoryview, ...]
+    size: int
+    count: int
+
+    def iter_bytes(
+        self, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[memoryview]:
+        """
+        Bytes [start, end) del archivo de a EXPORT_CHUNK_BYTES, sin copiar.
+
+        Args:
+            end: Fin exclusivo (None = hasta el final)
+        """
+        end = self.size if end is None else end
+        part_start = 0
+        for part in self.parts:
+            part_end = part_start + len(part)
+            # Rango pedido, relativo a la sección
+            lo = max(start, part_start) - part_start
+            hi = min(end, part_end) - part_start
+            for offset in range(lo, hi, EXPORT_CHUNK_BYTES):
+                yield part[offset : min(offset + EXPORT_CHUNK_BYTES, hi)]
+            part_start = part_end
+
+
+class _ExportCache:
+    """Últimos archivos armados, por (versión, dtype, site)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[tuple, GalleryExport]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[GalleryExport]:
+        with self._lock:
+            export = self._items.get(key)
+            if export is not None:
+                self._items.move_to_end(key)
+            return export
+
+    def put(self, key: tuple, export: GalleryExport) -> None:
+        with self._lock:
+            self._items[key] = export
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+_cache = _ExportCache(settings.GALLERY_EXPORT_CACHE_SIZE)
+
+
+def _etag(version: int, dtype: str, site: Optional[str]) -> str:
+    site_tag = hashlib.sha1(site.encode()).hexdigest()[:12] if site else "all"
+    return f'"{version}-{dtype}-{site_tag}"'
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header Range de un solo rango ("bytes=inicio-fin",
+    "bytes=inicio-" o "bytes=-sufijo").
+
+    Returns:
+        (inicio, fin) inclusivos, o None si el header no se entiende o
+        pide varios rangos (se responde el archivo completo)
+
+    Raises:
+        RangeNotSatisfiableError: Si el rango cae fuera del archivo
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first or last) or not (first + last).isdigit():
+        return None
+
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiableError(header)
+        return max(0, size - suffix), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiableError(header)
+    return start, min(end, size - 1)
+
+
+class GalleryExportService:
+    """Armado del archivo binario de la galería"""
+
+    @staticmethod
+    def build_parts(
+        batches: Iterable[Sequence], dtype: str, version: int
+    ) -> Tuple[Tuple[memoryview, ...], int]:
+        """
+        Arma el archivo a partir de tandas de filas (id, uuid,
+        face_embedding). Las filas con embedding de tamaño inválido se
+        omiten. Cada tanda se convierte al dtype pedido apenas llega: no
+        se juntan todas las filas de la BD ni la matriz en float32.
+
+        Returns:
+            (secciones del archivo, cantidad de trabajadores)
+        """
+        dtype_code, numpy_dtype = DTYPES[dtype]
+        ids, uuids, matrices = [], [], []
+        for batch in batches:
+            batch = [r for r in batch if len(r[2]) == EMBEDDING_BYTES]
+            if not batch:
+                continue
+            ids.extend(r[0] for r in batch)
+            uuids.extend(r[1].encode("utf-8") for r in batch)
+            matrix = l2_normalize(decode_embeddings([r[2] for r in batch]))
+            matrices.append(matrix.astype(numpy_dtype))
+
+        offsets = np.zeros(len(uuids) + 1, dtype="<u4")
+        offsets[1:] = np.cumsum([len(u) for u in uuids])
+        uuid_blob = b"".join(uuids)
+        uuid_blob += b"\0" * (-len(uuid_blob) % 8)
+        matrix = (
+            np.concatenate(matrices)
+            if matrices
+            else np.empty((0, EMBEDDING_DIM), dtype=numpy_dtype)
+        )
+
+        header = _HEADER.pack(
+            MAGIC, len(ids), EMBEDDING_DIM, dtype_code, len(uuid_blob), version
+        )
+        parts = (
+            memoryview(header),
+            memoryview(np.array(ids, dtype="<i8").view(np.uint8)),
+            memoryview(offsets.view(np.uint8)),
+            memoryview(uuid_blob),
+            memoryview(matrix.reshape(-1).view(np.uint8)),
+        )
+        return parts, len(ids)
+
+    @staticmethod
+    def export(
+        db: Session, dtype: str = "float32", site: Optional[str] = None
+    ) -> GalleryExport:
+        """
+        Devuelve el archivo de la galería (del caché si el padrón no cambió).
+
+        Args:
+            db: Sesión sin transacción empezada (se abre en REPEATABLE READ)
+            dtype: "float32" o "float16" (mitad de tamaño)
+            site: Solo los trabajadores de ese sitio (None = todos)
+
+        Raises:
+            ValueError: Si dtype es inválido
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype inválido: {dtype} (float32 o float16)")
+
+        # Versión y filas de la misma foto de la BD: en READ COMMITTED un
+        # alta entre las dos consultas quedaría en un archivo con la
+        # versión anterior, y ese ETag serviría después un archivo distinto
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        version = db.execute(_roster_version_statement()).scalar() or 0
+        key = (version, dtype, site)
+        export = _cache.get(key)
+        if export is not None:
+            return export
+
+        query = (
+            select(Worker.id, Worker.uuid, Worker.face_embedding)
+            .where(Worker.deleted_at.is_(None))
+            .order_by(Worker.id)
+        )
+        if site is not None:
+            query = query.where(Worker.site == site)
+        result = db.execute(query.execution_options(yield_per=EXPORT_FETCH_ROWS))
+        parts, count = GalleryExportService.build_parts(
+            result.partitions(), dtype, version
+        )
+
+        export = GalleryExport(
+            _etag(version, dtype, site), parts, sum(len(p) for p in parts), count
+        )
+        _cache.put(key, export)
+        return export
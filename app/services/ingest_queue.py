@@ -0,0 +1,344 @@
+"""
+Cola de ingesta write-behind para checkins.
+
+En el pico de inicio de turno, cada checkin esperaba un commit síncrono
+en PostgreSQL. En modo write-behind (INGEST_WRITE_BEHIND=true):
+
+1. La API agrega el registro validado a un log local durable
+   (SQLite en modo WAL con synchronous=FULL) y responde 202.
+2. Un hilo flusher drena el log hacia la tabla attendance en lotes
+   (un INSERT multi-fila y un commit por lote).
+3. Al reiniciar, lo que quedó en el log se vuelve a enviar. Los
+   reenvíos son seguros: el INSERT es ON CONFLICT (uuid) DO NOTHING.
+
+Del log solo se borra lo que quedó en PostgreSQL (created o duplicate).
+Los registros con trabajador inexistente o con error se reintentan con
+espera exponencial y, tras INGEST_MAX_ATTEMPTS intentos, pasan a la
+tabla dead_letter junto con los payloads que no validan: nada de lo que
+se respondió con 202 se pierde en silencio.
+
+Cada proceso usa su propio archivo: con varios workers de uvicorn el
+primero toma INGEST_QUEUE_PATH, el segundo INGEST_QUEUE_PATH.1, etc.
+(ver _claim_queue_path). Al reiniciar, cada proceso retoma el archivo
+libre de menor número y reenvía lo que quedó en él. Si se reduce la
+cantidad de workers, los archivos de número alto quedan sin dueño hasta
+que vuelva a haber tantos procesos.
+"""
+
+import fcntl
+import logging
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import IO, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.schemas.attendance import AttendanceCreate, RecordStatus
+from app.services.attendance_service import AttendanceService
+
+logger = logging.getLogger(__name__)
+
+# Estados que significan "ya está en PostgreSQL": se pueden borrar del log
+_SETTLED = (RecordStatus.CREATED, RecordStatus.DUPLICATE)
+
+
+def _claim_queue_path(path: str, max_slots: int = 64) -> Tuple[str, IO]:
+    """
+    Reserva un archivo de cola para este proceso.
+
+    Prueba path, path.1, path.2, ... y se queda con el primero cuyo
+    path.lock no tenga otro proceso (flock exclusivo, se libera solo si
+    el proceso muere). Así varios workers de uvicorn con la misma
+    configuración nunca comparten el log.
+
+    Returns:
+        (path reservado, archivo de lock que hay que mantener abierto)
+
+    Raises:
+        RuntimeError: Si todos los archivos están tomados
+    """
+    for slot in range(max_slots):
+        candidate = path if slot == 0 else f"{path}.{slot}"
+        # Queda abierto mientras viva el proceso: es el que sostiene el flock
+        lock_file = open(f"{candidate}.lock", "a")  # noqa: SIM115
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        return candidate, lock_file
+    raise RuntimeError(
+        f"Las {max_slots} colas de ingesta de {path} están en uso por otros procesos"
+    )
+
+
+class IngestQueue:
+    """Log durable local + flusher en background"""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float,
+        batch_size: int,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 1.0,
+    ):
+        # El flock dura lo que dure _lock_file abierto: toda la vida del proceso
+        self.path, self._lock_file = _claim_queue_path(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        # isolation_level=None: controlamos BEGIN/COMMIT a mano
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")  # fsync en cada commit
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " enqueued_at REAL NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " retry_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Logs creados antes de que existieran los reintentos
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pending)")}
+        if "attempts" not in columns:
+            self._conn.execute(
+                "ALTER TABLE pending ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+            )
+            self._conn.execute(
+                "ALTER TABLE pending ADD COLUMN retry_at REAL NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " seq INTEGER PRIMARY KEY,"
+            " enqueued_at REAL NOT NULL,"
+            " failed_at REAL NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " reason TEXT NOT NULL)"
+        )
+        # Pendientes en memoria: append no recorre la tabla (COUNT(*) crece
+        # con el atraso, justo cuando PostgreSQL está caído o en el pico)
+        self._depth = self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.flushed_total = 0
+        self.dead_letter_total = 0  # Registros movidos a dead_letter
+        self.last_flush_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def append(self, records: List[AttendanceCreate]) -> None:
+        """
+        Agrega registros al log. Cuando retorna, ya están en disco.
+        Es bloqueante (fsync): llamarlo desde un threadpool.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO pending (enqueued_at, payload) VALUES (?, ?)",
+                [(now, record.model_dump_json()) for record in records],
+            )
+            self._conn.execute("COMMIT")
+            self._depth += len(records)
+            depth = self._depth
+        if depth >= self.batch_size:
+            self._wakeup.set()
+
+    def depth(self) -> int:
+        """Cantidad de registros pendientes de escribir en PostgreSQL"""
+        return self._depth
+
+    def lag_seconds(self) -> float:
+        """
+        Antigüedad del registro pendiente más viejo (0 si la cola está vacía).
+        Los que esperan un reintento no cuentan: no son atraso del flusher.
+        """
+        with self._lock:
+            oldest = self._conn.execute(
+                "SELECT MIN(enqueued_at) FROM pending WHERE attempts = 0"
+            ).fetchone()[0]
+        return 0.0 if oldest is None else max(0.0, time.time() - oldest)
+
+    def _retrying(self) -> int:
+        """Registros que esperan un reintento"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending WHERE attempts > 0"
+            ).fetchone()[0]
+
+    def _dead_letter_depth(self) -> int:
+        """Registros en la tabla dead_letter"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def flush_once(self) -> int:
+        """
+        Escribe un lote en PostgreSQL y saca del log lo que quedó resuelto.
+
+        - created / duplicate: ya está en PostgreSQL, se borra del log.
+        - unknown_worker / error: queda en el log y se reintenta con espera
+          exponencial (el trabajador puede registrarse después); al llegar
+          a max_attempts pasa a dead_letter.
+        - payload que no valida: pasa directo a dead_letter.
+
+        Si PostgreSQL falla, el lote entero queda en el log y se reintenta
+        en la próxima vuelta.
+
+        Returns:
+            Cantidad de registros procesados del lote
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload, attempts FROM pending"
+                " WHERE retry_at <= ? ORDER BY seq LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+        if not rows:
+            return 0
+
+        # Cada fila se valida por separado: una mala no frena a las demás
+        valid = []
+        dead = []
+        for seq, payload, attempts in rows:
+            try:
+                record = AttendanceCreate.model_validate_json(payload)
+            except ValidationError as e:
+                dead.append((now, f"invalid: {e.errors()[0]['msg']}", seq))
+                continue
+            valid.append((seq, attempts, record))
+
+        statuses: List[RecordStatus] = []
+        if valid:
+            try:
+                with SessionLocal() as db:
+                    statuses = AttendanceService.bulk_insert(
+                        db, [record for _, _, record in valid]
+                    )
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Error al volcar la cola de ingesta")
+                return 0
+
+        settled = []
+        retry = []
+        for (seq, attempts, _), record_status in zip(valid, statuses):
+            if record_status in _SETTLED:
+                settled.append((seq,))
+            elif attempts + 1 >= self.max_attempts:
+                dead.append((now, record_status.value, seq))
+            else:
+                retry_at = now + self.retry_base_seconds * 2**attempts
+                retry.append((retry_at, seq))
+
+        # Recién con el commit en PostgreSQL se borra del log
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            removed = self._conn.executemany(
+                "DELETE FROM pending WHERE seq = ?", settled
+            ).rowcount
+            self._conn.executemany(
+                "UPDATE pending SET attempts = attempts + 1, retry_at = ?"
+                " WHERE seq = ?",
+                retry,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dead_letter"
+                " (seq, enqueued_at, failed_at, payload, reason)"
+                " SELECT seq, enqueued_at, ?, payload, ? FROM pending WHERE seq = ?",
+                dead,
+            )
+            removed += self._conn.executemany(
+                "DELETE FROM pending WHERE seq = ?", [(seq,) for _, _, seq in dead]
+            ).rowcount
+            self._conn.execute("COMMIT")
+            self._depth -= removed
+
+        if retry:
+            logger.warning("Cola de ingesta: %d registros para reintentar", len(retry))
+        if dead:
+            logger.error("Cola de ingesta: %d registros a dead_letter", len(dead))
+        self.flushed_total += len(settled)
+        self.dead_letter_total += len(dead)
+        self.last_flush_at = time.time()
+        self.last_error = None
+        return len(rows)
+
+    def _run(self) -> None:
+        """Bucle del flusher: drena mientras haya lotes llenos, luego espera"""
+        while not self._stop.is_set():
+            try:
+                flushed = self.flush_once()
+            except Exception as e:
+                # Un error inesperado (p. ej. de SQLite) no mata al flusher
+                self.last_error = str(e)
+                logger.exception("Error inesperado en el flusher de ingesta")
+                flushed = 0
+            if flushed < self.batch_size:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+
+    def start(self) -> None:
+        """Arranca el flusher. Lo pendiente de una ejecución anterior se reenvía"""
+        if self._thread is not None:
+            return
+        pending = self.depth()
+        if pending:
+            logger.info(
+                "Cola de ingesta %s: reenviando %d registros pendientes",
+                self.path,
+                pending,
+            )
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el flusher y hace un último volcado"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while self.flush_once():
+            pass
+
+    def stats(self) -> dict:
+        """Profundidad de la cola, lag y contadores"""
+        return {
+            "depth": self.depth(),
+            "lag_seconds": round(self.lag_seconds(), 3),
+            "retrying": self._retrying(),
+            "dead_letter": self._dead_letter_depth(),
+            "flushed_total": self.flushed_total,
+            "dead_letter_total": self.dead_letter_total,
+            "last_flush_at": self.last_flush_at,
+            "last_error": self.last_error,
+        }
+
+
+@lru_cache()
+def get_ingest_queue() -> IngestQueue:
+    """Devuelve la instancia única de la cola de ingesta"""
+    settings = get_settings()
+    return IngestQueue(
+        settings.INGEST_QUEUE_PATH,
+        flush_interval=settings.INGEST_FLUSH_INTERVAL_SECONDS,
+        batch_size=settings.INGEST_FLUSH_BATCH_SIZE,
+        max_attempts=settings.INGEST_MAX_ATTEMPTS,
+        retry_base_seconds=settings.INGEST_RETRY_BASE_SECONDS,
+    )
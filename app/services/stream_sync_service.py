@@ -0,0 +1,186 @@
+"""
+Servicio para sincronización en streaming (NDJSON).
+
+Un dispositivo que estuvo offline días puede mandar miles de registros
+en un solo request: una línea JSON por registro. El servidor valida e
+inserta en bloques de tamaño fijo mientras lee, y devuelve un acuse por
+bloque. La memoria no crece con el tamaño del upload y, si se corta la
+conexión, el dispositivo solo reenvía lo que no fue acusado.
+"""
+
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.schemas.attendance import AttendanceCreate, RecordStatus
+from app.services.attendance_service import AttendanceService
+
+settings = get_settings()
+
+# Estados que significan "ya está en PostgreSQL": el dispositivo los borra
+_SETTLED = (RecordStatus.CREATED, RecordStatus.DUPLICATE)
+
+
+class LineTooLongError(ValueError):
+    """Una línea NDJSON supera SYNC_STREAM_MAX_LINE_BYTES"""
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse cuyo iterador lee el body del request mientras responde.
+
+    Con servidores ASGI de spec_version < 2.4 (y el TestClient), Starlette
+    corre listen_for_disconnect en paralelo: llama a receive() y se come
+    los chunks del body. Acá el único que llama a receive() es el
+    iterador (request.stream()), que ya detecta la desconexión del
+    cliente (ClientDisconnect).
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class StreamSyncService:
+    """Ingesta de registros de asistencia desde un body NDJSON"""
+
+    @staticmethod
+    async def iter_lines(
+        byte_chunks: AsyncIterator[bytes], max_line_bytes: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Parte un stream de bytes en líneas, sin importar cómo llegaron los
+        chunks HTTP. Solo guarda en memoria la línea incompleta actual.
+
+        Raises:
+            LineTooLongError: Si una línea supera max_line_bytes
+        """
+        buffer = b""
+        async for chunk in byte_chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            # Una línea completa puede venir entera dentro de un chunk grande
+            for line in lines:
+                if len(line) > max_line_bytes:
+                    raise LineTooLongError(f"Línea mayor a {max_line_bytes} bytes")
+                yield line
+            if len(buffer) > max_line_bytes:
+                raise LineTooLongError(f"Línea mayor a {max_line_bytes} bytes")
+        if buffer:
+            yield buffer
+
+    @staticmethod
+    async def insert_chunk(records: List[AttendanceCreate]) -> List[RecordStatus]:
+        """
+        Inserta un bloque con el camino bulk (un IN + un INSERT).
+        Cada bloque usa su propia sesión: nada queda abierto entre bloques.
+        """
+        if settings.DB_ASYNC:
+            from app.db.async_database import AsyncSessionLocal
+            from app.services.async_attendance_service import AsyncAttendanceService
+
+            async with AsyncSessionLocal() as db:
+                return await AsyncAttendanceService.bulk_insert(db, records)
+
+        def run() -> List[RecordStatus]:
+            with SessionLocal() as db:
+                return AttendanceService.bulk_insert(db, records)
+
+        return await run_in_threadpool(run)
+
+    @staticmethod
+    async def ingest(
+        byte_chunks: AsyncIterator[bytes],
+        chunk_size: int = settings.SYNC_STREAM_CHUNK_SIZE,
+        max_line_bytes: int = settings.SYNC_STREAM_MAX_LINE_BYTES,
+        final: Optional[Callable[[], dict]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Lee NDJSON, inserta por bloques y produce un acuse NDJSON por bloque.
+
+        Acuse por bloque:
+            {"chunk": 0, "first_line": 1, "last_line": 500, "created": 495,
+             "duplicate": 3, "unknown_worker": 1, "error": 0, "invalid": 1,
+             "errors": [{"line": 17, "detail": "..."}],
+             "pending": [{"line": 42, "status": "unknown_worker"}]}
+
+        Al final:
+            {"done": true, "lines": 1234, "created": ..., ...}
+        más los campos que devuelva final() (ej: el plan de sincronización).
+
+        "last_line" es la última línea confirmada: si la conexión se corta,
+        el dispositivo reenvía desde last_line + 1 (el UUID hace que los
+        reenvíos sean idempotentes). De first_line a last_line puede borrar
+        todo salvo las líneas de "pending" (unknown_worker o error), que
+        quedan para un próximo envío, igual que en /sync/batch. Las de
+        "errors" (invalid) nunca van a entrar: también se borran.
+        """
+        totals = {s.value: 0 for s in RecordStatus}
+        chunk_index = 0
+        line_number = 0
+        first_line = 1
+        records: List[AttendanceCreate] = []
+        record_lines: List[int] = []
+        invalid: List[Tuple[int, str]] = []
+
+        async def flush() -> str:
+            statuses = await StreamSyncService.insert_chunk(records)
+            ack = {
+                "chunk": chunk_index,
+                "first_line": first_line,
+                "last_line": line_number,
+                **{s.value: statuses.count(s) for s in RecordStatus},
+                RecordStatus.INVALID.value: len(invalid),
+                "errors": [
+                    {"line": line, "detail": detail} for line, detail in invalid
+                ],
+                "pending": [
+                    {"line": line, "status": record_status.value}
+                    for line, record_status in zip(record_lines, statuses)
+                    if record_status not in _SETTLED
+                ],
+            }
+            for key in totals:
+                totals[key] += ack[key]
+            return json.dumps(ack) + "\n"
+
+        try:
+            async for line in StreamSyncService.iter_lines(byte_chunks, max_line_bytes):
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    records.append(AttendanceCreate.model_validate_json(line))
+                    record_lines.append(line_number)
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    location = ".".join(str(part) for part in error["loc"])
+                    invalid.append((line_number, f"{location}: {error['msg']}"))
+
+                if len(records) + len(invalid) >= chunk_size:
+                    yield await flush()
+                    chunk_index += 1
+                    first_line = line_number + 1
+                    records, record_lines, invalid = [], [], []
+
+            if records or invalid:
+                yield await flush()
+        except LineTooLongError as e:
+            # Línea demasiado larga: se corta el stream, lo acusado ya quedó guardado
+            yield json.dumps({"error": str(e), "line": line_number + 1}) + "\n"
+            return
+
+        summary = {"done": True, "lines": line_number, **totals}
+        if final is not None:
+            summary.update(final())
+        yield json.dumps(summary) + "\n"
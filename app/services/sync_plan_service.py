@@ -0,0 +1,130 @@
+"""
+Plan de sincronización sugerido a cada tablet según la carga del servidor.
+
+En vez de que cada tablet decida solo cuándo y cuánto subir, el servidor
+le dice, en cada respuesta de sincronización y en GET /attendance/sync/plan:
+
+- cuándo volver (intervalo que crece con la carga, con jitter de +-50%
+  para que miles de tablets no lleguen juntos),
+- cuántos registros mandar por /sync/batch,
+- cuántos requests simultáneos usar.
+
+La carga (0 a 1) es la peor de estas señales, cada una relativa a su límite:
+- uso del pool de conexiones (conexiones prestadas / pool_size + overflow)
+- espera promedio por una conexión (LOAD_SHED_MAX_POOL_WAIT_MS, o 100 ms)
+- lag de la cola de ingesta (SYNC_PLAN_MAX_INGEST_LAG_SECONDS)
+- tasa de requests reciente (RATE_LIMIT_GLOBAL_PER_SECOND)
+
+Se recalcula como mucho cada SYNC_PLAN_REFRESH_SECONDS.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.core.load import load_monitor
+from app.services.ingest_queue import get_ingest_queue
+
+settings = get_settings()
+
+DEFAULT_MAX_POOL_WAIT_MS = 100.0  # Si no hay umbral de descarte configurado
+
+
+class _LoadState:
+    """Última carga calculada y la muestra de requests para la tasa"""
+
+    def __init__(self):
+        self.signals = {}
+        self.load = 0.0
+        self.computed_at = 0.0
+        self.requests_total = 0
+        self.requests_at = time.monotonic()
+        self.lock = threading.Lock()
+
+
+_state = _LoadState()
+
+
+def _engine_pool():
+    if settings.DB_ASYNC:
+        from app.db.async_database import async_engine
+
+        return async_engine.pool
+    from app.db.database import engine
+
+    return engine.pool
+
+
+class SyncPlanService:
+    """Servicio para el plan de sincronización de los tablets"""
+
+    @staticmethod
+    def pool_utilization() -> float:
+        """Fracción de las conexiones posibles que están prestadas"""
+        pool = _engine_pool()
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        return pool.checkedout() / capacity if capacity else 0.0
+
+    @staticmethod
+    def load_signals() -> dict:
+        """
+        Señales de carga, cada una normalizada a [0, 1], y su máximo.
+
+        Returns:
+            {"load", "pool", "pool_wait", "ingest_lag", "request_rate"}
+        """
+        now = time.monotonic()
+        with _state.lock:
+            if now - _state.computed_at < settings.SYNC_PLAN_REFRESH_SECONDS:
+                return {"load": _state.load, **_state.signals}
+
+            # Tasa de requests desde la muestra anterior
+            elapsed = max(now - _state.requests_at, 1e-3)
+            rate = (load_monitor.requests_total - _state.requests_total) / elapsed
+            _state.requests_total = load_monitor.requests_total
+            _state.requests_at = now
+
+            max_wait = load_monitor.max_pool_wait_ms or DEFAULT_MAX_POOL_WAIT_MS
+            lag = (
+                get_ingest_queue().lag_seconds()
+                if settings.INGEST_WRITE_BEHIND
+                else 0.0
+            )
+            signals = {
+                "pool": SyncPlanService.pool_utilization(),
+                "pool_wait": load_monitor.pool_wait_ms / max_wait,
+                "ingest_lag": lag / settings.SYNC_PLAN_MAX_INGEST_LAG_SECONDS,
+                "request_rate": rate / settings.RATE_LIMIT_GLOBAL_PER_SECOND,
+            }
+            _state.signals = {k: round(min(v, 1.0), 3) for k, v in signals.items()}
+            _state.load = max(_state.signals.values())
+            _state.computed_at = now
+            return {"load": _state.load, **_state.signals}
+
+    @staticmethod
+    def plan() -> dict:
+        """
+        Plan para la próxima sincronización de un tablet.
+
+        Returns:
+            {"next_sync_in_seconds", "next_sync_at", "batch_size",
+             "max_concurrency", "load"}
+        """
+        load = SyncPlanService.load_signals()["load"]
+
+        interval = settings.SYNC_PLAN_INTERVAL_SECONDS * (
+            1 + settings.SYNC_PLAN_MAX_BACKOFF * load
+        )
+        delay = round(interval * random.uniform(0.5, 1.5))
+        batch_range = settings.SYNC_PLAN_MAX_BATCH - settings.SYNC_PLAN_MIN_BATCH
+        concurrency = round(settings.SYNC_PLAN_MAX_CONCURRENCY * (1 - load))
+
+        return {
+            "next_sync_in_seconds": delay,
+            "next_sync_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            "batch_size": round(settings.SYNC_PLAN_MAX_BATCH - batch_range * load),
+            "max_concurrency": max(1, concurrency),
+            "load": load,
+        }
@@ -0,0 +1,172 @@
+"""
+Caché en memoria de trabajadores: uuid -> (id, nombre).
+
+El padrón es chico y cambia poco; el volumen de asistencias es enorme.
+Con este caché cada escritura de asistencia deja de consultar la tabla
+workers para resolver el UUID.
+
+Invalidación:
+- Local: WorkerService.create_worker invalida el UUID al crear.
+- Entre procesos: la fila roster_version sube en cada cambio; cada
+  proceso la consulta cada WORKER_CACHE_VERSION_CHECK_SECONDS y vacía
+  su caché si cambió.
+- TTL: aun sin cambios de versión, cada entrada vence a los
+  WORKER_CACHE_TTL_SECONDS.
+
+Un lector que hizo el SELECT antes de que se confirmara un cambio puede
+llegar a put_many después del invalidate(). Para que no vuelva a guardar
+el dato viejo, toma la generación (generation) antes del SELECT y
+put_many descarta los UUID invalidados después de esa generación.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class CachedWorker(NamedTuple):
+    """Lo mínimo de un trabajador para escribir/leer asistencias"""
+
+    id: int
+    name: str
+
+
+class WorkerCache:
+    """Caché LRU con TTL, seguro entre hilos"""
+
+    def __init__(self, max_size: int, ttl_seconds: float, version_check_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        # uuid -> (trabajador, vence_en)
+        self._entries: "OrderedDict[str, Tuple[CachedWorker, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Sube en cada invalidación. uuid -> generación en que se invalidó
+        # (acotado a max_size; lo que se descarta sube _cleared_at, que
+        # rechaza todo put_many tomado antes)
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[str, int]" = OrderedDict()
+        self._cleared_at = 0
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_many(
+        self, uuids: Iterable[str]
+    ) -> Tuple[Dict[str, CachedWorker], List[str]]:
+        """
+        Busca varios UUID.
+
+        Returns:
+            (encontrados, faltantes). Los faltantes hay que buscarlos en la BD.
+        """
+        now = time.monotonic()
+        found: Dict[str, CachedWorker] = {}
+        missing: List[str] = []
+        with self._lock:
+            for uuid in set(uuids):
+                entry = self._entries.get(uuid)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(uuid)
+                    found[uuid] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._entries[uuid]
+                    missing.append(uuid)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    @property
+    def generation(self) -> int:
+        """Generación actual: tomarla antes de leer de la BD (ver put_many)"""
+        return self._generation
+
+    def put_many(self, workers: Dict[str, CachedWorker], generation: int) -> None:
+        """
+        Guarda trabajadores recién leídos de la BD.
+
+        generation es la que se tomó antes del SELECT: los UUID invalidados
+        después no se guardan (la fila leída puede ser anterior al cambio).
+        """
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation < self._cleared_at:
+                return
+            for uuid, worker in workers.items():
+                if self._invalidated_at.get(uuid, -1) > generation:
+                    continue
+                self._entries[uuid] = (worker, expires_at)
+                self._entries.move_to_end(uuid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, uuid: Optional[str] = None) -> None:
+        """Invalida un UUID, o todo el caché si uuid es None"""
+        with self._lock:
+            self._generation += 1
+            if uuid is None:
+                self._entries.clear()
+                self._invalidated_at.clear()
+                self._cleared_at = self._generation
+            else:
+                self._entries.pop(uuid, None)
+                self._invalidated_at[uuid] = self._generation
+                self._invalidated_at.move_to_end(uuid)
+                while len(self._invalidated_at) > self.max_size:
+                    _, dropped = self._invalidated_at.popitem(last=False)
+                    self._cleared_at = max(self._cleared_at, dropped)
+            self.invalidations += 1
+
+    @property
+    def version(self) -> Optional[int]:
+        """Última versión del padrón conocida por este proceso"""
+        return self._version
+
+    def version_check_due(self) -> bool:
+        """¿Toca volver a leer roster_version?"""
+        return (
+            time.monotonic() - self._version_checked_at >= self.version_check_seconds
+        )
+
+    def sync_version(self, version: int) -> None:
+        """
+        Registra la versión leída de la BD. Si cambió desde la última vez,
+        otro proceso modificó trabajadores: se vacía el caché.
+        """
+        with self._lock:
+            changed = self._version is not None and version != self._version
+            self._version = version
+            self._version_checked_at = time.monotonic()
+        if changed:
+            self.invalidate()
+
+    def stats(self) -> dict:
+        """Contadores de hits/misses"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "version": self._version,
+        }
+
+
+# Instancia única compartida por WorkerService y AttendanceService
+worker_cache = WorkerCache(
+    max_size=settings.WORKER_CACHE_SIZE,
+    ttl_seconds=settings.WORKER_CACHE_TTL_SECONDS,
+    version_check_seconds=settings.WORKER_CACHE_VERSION_CHECK_SECONDS,
+)
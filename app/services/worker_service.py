@@ -7,13 +7,74 @@ Los endpoints solo reciben/devuelven datos.
 Los services hacen el trabajo pesado.
 """
 
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from app.core.cursor import decode_cursor, encode_cursor, keyset_page
+from app.models.roster_version import RosterVersion
 from app.models.worker import Worker
-from app.schemas.worker import WorkerCreate
-from typing import List, Optional
+from app.models.worker_template import WorkerTemplate
+from app.schemas.worker import WorkerCreate, WorkerUpdate
+from app.services.worker_cache import CachedWorker, worker_cache
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
 import struct
 
 
+def _workers_by_uuid_statement(uuids: Iterable[str]):
+    """SELECT uuid, id, name FROM workers WHERE uuid IN (...) (sin las bajas)"""
+    return select(Worker.uuid, Worker.id, Worker.name).where(
+        Worker.uuid.in_(uuids), Worker.deleted_at.is_(None)
+    )
+
+
+def _roster_version_statement():
+    """Versión actual del padrón"""
+    return select(RosterVersion.version).where(RosterVersion.id == 1)
+
+
+def _bump_roster_version_statement():
+    """
+    Sube la versión del padrón (crea la fila si no existe).
+    Va en la misma transacción que el cambio del trabajador.
+    """
+    stmt = pg_insert(RosterVersion).values(id=1, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={"version": RosterVersion.version + 1},
+    ).returning(RosterVersion.version)
+
+
+def _workers_page_statement(cursor: Optional[str], limit: int):
+    """
+    Página de trabajadores por keyset sobre id (WHERE id > :ultimo_id).
+    Lee limit + 1 filas para saber si hay otra página.
+
+    Raises:
+        ValueError: Si el cursor es inválido
+    """
+    query = (
+        select(Worker)
+        .where(Worker.deleted_at.is_(None))
+        .order_by(Worker.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Worker.id > last_id)
+    return query
+
+
+def _cache_workers(rows, generation: int) -> Dict[str, CachedWorker]:
+    """
+    Guarda en el caché las filas (uuid, id, name) leídas de la BD.
+    generation: worker_cache.generation tomada antes del SELECT.
+    """
+    workers = {uuid: CachedWorker(worker_id, name) for uuid, worker_id, name in rows}
+    worker_cache.put_many(workers, generation)
+    return workers
+
+
 class WorkerService:
     """Servicio para operaciones de trabajadores"""
 
@@ -34,11 +95,21 @@ class WorkerService:
         if existing:
             raise ValueError(f"Ya existe un trabajador con UUID {worker_data.uuid}")
 
+        # Subir la versión del padrón en la misma transacción: la fila la
+        # guarda como cursor de /workers/changes
+        version = db.execute(_bump_roster_version_statement()).scalar_one()
+
         # Crear el modelo
         db_worker = Worker(
             uuid=worker_data.uuid,
             name=worker_data.name,
             face_embedding=worker_data.face_embedding,
+            site=worker_data.site,
+            templates=[
+                WorkerTemplate(embedding=template)
+                for template in worker_data.templates or []
+            ],
+            roster_version=version,
         )
 
         # Guardar en BD
@@ -46,28 +117,199 @@ class WorkerService:
         db.commit()
         db.refresh(db_worker)  # Para obtener el ID generado
 
+        worker_cache.invalidate(db_worker.uuid)
+        worker_cache.sync_version(version)
+        return db_worker
+
+    @staticmethod
+    def update_worker(
+        db: Session, uuid: str, worker_data: WorkerUpdate
+    ) -> Optional[Worker]:
+        """
+        Actualiza los campos enviados de un trabajador. Un face_embedding
+        sin templates borra los templates anteriores.
+
+        Returns:
+            Worker actualizado, o None si no existe (o está dado de baja)
+        """
+        db_worker = WorkerService.get_worker_by_uuid(db, uuid)
+        if not db_worker:
+            return None
+
+        for field, value in worker_data.model_dump(
+            exclude_none=True, exclude={"templates"}
+        ).items():
+            setattr(db_worker, field, value)
+        if worker_data.templates:
+            # delete-orphan borra los templates anteriores
+            db_worker.templates = [
+                WorkerTemplate(embedding=template) for template in worker_data.templates
+            ]
+        elif worker_data.face_embedding is not None:
+            # Un rostro nuevo sin templates: los anteriores son del rostro
+            # viejo y la verificación seguiría aceptándolo
+            db_worker.templates = []
+
+        version = db.execute(_bump_roster_version_statement()).scalar_one()
+        db_worker.roster_version = version
+        db.commit()
+        db.refresh(db_worker)
+
+        worker_cache.invalidate(uuid)
+        worker_cache.sync_version(version)
         return db_worker
 
+    @staticmethod
+    def delete_worker(db: Session, uuid: str) -> bool:
+        """
+        Da de baja un trabajador (baja lógica).
+
+        La fila y su historial de asistencias se conservan; deja de
+        aparecer en listados, galería y checkins, y los dispositivos ven
+        la baja en /workers/changes.
+
+        Returns:
+            True si se dio de baja, False si no existía o ya estaba de baja
+        """
+        db_worker = WorkerService.get_worker_by_uuid(db, uuid)
+        if not db_worker:
+            return False
+
+        version = db.execute(_bump_roster_version_statement()).scalar_one()
+        db_worker.deleted_at = datetime.now(timezone.utc)
+        db_worker.roster_version = version
+        db.commit()
+
+        worker_cache.invalidate(uuid)
+        worker_cache.sync_version(version)
+        return True
+
+    @staticmethod
+    def get_changes(db: Session, since: Optional[str] = None, limit: int = 500) -> dict:
+        """
+        Cambios del padrón desde un cursor opaco (roster_version, id).
+
+        Cada alta, modificación o baja guarda en la fila la versión del
+        padrón que subió en su misma transacción. Esa versión la sube un
+        UPDATE sobre una sola fila, así que los commits quedan
+        serializados y el orden por versión es el orden real en que se
+        confirmaron: un cambio nunca aparece "detrás" de un cursor ya
+        entregado (con la hora de la aplicación sí podía pasar).
+
+        Args:
+            since: Cursor de la llamada anterior (None = padrón completo)
+            limit: Máximo de cambios a devolver
+
+        Returns:
+            {"changes": [Worker, ...] en orden, "next_cursor": ..., "has_more": ...}
+            Los trabajadores con deleted_at son bajas.
+
+        Raises:
+            ValueError: Si el cursor es inválido
+        """
+        query = select(Worker).order_by(Worker.roster_version, Worker.id)
+        if since:
+            since_key = tuple_(*decode_cursor(since, int, int))
+            query = query.where(tuple_(Worker.roster_version, Worker.id) > since_key)
+
+        rows = db.scalars(query.limit(limit + 1)).all()
+        page = rows[:limit]
+        return {
+            "changes": page,
+            "next_cursor": (
+                encode_cursor(page[-1].roster_version, page[-1].id) if page else since
+            ),
+            "has_more": len(rows) > limit,
+        }
+
+    @staticmethod
+    def get_changes_cursor(db: Session) -> Optional[str]:
+        """
+        Cursor del último cambio del padrón (alta, modificación o baja).
+        get_changes(since=este cursor) devuelve solo lo que pase después.
+        """
+        last = db.execute(
+            select(Worker.roster_version, Worker.id)
+            .order_by(Worker.roster_version.desc(), Worker.id.desc())
+            .limit(1)
+        ).first()
+        return encode_cursor(*last) if last else None
+
     @staticmethod
     def get_worker_by_uuid(db: Session, uuid: str) -> Optional[Worker]:
-        """Busca un trabajador por UUID"""
-        return db.query(Worker).filter(Worker.uuid == uuid).first()
+        """Busca un trabajador por UUID (sin las bajas)"""
+        return (
+            db.query(Worker)
+            .filter(Worker.uuid == uuid, Worker.deleted_at.is_(None))
+            .first()
+        )
+
+    @staticmethod
+    def refresh_roster_version(db: Session) -> Optional[int]:
+        """
+        Relee roster_version si ya pasó WORKER_CACHE_VERSION_CHECK_SECONDS.
+        Si otro proceso cambió trabajadores, el caché local se invalida.
+
+        Returns:
+            Versión del padrón conocida por este proceso
+        """
+        if worker_cache.version_check_due():
+            version = db.execute(_roster_version_statement()).scalar()
+            worker_cache.sync_version(version or 0)
+        return worker_cache.version
+
+    @staticmethod
+    def resolve_workers(db: Session, uuids: Iterable[str]) -> Dict[str, CachedWorker]:
+        """
+        Resuelve UUID de trabajadores a (id, nombre) usando el caché.
+
+        Solo los que no están en caché se buscan, con una sola consulta IN.
+        Los UUID que no existen no aparecen en el resultado.
+        """
+        WorkerService.refresh_roster_version(db)
+
+        found, missing = worker_cache.get_many(uuids)
+        if missing:
+            # Antes del SELECT: un cambio confirmado mientras tanto la supera
+            generation = worker_cache.generation
+            rows = db.execute(_workers_by_uuid_statement(missing)).all()
+            found.update(_cache_workers(rows, generation))
+        return found
+
+    @staticmethod
+    def resolve_worker(db: Session, uuid: str) -> Optional[CachedWorker]:
+        """Resuelve un solo UUID a (id, nombre) usando el caché"""
+        return WorkerService.resolve_workers(db, [uuid]).get(uuid)
 
     @staticmethod
     def get_worker_by_id(db: Session, worker_id: int) -> Optional[Worker]:
-        """Busca un trabajador por ID"""
-        return db.query(Worker).filter(Worker.id == worker_id).first()
+        """Busca un trabajador por ID (sin las bajas)"""
+        return (
+            db.query(Worker)
+            .filter(Worker.id == worker_id, Worker.deleted_at.is_(None))
+            .first()
+        )
 
     @staticmethod
-    def get_all_workers(db: Session, skip: int = 0, limit: int = 100) -> List[Worker]:
+    def get_all_workers(
+        db: Session, cursor: Optional[str] = None, limit: int = 100
+    ) -> dict:
         """
-        Obtiene lista de trabajadores (paginado).
+        Obtiene lista de trabajadores (paginado por cursor).
+
+        La página N cuesta lo mismo que la primera: se busca por índice
+        desde el último id visto en vez de saltar filas con OFFSET.
 
         Args:
-            skip: Cuántos registros saltar (para paginación)
+            cursor: next_cursor de la página anterior (None = primera página)
             limit: Máximo de registros a devolver
+
+        Returns:
+            {"items": [...], "next_cursor": "..." o None}
         """
-        return db.query(Worker).offset(skip).limit(limit).all()
+        rows = db.scalars(_workers_page_statement(cursor, limit)).all()
+        items, next_cursor = keyset_page(rows, limit, lambda w: (w.id,))
+        return {"items": items, "next_cursor": next_cursor}
 
     @staticmethod
     def bytes_to_float_array(embedding_bytes: bytes) -> list:
@@ -0,0 +1,104 @@
+"""
+Benchmark: índice IVF vs. búsqueda exacta sobre galerías sintéticas.
+
+Reporta recall@k (contra la búsqueda exacta) y latencia p50/p99 por
+consulta individual, para varios valores de nprobe.
+
+Uso:
+    python -m benchmarks.bench_ann
+    python -m benchmarks.bench_ann --sizes 10000 100000 --nprobe 4 16 64 --k 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIM, l2_normalize
+from app.ml.gallery import FaceGallery
+from app.ml.ivf_index import IVFIndex
+
+
+def synthetic_gallery(n: int, seed: int = 0) -> np.ndarray:
+    """
+    Galería sintética con algo de estructura (como embeddings reales):
+    cada vector es un "grupo" de 256 más ruido propio.
+    """
+    rng = np.random.default_rng(seed)
+    groups = rng.standard_normal((256, EMBEDDING_DIM)).astype(np.float32)
+    members = rng.integers(0, len(groups), n)
+    noise = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return l2_normalize(groups[members] + 1.5 * noise)
+
+
+def synthetic_queries(gallery: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    """Otra "foto" de trabajadores existentes: su vector + ruido (coseno ~0.8)"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(gallery), n)
+    noise = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return l2_normalize(gallery[rows] + 0.07 * noise)
+
+
+def latencies_ms(search, queries: np.ndarray) -> np.ndarray:
+    """Latencia de cada consulta individual, en milisegundos"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    """Fracción del top-k exacto que encontró la búsqueda aproximada"""
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx, exact))
+    return hits / exact.size
+
+
+def run(size: int, n_queries: int, k: int, nprobes: list) -> None:
+    gallery_matrix = synthetic_gallery(size)
+    queries = synthetic_queries(gallery_matrix, n_queries)
+    gallery = FaceGallery(range(size), [""] * size, [""] * size, gallery_matrix)
+
+    exact_rows, _ = gallery.search_batch(queries, k)
+    exact_ms = latencies_ms(lambda q: gallery.search_batch(q, k), queries)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(gallery.matrix)
+    build_s = time.perf_counter() - start
+
+    print(f"\n=== {size:,} vectores | {index.n_lists} clusters | build {build_s:.1f}s")
+    print(f"{'método':<14}{'recall@' + str(k):>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print(
+        f"{'exacto':<14}{1.0:>10.3f}"
+        f"{np.percentile(exact_ms, 50):>10.2f}{np.percentile(exact_ms, 99):>10.2f}"
+    )
+    for nprobe in nprobes:
+        approx_rows, _ = index.search_batch(queries, gallery.matrix, k, nprobe)
+        ivf_ms = latencies_ms(
+            lambda q, nprobe=nprobe: index.search_batch(q, gallery.matrix, k, nprobe),
+            queries,
+        )
+        print(
+            f"{'ivf nprobe=' + str(nprobe):<14}"
+            f"{recall_at_k(approx_rows, exact_rows):>10.3f}"
+            f"{np.percentile(ivf_ms, 50):>10.2f}{np.percentile(ivf_ms, 99):>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.nprobe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: variantes TFLite de MobileFaceNet (ver app/ml/convert_model.py).
+
+Para cada .tflite reporta tamaño, latencia p50/p99 por imagen (batch 1,
+un hilo, como en el tablet), throughput en imágenes/s con batches más
+grandes (como el servidor) y la deriva de los embeddings contra el
+grafo float32 original: similitud coseno media/mínima.
+
+Uso:
+    python -m benchmarks.bench_models --pb mobilefacenet.pb \\
+        --models mobilefacenet_float32.tflite mobilefacenet.tflite mobilefacenet_int8.tflite
+    python -m benchmarks.bench_models --pb mobilefacenet.pb --models *.tflite \\
+        --images rostros/ --batches 1 8 32
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.ml.convert_model import calibration_images, load_function
+from app.ml.embeddings import l2_normalize
+from app.ml.inference import INPUT_SIZE, dequantize_output, quantize_input
+
+
+class TFLiteRunner:
+    """Intérprete de un hilo que acepta batches de cualquier tamaño"""
+
+    def __init__(self, path: str, num_threads: int = 1):
+        import tensorflow as tf
+
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.batch_size = None
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        input_index = self.interpreter.get_input_details()[0]["index"]
+        if self.batch_size != len(batch):
+            self.interpreter.resize_tensor_input(input_index, list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(batch)
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.interpreter.set_tensor(input_index, quantize_input(input_details, batch))
+        self.interpreter.invoke()
+        return dequantize_output(
+            output_details, self.interpreter.get_tensor(output_details["index"])
+        )
+
+
+def synthetic_images(n: int, seed: int = 0) -> np.ndarray:
+    """Imágenes al azar ya normalizadas (sirven para tiempos, no para deriva)"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (n, INPUT_SIZE, INPUT_SIZE, 3)).astype(np.float32)
+    return (pixels - 127.5) / 127.5
+
+
+def reference_embeddings(pb_path: str, images: np.ndarray) -> np.ndarray:
+    """Embeddings del grafo float32 original (la verdad para la deriva)"""
+    import tensorflow as tf
+
+    function = load_function(pb_path)
+    return function(tf.constant(images)).numpy()
+
+
+def latencies_ms(runner: TFLiteRunner, images: np.ndarray) -> np.ndarray:
+    """Latencia de cada imagen individual, en milisegundos"""
+    runner(images[:1])  # Calentamiento (reserva de tensores)
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        runner(image[np.newaxis])
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def throughput(runner: TFLiteRunner, images: np.ndarray, batch: int) -> float:
+    """Imágenes por segundo procesando de a batch imágenes"""
+    runner(images[:batch])
+    start = time.perf_counter()
+    for offset in range(0, len(images), batch):
+        runner(images[offset : offset + batch])
+    return len(images) / (time.perf_counter() - start)
+
+
+def run(pb_path: str, models: list, images: np.ndarray, batches: list) -> None:
+    reference = l2_normalize(reference_embeddings(pb_path, images))
+
+    header = f"{'modelo':<32}{'MB':>7}{'p50 ms':>9}{'p99 ms':>9}"
+    header += "".join(f"{'img/s b=' + str(b):>13}" for b in batches)
+    header += f"{'cos medio':>11}{'cos mín':>10}"
+    print(f"\n=== {len(images)} imágenes")
+    print(header)
+    for path in models:
+        runner = TFLiteRunner(path)
+        embeddings = l2_normalize(runner(images))
+        similarity = np.sum(embeddings * reference, axis=1)
+        timings = latencies_ms(runner, images)
+
+        line = (
+            f"{os.path.basename(path):<32}"
+            f"{os.path.getsize(path) / 1024 / 1024:>7.2f}"
+            f"{np.percentile(timings, 50):>9.2f}{np.percentile(timings, 99):>9.2f}"
+        )
+        line += "".join(f"{throughput(runner, images, b):>13.1f}" for b in batches)
+        line += f"{similarity.mean():>11.4f}{similarity.min():>10.4f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Variantes TFLite de MobileFaceNet")
+    parser.add_argument("--pb", required=True, help="Grafo float32 de referencia")
+    parser.add_argument("--models", nargs="+", required=True, help="Archivos .tflite")
+    parser.add_argument(
+        "--images", help="Recortes de rostros reales (si no, imágenes al azar)"
+    )
+    parser.add_argument("--n", type=int, default=256, help="Cantidad de imágenes")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    if args.images:
+        images = calibration_images(args.images, limit=args.n)
+    else:
+        images = synthetic_images(args.n)
+    run(args.pb, args.models, images, args.batches)
+
+
+if __name__ == "__main__":
+    main()
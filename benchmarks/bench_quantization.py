@@ -0,0 +1,93 @@
+"""
+Benchmark: galería float32 vs. float16 vs. int8 (dos etapas).
+
+Reporta memoria de los vectores, recall@k contra la búsqueda exacta en
+float32, acierto top-1 (la consulta encuentra al trabajador del que
+salió) y latencia p50/p99 por consulta individual.
+
+Uso:
+    python -m benchmarks.bench_quantization
+    python -m benchmarks.bench_quantization --sizes 100000 --rescore 32 64 128
+"""
+
+import argparse
+
+import numpy as np
+
+from app.ml.embeddings import EMBEDDING_DIM, l2_normalize
+from app.ml.gallery import FaceGallery
+from benchmarks.bench_ann import latencies_ms, recall_at_k, synthetic_gallery
+
+
+def labeled_queries(gallery: np.ndarray, n: int, seed: int = 1):
+    """Consultas ruidosas de trabajadores existentes + la fila de origen"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(gallery), n)
+    noise = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return l2_normalize(gallery[rows] + 0.07 * noise), rows
+
+
+def run(size: int, n_queries: int, k: int, rescores: list) -> None:
+    gallery_matrix = synthetic_gallery(size)
+    queries, truth = labeled_queries(gallery_matrix, n_queries)
+    labels = [""] * size
+
+    variants = [("float32", FaceGallery(range(size), labels, labels, gallery_matrix))]
+    variants.append(
+        (
+            "float16",
+            FaceGallery(range(size), labels, labels, gallery_matrix, storage="float16"),
+        )
+    )
+    for rescore in rescores:
+        variants.append(
+            (
+                f"int8 r={rescore}",
+                FaceGallery(
+                    range(size),
+                    labels,
+                    labels,
+                    gallery_matrix,
+                    storage="int8",
+                    rescore_candidates=rescore,
+                ),
+            )
+        )
+
+    exact_rows, exact_scores = variants[0][1].search_batch(queries, k)
+
+    print(f"\n=== {size:,} vectores | {n_queries} consultas | k={k}")
+    print(
+        f"{'almacenamiento':<16}{'MB':>9}{'escaneo MB':>12}{'recall@' + str(k):>10}"
+        f"{'top-1':>8}{'err máx':>10}{'p50 ms':>9}{'p99 ms':>9}"
+    )
+    for name, gallery in variants:
+        rows, scores = gallery.search_batch(queries, k)
+        scanned = gallery.codes if gallery.codes is not None else gallery.matrix
+        timings = latencies_ms(
+            lambda q, gallery=gallery: gallery.search_batch(q, k), queries
+        )
+        print(
+            f"{name:<16}{gallery.nbytes() / 2**20:>9.1f}"
+            f"{scanned.nbytes / 2**20:>12.1f}"
+            f"{recall_at_k(rows, exact_rows):>10.3f}"
+            f"{np.mean(rows[:, 0] == truth):>8.3f}"
+            f"{np.abs(scores[:, 0] - exact_scores[:, 0]).max():>10.5f}"
+            f"{np.percentile(timings, 50):>9.2f}{np.percentile(timings, 99):>9.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[16, 64])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.rescore)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: verificación de JWT completa vs. caché de tokens verificados.
+
+Reporta latencia p50/p99 por verificación y verificaciones por segundo
+con verify_token (jose.jwt.decode + firma) y con VerifiedTokenCache
+(primer uso de cada token aparte, como miss).
+
+Uso (necesita la configuración de la app, p. ej. el .env):
+    python -m benchmarks.bench_token_cache
+    python -m benchmarks.bench_token_cache --tokens 100 --requests 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.auth.jwt_handler import create_access_token, verify_token
+from app.auth.token_cache import VerifiedTokenCache
+
+
+def timings_us(verify, tokens: list, n_requests: int) -> np.ndarray:
+    """Latencia de cada verificación, en microsegundos (tokens en ronda)"""
+    timings = np.empty(n_requests)
+    for i in range(n_requests):
+        token = tokens[i % len(tokens)]
+        start = time.perf_counter()
+        verify(token)
+        timings[i] = (time.perf_counter() - start) * 1e6
+    return timings
+
+
+def report(name: str, timings: np.ndarray) -> None:
+    print(
+        f"{name:<14}{np.percentile(timings, 50):>10.1f}"
+        f"{np.percentile(timings, 99):>10.1f}{len(timings) / timings.sum() * 1e6:>14,.0f}"
+    )
+
+
+def run(n_tokens: int, n_requests: int) -> None:
+    tokens = [
+        create_access_token({"device_id": f"tablet_{i:03d}"}) for i in range(n_tokens)
+    ]
+    cache = VerifiedTokenCache(max_size=n_tokens)
+
+    print(f"\n=== {n_tokens} tokens | {n_requests:,} requests")
+    print(f"{'método':<14}{'p50 µs':>10}{'p99 µs':>10}{'verif/s':>14}")
+    report("verify_token", timings_us(verify_token, tokens, n_requests))
+    report("caché (miss)", timings_us(cache.verify, tokens, n_tokens))
+    report("caché (hit)", timings_us(cache.verify, tokens, n_requests))
+    print(f"stats: {cache.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JWT: verify_token vs. caché")
+    parser.add_argument("--tokens", type=int, default=50, help="Tablets distintos")
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.tokens, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Tests de las funciones puras de sincronización por lotes"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.schemas.attendance import AttendanceCreate, RecordStatus
+from app.services.attendance_service import (
+    _batch_summary,
+    _classify_records,
+    _high_water_mark,
+    _merge_statuses,
+    _parse_records,
+)
+
+BASE_TIME = datetime(2025, 10, 24, 8, 0, tzinfo=timezone.utc)
+
+
+def record(uuid: str, worker_uuid: str = "w1", minutes: int = 0) -> AttendanceCreate:
+    return AttendanceCreate(
+        uuid=uuid,
+        worker_uuid=worker_uuid,
+        type="IN",
+        timestamp=BASE_TIME + timedelta(minutes=minutes),
+    )
+
+
+def test_classify_records_statuses_in_batch_order():
+    records = [record("a"), record("b"), record("c", worker_uuid="ghost"), record("d")]
+    statuses = _classify_records(
+        records, {"w1": 1}, inserted={"a"}, failed=frozenset({"d"})
+    )
+    assert statuses == [
+        RecordStatus.CREATED,
+        RecordStatus.DUPLICATE,
+        RecordStatus.UNKNOWN_WORKER,
+        RecordStatus.ERROR,
+    ]
+
+
+def test_classify_records_repeated_uuid_created_once():
+    records = [record("a"), record("a"), record("a")]
+    statuses = _classify_records(records, {"w1": 1}, inserted={"a"})
+    assert statuses == [
+        RecordStatus.CREATED,
+        RecordStatus.DUPLICATE,
+        RecordStatus.DUPLICATE,
+    ]
+
+
+def test_classify_records_unknown_worker_does_not_take_the_uuid():
+    """La aparición con trabajador desconocido no llegó al INSERT"""
+    records = [record("a", worker_uuid="ghost"), record("a")]
+    statuses = _classify_records(records, {"w1": 1}, inserted={"a"})
+    assert statuses == [RecordStatus.UNKNOWN_WORKER, RecordStatus.CREATED]
+
+
+def test_parse_records_keeps_positions_of_invalid():
+    raw = [
+        {"worker_uuid": "w1", "type": "IN", "uuid": "a"},
+        {"worker_uuid": "w1", "type": "LUNCH"},
+        {"type": "OUT"},
+        5,
+    ]
+    records, invalid = _parse_records(raw)
+    assert [r is None for r in records] == [False, True, True, True]
+    assert records[0].uuid == "a"
+    assert set(invalid) == {1, 2, 3}
+    assert invalid[1].startswith("type: ")
+    assert invalid[2].startswith("worker_uuid: ")
+    # Sin ubicación (el registro entero): solo el mensaje
+    assert not invalid[3].startswith(":")
+
+
+def test_parse_records_rejects_future_timestamp():
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    records, invalid = _parse_records(
+        [{"worker_uuid": "w1", "type": "IN", "timestamp": future.isoformat()}]
+    )
+    assert records == [None]
+    assert "futuro" in invalid[0]
+
+
+def test_merge_statuses_puts_invalid_back_in_place():
+    records = [record("a"), None, record("b"), None]
+    merged = _merge_statuses(
+        records, [RecordStatus.CREATED, RecordStatus.UNKNOWN_WORKER]
+    )
+    assert merged == [
+        RecordStatus.CREATED,
+        RecordStatus.INVALID,
+        RecordStatus.UNKNOWN_WORKER,
+        RecordStatus.INVALID,
+    ]
+
+
+def test_batch_summary_counts_and_errors():
+    records = [record("a"), None, record("b", worker_uuid="ghost"), record("c")]
+    statuses = [
+        RecordStatus.CREATED,
+        RecordStatus.INVALID,
+        RecordStatus.UNKNOWN_WORKER,
+        RecordStatus.ERROR,
+    ]
+    summary = _batch_summary(records, statuses, {1: "type: inválido"})
+    assert summary["created"] == 1
+    assert summary["skipped"] == 3
+    assert summary["statuses"] == statuses
+    assert summary["errors"] == [
+        "Registro 1 inválido: type: inválido",
+        "Trabajador no encontrado: ghost",
+        "Error al guardar registro: c",
+    ]
+
+
+def test_high_water_mark_newest_acknowledged():
+    records = [record("a", minutes=5), record("b", minutes=1), None]
+    statuses = [RecordStatus.CREATED, RecordStatus.DUPLICATE, RecordStatus.INVALID]
+    assert _high_water_mark(records, statuses) == BASE_TIME + timedelta(minutes=5)
+
+
+def test_high_water_mark_stops_before_pending():
+    records = [
+        record("a", minutes=1),
+        record("b", minutes=3),
+        record("c", minutes=5),
+        record("d", minutes=4),
+    ]
+    statuses = [
+        RecordStatus.CREATED,
+        RecordStatus.UNKNOWN_WORKER,
+        RecordStatus.CREATED,
+        RecordStatus.ERROR,
+    ]
+    assert _high_water_mark(records, statuses) == BASE_TIME + timedelta(minutes=1)
+
+
+def test_high_water_mark_none_without_acknowledged():
+    records = [record("a", minutes=1), None]
+    statuses = [RecordStatus.UNKNOWN_WORKER, RecordStatus.INVALID]
+    assert _high_water_mark(records, statuses) is None
+    records = [record("a", minutes=2), record("b", minutes=1)]
+    statuses = [RecordStatus.CREATED, RecordStatus.ERROR]
+    assert _high_water_mark(records, statuses) is None
@@ -0,0 +1,42 @@
+"""Tests de cursores y paginación por keyset"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.cursor import decode_cursor, encode_cursor, keyset_page
+
+
+def key(row: dict) -> tuple:
+    return (row["updated_at"], row["id"])
+
+
+def rows(n: int) -> list:
+    return [
+        {"id": i, "updated_at": datetime(2025, 10, 24, 8, i, tzinfo=timezone.utc)}
+        for i in range(n)
+    ]
+
+
+def test_keyset_page_extra_row_means_next_page():
+    items, cursor = keyset_page(rows(4), 3, key)
+    assert [r["id"] for r in items] == [0, 1, 2]
+    assert decode_cursor(cursor, datetime, int) == [rows(3)[2]["updated_at"], 2]
+
+
+@pytest.mark.parametrize("n", [0, 2, 3])
+def test_keyset_page_last_page_without_cursor(n):
+    items, cursor = keyset_page(rows(n), 3, key)
+    assert len(items) == n
+    assert cursor is None
+
+
+def test_cursor_round_trip():
+    moment = datetime(2025, 10, 24, 8, 0, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(moment, 7), datetime, int) == [moment, 7]
+
+
+@pytest.mark.parametrize("cursor", ["###", encode_cursor(1), encode_cursor("x", 1)])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, datetime, int)
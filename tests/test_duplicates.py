@@ -0,0 +1,51 @@
+"""Tests de la búsqueda de pares duplicados por bloques"""
+
+import numpy as np
+import pytest
+
+from app.ml.duplicates import block_pairs, find_duplicate_pairs
+
+
+def normalized_matrix(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((n, 8)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def brute_force_pairs(matrix: np.ndarray, threshold: float) -> set:
+    scores = matrix @ matrix.T
+    i, j = np.nonzero(np.triu(scores >= threshold, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+@pytest.mark.parametrize("block", [1, 3, 7, 50])
+def test_block_pairs_upper_triangle_matches_brute_force(block):
+    matrix = normalized_matrix(23)
+    threshold = 0.2
+    found = set()
+    for start in range(0, len(matrix), block):
+        i, j, scores = block_pairs(matrix, start, block, threshold)
+        assert np.all(i < j)
+        assert np.all((start <= i) & (i < start + block))
+        np.testing.assert_allclose(
+            scores, np.sum(matrix[i] * matrix[j], axis=1), rtol=1e-5
+        )
+        pairs = set(zip(i.tolist(), j.tolist()))
+        assert not pairs & found
+        found |= pairs
+    assert found == brute_force_pairs(matrix, threshold)
+
+
+def test_block_pairs_identical_rows_without_self_pairs():
+    row = normalized_matrix(1)[0]
+    matrix = np.stack([row, row, row])
+    i, j, _ = block_pairs(matrix, 0, 2, threshold=0.99)
+    assert sorted(zip(i.tolist(), j.tolist())) == [(0, 1), (0, 2), (1, 2)]
+
+
+def test_find_duplicate_pairs_covers_every_block():
+    matrix = normalized_matrix(30, seed=1)
+    found = set()
+    for i, j, _ in find_duplicate_pairs(matrix, threshold=0.3, block=4):
+        found |= set(zip(i.tolist(), j.tolist()))
+    assert found == brute_force_pairs(matrix, 0.3)
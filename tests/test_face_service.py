@@ -0,0 +1,89 @@
+"""Tests de la carga de la galería en FaceService.get_gallery"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from app.ml.gallery import EMBEDDING_DIM, FaceGallery, LayeredGallery
+from app.services import face_service
+from app.services.face_service import FaceService, _GalleryState
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = _GalleryState()
+    monkeypatch.setattr(face_service, "_state", state)
+    monkeypatch.setattr(FaceService, "compaction_due", staticmethod(lambda g: False))
+    return state
+
+
+def set_version(monkeypatch, version: int) -> None:
+    monkeypatch.setattr(
+        face_service.WorkerService,
+        "refresh_roster_version",
+        staticmethod(lambda db: version),
+    )
+
+
+def empty_gallery() -> LayeredGallery:
+    return LayeredGallery(
+        FaceGallery([], [], [], np.empty((0, EMBEDDING_DIM), np.float32))
+    )
+
+
+def test_pull_does_not_block_other_requests(state, monkeypatch):
+    gallery = empty_gallery()
+    monkeypatch.setattr(
+        FaceService,
+        "open_gallery",
+        staticmethod(lambda db, version: (gallery, "c1", None)),
+    )
+    set_version(monkeypatch, 1)
+    assert FaceService.get_gallery(None) is gallery
+
+    pulling = threading.Event()
+    release = threading.Event()
+
+    def slow_pull(db, gallery, since):
+        pulling.set()
+        release.wait(5)
+        return "c2"
+
+    monkeypatch.setattr(FaceService, "pull_changes", staticmethod(slow_pull))
+    set_version(monkeypatch, 2)
+    loader = threading.Thread(target=FaceService.get_gallery, args=(None,))
+    loader.start()
+    assert pulling.wait(5)
+    try:
+        # Mientras se leen los cambios: ni el lock tomado ni esperas
+        assert not state.lock.locked()
+        assert FaceService.get_gallery(None) is gallery
+        assert state.version == 1
+    finally:
+        release.set()
+        loader.join(5)
+    assert (state.version, state.cursor) == (2, "c2")
+
+
+def test_first_load_waits_for_the_loader(state, monkeypatch):
+    gallery = empty_gallery()
+    calls = []
+
+    def open_gallery(db, version):
+        calls.append(version)
+        return gallery, None, None
+
+    monkeypatch.setattr(FaceService, "open_gallery", staticmethod(open_gallery))
+    set_version(monkeypatch, 1)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(FaceService.get_gallery(None)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert results == [gallery] * 4
+    assert calls == [1]
@@ -0,0 +1,88 @@
+"""Tests del enmascarado de LayeredGallery"""
+
+import numpy as np
+import pytest
+
+from app.ml.gallery import EMBEDDING_DIM, FaceGallery, LayeredGallery
+
+
+def embeddings(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+
+
+def layered(n: int, storage: str = "float32") -> LayeredGallery:
+    ids = list(range(1, n + 1))
+    base = FaceGallery(
+        ids=ids,
+        uuids=[f"u{i}" for i in ids],
+        names=[f"w{i}" for i in ids],
+        matrix=embeddings(n),
+        storage=storage,
+    )
+    return LayeredGallery(base)
+
+
+def found_uuids(gallery: LayeredGallery, query, k: int) -> list:
+    rows, _ = gallery.search_batch(query, k)
+    return [
+        gallery.describe(row)["worker_uuid"] for row in rows[0].tolist() if row >= 0
+    ]
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_removed_worker_is_not_found(storage):
+    gallery = layered(20, storage)
+    query = gallery.base.matrix[4].astype(np.float32)
+    assert found_uuids(gallery, query, 1) == ["u5"]
+    gallery.remove(5)
+    assert len(gallery) == 19
+    assert "u5" not in found_uuids(gallery, query, 20)
+    assert len(found_uuids(gallery, query, 20)) == 19
+
+
+def test_updated_worker_is_found_in_the_delta():
+    gallery = layered(10)
+    new_embedding = embeddings(1, seed=99)[0]
+    gallery.upsert(3, "u3", "w3", new_embedding)
+    assert len(gallery) == 10
+    rows, scores = gallery.search_batch(new_embedding, 10)
+    assert rows[0, 0] == len(gallery.base)
+    assert scores[0, 0] == pytest.approx(1.0, abs=1e-5)
+    # La fila vieja de la base quedó enmascarada: u3 aparece una sola vez
+    uuids = [
+        gallery.describe(row)["worker_uuid"] for row in rows[0].tolist() if row >= 0
+    ]
+    assert uuids.count("u3") == 1
+
+
+def test_masking_is_idempotent_and_ignores_unknown_ids():
+    gallery = layered(5)
+    gallery.remove(2)
+    gallery.remove(2)
+    gallery.upsert(2, "u2", "w2", embeddings(1, seed=7)[0])
+    gallery.remove(999)
+    assert gallery.masked_rows.tolist() == [1]
+    assert gallery.pending() == 2
+
+
+def test_masked_rows_survive_buffer_growth():
+    gallery = layered(3000)
+    for worker_id in range(1, 2501):
+        gallery.remove(worker_id)
+    assert len(gallery.masked_rows) == 2500
+    assert sorted(gallery.masked_rows.tolist()) == list(range(2500))
+    assert len(gallery) == 500
+    rows, _ = gallery.search_batch(embeddings(4, seed=3), 600)
+    found = rows[rows >= 0]
+    assert len(found) == 4 * 500
+    assert np.all(found >= 2500)
+
+
+def test_all_masked_returns_no_candidates():
+    gallery = layered(4)
+    for worker_id in range(1, 5):
+        gallery.remove(worker_id)
+    rows, scores = gallery.search_batch(embeddings(1)[0], 3)
+    assert np.all(rows == -1)
+    assert not np.any(np.isfinite(scores))
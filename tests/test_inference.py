@@ -0,0 +1,79 @@
+"""Tests del fallback de batch fijo en la inferencia TFLite"""
+
+import numpy as np
+import pytest
+
+from app.ml import inference
+
+
+class FixedBatchInterpreter:
+    """
+    Intérprete de prueba con batch fijo 1: resize_tensor_input acepta
+    cualquier forma pero allocate_tensors falla con batch != 1, como un
+    modelo convertido sin batch dinámico.
+    """
+
+    def __init__(self):
+        self.input_shape = [1, inference.INPUT_SIZE, inference.INPUT_SIZE, 3]
+        self.allocated_shape = list(self.input_shape)
+        self.input = None
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": self.input_shape, "dtype": np.float32}]
+
+    def get_output_details(self):
+        return [{"index": 1, "dtype": np.float32}]
+
+    def resize_tensor_input(self, index, shape):
+        self.input_shape = list(shape)
+
+    def allocate_tensors(self):
+        if self.input_shape[0] != 1:
+            raise RuntimeError("El modelo solo acepta batch 1")
+        self.allocated_shape = list(self.input_shape)
+
+    def set_tensor(self, index, value):
+        # Como TFLite: la forma es la del último resize, haya reservado o no
+        if list(value.shape) != self.input_shape:
+            raise ValueError(f"Forma {value.shape} != {self.input_shape}")
+        if self.allocated_shape != self.input_shape:
+            raise RuntimeError("Tensores sin reservar")
+        self.input = value
+
+    def invoke(self):
+        pass
+
+    def get_tensor(self, index):
+        # Embedding de prueba: el primer píxel de cada imagen repetido
+        return np.repeat(self.input[:, 0, 0, :1], 128, axis=1)
+
+
+@pytest.fixture
+def interpreter(monkeypatch):
+    interpreter = FixedBatchInterpreter()
+    monkeypatch.setattr(inference, "_interpreter", interpreter)
+    monkeypatch.setattr(inference, "_batch_size", 1)
+    monkeypatch.setattr(inference, "_dynamic_batch", True)
+    return interpreter
+
+
+def images(n: int) -> np.ndarray:
+    size = inference.INPUT_SIZE
+    batch = np.zeros((n, size, size, 3), dtype=np.float32)
+    batch[:, 0, 0, 0] = np.arange(n)
+    return batch
+
+
+def test_fixed_batch_model_falls_back_to_one_image(interpreter):
+    embeddings = inference._embed(images(3))
+    assert embeddings.shape == (3, 128)
+    np.testing.assert_array_equal(embeddings[:, 0], [0, 1, 2])
+    assert inference._dynamic_batch is False
+    assert inference._batch_size == 1
+
+
+def test_later_requests_keep_working_after_fallback(interpreter):
+    inference._embed(images(3))
+    for n in (1, 4, 2):
+        embeddings = inference._embed(images(n))
+        np.testing.assert_array_equal(embeddings[:, 0], np.arange(n))
@@ -0,0 +1,153 @@
+"""Tests de IngestQueue: contador de pendientes y caminos de falla del volcado"""
+
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.attendance import AttendanceCreate, RecordStatus
+from app.services import ingest_queue as ingest_module
+from app.services.ingest_queue import IngestQueue
+
+
+def record(uuid: str) -> AttendanceCreate:
+    return AttendanceCreate(
+        uuid=uuid,
+        worker_uuid="w1",
+        type="IN",
+        timestamp=datetime(2025, 10, 24, 8, 0, tzinfo=timezone.utc),
+    )
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # bulk_insert se reemplaza en cada test: la sesión nunca se usa
+    monkeypatch.setattr(ingest_module, "SessionLocal", nullcontext)
+    return IngestQueue(
+        str(tmp_path / "ingest.db"),
+        flush_interval=1.0,
+        batch_size=10,
+        max_attempts=3,
+        retry_base_seconds=60.0,
+    )
+
+
+def set_bulk_insert(monkeypatch, bulk_insert) -> None:
+    monkeypatch.setattr(
+        ingest_module.AttendanceService, "bulk_insert", staticmethod(bulk_insert)
+    )
+
+
+def pending_rows(queue: IngestQueue) -> list:
+    return queue._conn.execute(
+        "SELECT json_extract(payload, '$.uuid'), attempts, retry_at"
+        " FROM pending ORDER BY seq"
+    ).fetchall()
+
+
+def dead_rows(queue: IngestQueue) -> list:
+    return queue._conn.execute(
+        "SELECT json_extract(payload, '$.uuid'), reason FROM dead_letter ORDER BY seq"
+    ).fetchall()
+
+
+def test_flush_once_settled_rows_leave_the_log(queue, monkeypatch):
+    set_bulk_insert(
+        monkeypatch,
+        lambda db, records: [RecordStatus.CREATED, RecordStatus.DUPLICATE],
+    )
+    queue.append([record("a"), record("b")])
+    assert queue.flush_once() == 2
+    assert queue.depth() == 0
+    assert queue.flushed_total == 2
+
+
+def test_flush_once_database_error_keeps_the_batch(queue, monkeypatch):
+    def fail(db, records):
+        raise RuntimeError("conexión perdida")
+
+    set_bulk_insert(monkeypatch, fail)
+    queue.append([record("a"), record("b")])
+    assert queue.flush_once() == 0
+    assert queue.last_error == "conexión perdida"
+    assert queue.depth() == 2
+    assert pending_rows(queue) == [("a", 0, 0), ("b", 0, 0)]
+    assert dead_rows(queue) == []
+
+
+def test_flush_once_invalid_payload_goes_to_dead_letter(queue, monkeypatch):
+    received = []
+
+    def bulk_insert(db, records):
+        received.extend(r.uuid for r in records)
+        return [RecordStatus.CREATED] * len(records)
+
+    set_bulk_insert(monkeypatch, bulk_insert)
+    queue.append([record("a"), record("bad")])
+    # Un payload que ya no valida (p. ej. escrito por una versión anterior)
+    queue._conn.execute(
+        "UPDATE pending SET payload = ? WHERE json_extract(payload, '$.uuid') = ?",
+        ('{"uuid": "bad", "type": "IN"}', "bad"),
+    )
+    assert queue.flush_once() == 2
+    assert received == ["a"]
+    assert queue.depth() == 0
+    [(uuid, reason)] = dead_rows(queue)
+    assert uuid == "bad"
+    assert reason.startswith("invalid: ")
+    assert queue.dead_letter_total == 1
+
+
+def test_flush_once_unknown_worker_is_retried_with_backoff(queue, monkeypatch):
+    set_bulk_insert(
+        monkeypatch,
+        lambda db, records: [RecordStatus.UNKNOWN_WORKER, RecordStatus.ERROR],
+    )
+    queue.append([record("a"), record("b")])
+    before = time.time()
+    assert queue.flush_once() == 2
+    rows = pending_rows(queue)
+    assert [(uuid, attempts) for uuid, attempts, _ in rows] == [("a", 1), ("b", 1)]
+    assert all(retry_at >= before + 60.0 for _, _, retry_at in rows)
+    # Hasta retry_at no se vuelven a leer
+    assert queue.flush_once() == 0
+    assert queue.depth() == 2
+    assert queue.stats()["retrying"] == 2
+    assert queue.lag_seconds() == 0.0
+
+
+def test_flush_once_dead_letter_after_max_attempts(queue, monkeypatch):
+    set_bulk_insert(monkeypatch, lambda db, records: [RecordStatus.UNKNOWN_WORKER])
+    queue.append([record("a")])
+    for attempt in range(queue.max_attempts):
+        # Vence la espera del reintento anterior
+        queue._conn.execute("UPDATE pending SET retry_at = 0")
+        assert queue.flush_once() == 1
+    assert queue.depth() == 0
+    assert dead_rows(queue) == [("a", RecordStatus.UNKNOWN_WORKER.value)]
+    assert queue.dead_letter_total == 1
+
+
+def test_depth_counts_appends_and_survives_reopen(queue, monkeypatch):
+    set_bulk_insert(
+        monkeypatch,
+        lambda db, records: [
+            RecordStatus.CREATED,
+            RecordStatus.CREATED,
+            RecordStatus.UNKNOWN_WORKER,
+        ],
+    )
+    queue.append([record("a"), record("b")])
+    queue.append([record("c")])
+    assert queue.depth() == 3
+    assert queue.flush_once() == 3
+    assert queue.depth() == 1
+    # Al reabrir, el contador arranca con lo que quedó en el log
+    queue._conn.close()
+    queue._lock_file.close()
+    reopened = IngestQueue(
+        queue.path, flush_interval=1.0, batch_size=10, max_attempts=3
+    )
+    assert reopened.path == queue.path
+    assert reopened.depth() == 1
@@ -0,0 +1,42 @@
+"""Tests del token bucket"""
+
+import pytest
+
+from app.core.rate_limit import TokenBucket
+
+
+def test_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated_at
+    assert [bucket.take(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(now) == pytest.approx(0.5)
+
+
+def test_bucket_refills_at_rate_up_to_burst():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated_at
+    for _ in range(3):
+        bucket.take(now)
+    assert bucket.take(now + 0.5) == 0.0
+    assert bucket.take(now + 0.5) > 0
+    # Mucho tiempo después no acumula más que burst
+    later = now + 100
+    assert [bucket.take(later) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(later) > 0
+
+
+def test_bucket_rejected_take_does_not_spend():
+    bucket = TokenBucket(rate=1.0, burst=1)
+    now = bucket.updated_at
+    bucket.take(now)
+    assert bucket.take(now + 0.5) == pytest.approx(0.5)
+    assert bucket.take(now + 1.0) == 0.0
+
+
+def test_bucket_refund_is_capped_at_burst():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    now = bucket.updated_at
+    bucket.take(now)
+    bucket.refund()
+    bucket.refund()
+    assert bucket.tokens == 2
@@ -0,0 +1,50 @@
+"""Tests del snapshot de galería con matriz float16"""
+
+import numpy as np
+import pytest
+
+from app.ml.gallery import EMBEDDING_DIM, FaceGallery
+from app.ml.snapshot import GallerySnapshot, write_snapshot
+
+
+def snapshot(tmp_path, dtype: str) -> GallerySnapshot:
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "gallery.snap")
+    write_snapshot(
+        path,
+        ids=[1, 2, 3],
+        uuids=["u1", "u2", "u3"],
+        names=["a", "b", "c"],
+        matrix=rng.standard_normal((3, EMBEDDING_DIM)).astype(np.float32),
+        dtype=dtype,
+    )
+    return GallerySnapshot(path)
+
+
+def gallery(snap: GallerySnapshot, storage: str) -> FaceGallery:
+    return FaceGallery(
+        snap.ids, snap.uuids, snap.names, snap.matrix, storage=storage, normalized=True
+    )
+
+
+def test_float16_storage_maps_the_snapshot_without_copying(tmp_path):
+    snap = snapshot(tmp_path, "float16")
+    assert snap.matrix.dtype == np.float16
+    base = gallery(snap, "float16")
+    assert np.shares_memory(base.matrix, snap.matrix)
+    query = snap.matrix[1].astype(np.float32)
+    assert base.search(query, 1)[0][0] == 1
+
+
+@pytest.mark.parametrize("storage", ["float32", "int8"])
+def test_float16_snapshot_with_other_storage(tmp_path, storage):
+    snap = snapshot(tmp_path, "float16")
+    base = gallery(snap, storage)
+    assert base.search(snap.matrix[2].astype(np.float32), 1)[0][0] == 2
+
+
+def test_float32_is_the_default(tmp_path):
+    snap = snapshot(tmp_path, "float32")
+    assert snap.matrix.dtype == np.float32
+    with pytest.raises(ValueError):
+        snapshot(tmp_path, "int8")
@@ -0,0 +1,96 @@
+"""Tests de la sincronización en streaming (NDJSON)"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.schemas.attendance import RecordStatus
+from app.services.stream_sync_service import LineTooLongError, StreamSyncService
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def collect(*parts: bytes, max_line_bytes: int = 100) -> list:
+    async def run():
+        return [
+            line
+            async for line in StreamSyncService.iter_lines(
+                chunks(*parts), max_line_bytes
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_iter_lines_independent_of_chunking():
+    body = b'{"a": 1}\n{"b": 2}\n\n{"c": 3}'
+    expected = [b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}']
+    assert collect(body) == expected
+    assert collect(*(body[i : i + 1] for i in range(len(body)))) == expected
+    assert collect(body[:3], body[3:12], body[12:]) == expected
+
+
+def test_iter_lines_trailing_newline_and_empty_body():
+    assert collect(b"x\ny\n") == [b"x", b"y"]
+    assert collect() == []
+    assert collect(b"") == []
+
+
+def test_iter_lines_line_at_the_limit_passes():
+    assert collect(b"a" * 10 + b"\n", max_line_bytes=10) == [b"a" * 10]
+
+
+def test_iter_lines_long_line_inside_one_chunk():
+    with pytest.raises(LineTooLongError):
+        collect(b"ok\n" + b"a" * 11 + b"\nok\n", max_line_bytes=10)
+
+
+def test_iter_lines_long_line_across_chunks():
+    """La línea incompleta no crece sin límite esperando el salto de línea"""
+    with pytest.raises(LineTooLongError):
+        collect(*([b"a" * 4] * 3), max_line_bytes=10)
+
+
+def ndjson_line(uuid: str, worker_uuid: str = "w1") -> bytes:
+    record = {"uuid": uuid, "worker_uuid": worker_uuid, "type": "IN"}
+    return json.dumps(record).encode() + b"\n"
+
+
+def test_ingest_ack_lists_pending_lines(monkeypatch):
+    """unknown_worker y error se informan por línea: no se pueden borrar"""
+    status_of = {"w1": RecordStatus.CREATED, "ghost": RecordStatus.UNKNOWN_WORKER}
+
+    async def insert_chunk(records):
+        return [
+            RecordStatus.ERROR if r.uuid == "boom" else status_of[r.worker_uuid]
+            for r in records
+        ]
+
+    monkeypatch.setattr(StreamSyncService, "insert_chunk", staticmethod(insert_chunk))
+    body = (
+        ndjson_line("a")
+        + ndjson_line("b", worker_uuid="ghost")
+        + b'{"type": "IN"}\n'
+        + ndjson_line("boom")
+        + ndjson_line("c", worker_uuid="ghost")
+    )
+
+    async def run():
+        return [
+            json.loads(ack)
+            async for ack in StreamSyncService.ingest(chunks(body), chunk_size=4)
+        ]
+
+    first, second, done = asyncio.run(run())
+    assert (first["first_line"], first["last_line"]) == (1, 4)
+    assert first["pending"] == [
+        {"line": 2, "status": "unknown_worker"},
+        {"line": 4, "status": "error"},
+    ]
+    assert [e["line"] for e in first["errors"]] == [3]
+    assert second["pending"] == [{"line": 5, "status": "unknown_worker"}]
+    assert done["unknown_worker"] == 2 and done["created"] == 1
@@ -0,0 +1,85 @@
+"""Tests del caché de tokens verificados"""
+
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.jwt_handler import create_access_token
+from app.auth.token_cache import VerifiedTokenCache
+
+
+def token(device_id: str = "tablet_001") -> str:
+    return create_access_token({"device_id": device_id})
+
+
+def test_verify_caches_until_exp():
+    cache = VerifiedTokenCache(max_size=10)
+    access_token = token()
+    assert cache.verify(access_token)["device_id"] == "tablet_001"
+    assert cache.verify(access_token)["device_id"] == "tablet_001"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = VerifiedTokenCache(max_size=2)
+    tokens = [token(f"tablet_{i}") for i in range(3)]
+    for access_token in tokens:
+        cache.verify(access_token)
+    assert cache.stats()["size"] == 2
+    cache.verify(tokens[0])
+    assert cache.misses == 4
+
+
+def test_invalid_token_rejected():
+    cache = VerifiedTokenCache(max_size=10)
+    with pytest.raises(HTTPException) as error:
+        cache.verify("no-es-un-jwt")
+    assert error.value.status_code == 401
+
+
+def test_revoked_token_rejected_even_if_cached():
+    cache = VerifiedTokenCache(max_size=10)
+    access_token = token()
+    cache.verify(access_token)
+    cache.revoke_token(access_token)
+    with pytest.raises(HTTPException):
+        cache.verify(access_token)
+
+
+def test_revoke_device_only_rejects_older_tokens():
+    cache = VerifiedTokenCache(max_size=10)
+    old_token = token()
+    revoked_at = cache.verify(old_token)["iat"] + 0.001
+    cache.revoke_device("tablet_001", revoked_at)
+    with pytest.raises(HTTPException):
+        cache.verify(old_token)
+    # Otro dispositivo no se ve afectado
+    assert cache.verify(token("tablet_002"))["device_id"] == "tablet_002"
+    # Un token emitido después de la revocación vale
+    time.sleep(0.01)
+    assert cache.verify(token())["device_id"] == "tablet_001"
+    # Una revocación más vieja no retrocede la vigente
+    cache.revoke_device("tablet_001", revoked_at - 60)
+    with pytest.raises(HTTPException):
+        cache.verify(old_token)
+
+
+def test_load_revocations_merges_and_forgets_old():
+    cache = VerifiedTokenCache(max_size=10)
+    now = time.time()
+    cache.revoke_device("tablet_001", now + 1)
+    cache.revoke_device("tablet_002", now - 3600)
+    cache.load_revocations({"tablet_003": now + 1}, cutoff=now - 60)
+    assert cache.stats()["revoked_devices"] == 2
+    with pytest.raises(HTTPException):
+        cache.verify(token("tablet_003"))
+    assert cache.verify(token("tablet_002"))["device_id"] == "tablet_002"
+
+
+def test_allowlist():
+    cache = VerifiedTokenCache(max_size=10, allowed_devices=["tablet_001"])
+    assert cache.verify(token())["device_id"] == "tablet_001"
+    with pytest.raises(HTTPException) as error:
+        cache.verify(token("tablet_999"))
+    assert error.value.detail == "Dispositivo no autorizado"
@@ -0,0 +1,51 @@
+"""Tests del caché de trabajadores"""
+
+from app.services.worker_cache import CachedWorker, WorkerCache
+
+
+def cache(max_size: int = 100) -> WorkerCache:
+    return WorkerCache(max_size=max_size, ttl_seconds=60, version_check_seconds=5)
+
+
+def test_put_then_get():
+    workers = cache()
+    workers.put_many({"u1": CachedWorker(1, "Ana")}, workers.generation)
+    found, missing = workers.get_many(["u1", "u2"])
+    assert found == {"u1": CachedWorker(1, "Ana")}
+    assert missing == ["u2"]
+
+
+def test_stale_read_after_invalidate_is_not_cached():
+    """El SELECT fue anterior al cambio: su fila no vuelve al caché"""
+    workers = cache()
+    generation = workers.generation
+    workers.invalidate("u1")
+    workers.put_many(
+        {"u1": CachedWorker(1, "Nombre viejo"), "u2": CachedWorker(2, "Beto")},
+        generation,
+    )
+    found, missing = workers.get_many(["u1", "u2"])
+    assert found == {"u2": CachedWorker(2, "Beto")}
+    assert missing == ["u1"]
+    # Una lectura posterior al cambio sí se guarda
+    workers.put_many({"u1": CachedWorker(1, "Nombre nuevo")}, workers.generation)
+    assert workers.get_many(["u1"])[0] == {"u1": CachedWorker(1, "Nombre nuevo")}
+
+
+def test_stale_read_after_full_invalidation_is_dropped():
+    workers = cache()
+    generation = workers.generation
+    workers.sync_version(1)
+    workers.sync_version(2)
+    workers.put_many({"u1": CachedWorker(1, "Ana")}, generation)
+    assert workers.get_many(["u1"])[0] == {}
+
+
+def test_forgotten_invalidations_reject_older_reads():
+    """Con el registro de invalidaciones lleno, se rechaza de más, nunca de menos"""
+    workers = cache(max_size=2)
+    generation = workers.generation
+    for uuid in ["u1", "u2", "u3"]:
+        workers.invalidate(uuid)
+    workers.put_many({"u1": CachedWorker(1, "Ana")}, generation)
+    assert workers.get_many(["u1"])[0] == {}